@@ -0,0 +1,341 @@
+"""
+Cliente asyncio de Lamport para embeber en servicios.
+
+Un AsyncLamportMux abre un único socket UDP y multiplexa sobre él muchas
+identidades lógicas (AsyncLamportClient). El servidor incluye `client_id` en
+sus respuestas y `recipient_id` en los broadcasts, lo que permite despachar
+cada datagrama a su identidad.
+
+Uso:
+
+    mux = await AsyncLamportMux.open('localhost', 5000)
+    client = mux.client(1, 'Cliente-1')
+    await client.connect()
+    await client.send("Hola")
+    async for message in client.broadcasts():
+        ...
+
+El historial pedido con `request_catch_up` llega aparte, por `history()`,
+para no mezclarlo con el tráfico en vivo.
+
+La semántica de Lamport es la misma que la de LamportClient: el reloj
+avanza al registrarse, enviar, recibir confirmaciones y broadcasts y en los
+eventos internos; los heartbeats no lo modifican.
+"""
+
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+from lamport_clock import LamportClock
+from holdback import HoldBackQueue
+
+
+class _MultiplexProtocol(asyncio.DatagramProtocol):
+    """Protocolo asyncio que entrega los datagramas al multiplexor."""
+
+    def __init__(self, mux: 'AsyncLamportMux'):
+        self.mux = mux
+
+    def datagram_received(self, data: bytes, addr):
+        self.mux.dispatch(data)
+
+    def error_received(self, exc: Exception):
+        self.mux.stats['errors'] += 1
+
+    def pause_writing(self):
+        # El buffer del transporte superó su límite: el escritor espera
+        self.mux.writable.clear()
+
+    def resume_writing(self):
+        self.mux.writable.set()
+
+
+class AsyncLamportMux:
+    """Socket UDP compartido por varias identidades de cliente."""
+
+    def __init__(self, server_host: str = 'localhost', server_port: int = 5000,
+                 send_buffer: int = 1000, heartbeat_interval: float = 10):
+        """
+        Inicializa el multiplexor (usar `await AsyncLamportMux.open(...)`).
+
+        Args:
+            server_host: Host del servidor UDP
+            server_port: Puerto del servidor UDP
+            send_buffer: Datagramas en espera de envío antes de bloquear a `send`
+            heartbeat_interval: Segundos entre heartbeats de cada identidad
+        """
+        self.server = (server_host, server_port)
+        self.heartbeat_interval = heartbeat_interval
+        self.clients: Dict[int, 'AsyncLamportClient'] = {}
+        self.transport = None
+
+        # Cola de envío acotada: `send` espera cuando está llena (contrapresión)
+        self.outgoing = asyncio.Queue(send_buffer)
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.tasks = []
+
+        self.stats = {'sent': 0, 'received': 0, 'errors': 0, 'unknown': 0}
+
+    @classmethod
+    async def open(cls, server_host: str = 'localhost', server_port: int = 5000, **kwargs) -> 'AsyncLamportMux':
+        """Crea el multiplexor y abre su socket."""
+        mux = cls(server_host, server_port, **kwargs)
+        loop = asyncio.get_running_loop()
+        mux.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _MultiplexProtocol(mux), remote_addr=mux.server)
+        mux.tasks = [loop.create_task(mux.write_loop()), loop.create_task(mux.heartbeat_loop())]
+        return mux
+
+    def client(self, client_id: int, client_name: str, **kwargs) -> 'AsyncLamportClient':
+        """Crea una identidad lógica sobre este socket."""
+        client = AsyncLamportClient(self, client_id, client_name, **kwargs)
+        self.clients[client_id] = client
+        return client
+
+    async def enqueue(self, data: dict):
+        """Encola un datagrama; espera si la cola de envío está llena."""
+        await self.outgoing.put(json.dumps(data).encode())
+
+    async def write_loop(self):
+        """Vacía la cola de envío respetando la contrapresión del transporte."""
+        while True:
+            payload = await self.outgoing.get()
+            await self.writable.wait()
+            self.transport.sendto(payload)
+            self.stats['sent'] += 1
+
+            # Enviar lo que ya está en cola sin ceder el control por cada datagrama
+            while not self.outgoing.empty() and self.writable.is_set():
+                self.transport.sendto(self.outgoing.get_nowait())
+                self.stats['sent'] += 1
+
+    async def heartbeat_loop(self):
+        """Envía un heartbeat por cada identidad conectada."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for client in list(self.clients.values()):
+                if client.connected:
+                    await self.enqueue({
+                        'type': 'heartbeat',
+                        'client_id': client.client_id,
+                        'timestamp': client.lamport_clock.get_time()
+                    })
+
+    def dispatch(self, raw: bytes):
+        """Entrega un datagrama del servidor a la identidad destinataria."""
+        self.stats['received'] += 1
+        try:
+            data = json.loads(raw.decode())
+        except ValueError:
+            self.stats['errors'] += 1
+            return
+
+        client = self.clients.get(data.get('recipient_id', data.get('client_id')))
+        if client is None:
+            self.stats['unknown'] += 1
+            return
+        client.handle(data)
+
+    async def drain(self):
+        """Espera a que se envíe todo lo encolado."""
+        while not self.outgoing.empty():
+            await asyncio.sleep(0.001)
+
+    async def close(self):
+        """Cierra todas las identidades y el socket."""
+        for client in list(self.clients.values()):
+            client.close()
+        await self.drain()
+        for task in self.tasks:
+            task.cancel()
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AsyncLamportClient:
+    """Identidad de cliente de Lamport sobre un AsyncLamportMux."""
+
+    def __init__(self, mux: AsyncLamportMux, client_id: int, client_name: str,
+                 holdback_wait: float = 0.2, broadcast_queue_size: int = 1000):
+        """
+        Inicializa la identidad (crear con `mux.client(...)`).
+
+        Args:
+            mux: Multiplexor cuyo socket se usa
+            client_id: Identificador del cliente
+            client_name: Nombre del cliente
+            holdback_wait: Espera máxima de un broadcast adelantado (ver holdback.py)
+            broadcast_queue_size: Broadcasts retenidos para `broadcasts()` (y mensajes
+                para `history()`); si el consumidor no los lee se descartan los más antiguos
+        """
+        self.mux = mux
+        self.client_id = client_id
+        self.client_name = client_name
+        self.lamport_clock = LamportClock(client_id, client_name)
+        self.holdback = HoldBackQueue(holdback_wait)
+
+        self.connected = False
+        self.message_counter = 0
+        self.registered: Optional[asyncio.Future] = None
+        self.pending_acks: Dict[int, asyncio.Future] = {}
+        self.incoming = asyncio.Queue(broadcast_queue_size)
+        self.incoming_history = asyncio.Queue(broadcast_queue_size)
+        self.expiry_timer = None
+        self.dropped_broadcasts = 0
+        self.dropped_history = 0
+
+    async def connect(self, timeout: float = 5.0) -> int:
+        """
+        Se registra en el servidor.
+
+        Returns:
+            Reloj lógico tras procesar la respuesta
+
+        Raises:
+            asyncio.TimeoutError: Si el servidor no responde a tiempo
+        """
+        self.registered = asyncio.get_running_loop().create_future()
+        timestamp = self.lamport_clock.send_event()
+        await self.mux.enqueue({
+            'type': 'register',
+            'client_id': self.client_id,
+            'client_name': self.client_name,
+            'timestamp': timestamp
+        })
+        return await asyncio.wait_for(self.registered, timeout)
+
+    async def send(self, content: str, wait_ack: bool = False, timeout: float = 5.0) -> int:
+        """
+        Envía un mensaje al servidor.
+
+        Espera solo si la cola de envío del socket está llena.
+
+        Args:
+            content: Contenido del mensaje
+            wait_ack: Esperar además la confirmación del servidor
+            timeout: Espera máxima de la confirmación
+
+        Returns:
+            Timestamp de Lamport del mensaje (o el reloj tras la confirmación si wait_ack)
+        """
+        if not self.connected:
+            raise ConnectionError(f"{self.client_name} no está conectado al servidor")
+
+        # Incrementar reloj antes de enviar
+        timestamp = self.lamport_clock.send_event()
+        self.message_counter += 1
+
+        ack = None
+        if wait_ack:
+            ack = self.pending_acks[timestamp] = asyncio.get_running_loop().create_future()
+
+        await self.mux.enqueue({
+            'type': 'message',
+            'sender_id': self.client_id,
+            'sender_name': self.client_name,
+            'content': content,
+            'timestamp': timestamp,
+            'message_id': self.message_counter
+        })
+
+        if ack is None:
+            return timestamp
+        try:
+            return await asyncio.wait_for(ack, timeout)
+        finally:
+            self.pending_acks.pop(timestamp, None)
+
+    async def internal_event(self) -> int:
+        """Realiza un evento interno y lo notifica al servidor."""
+        new_time = self.lamport_clock.increment()
+        if self.connected:
+            await self.mux.enqueue({
+                'type': 'internal_event',
+                'client_id': self.client_id,
+                'timestamp': new_time
+            })
+        return new_time
+
+    async def request_catch_up(self, since: int = 0):
+        """
+        Solicita el historial posterior a `since`; los mensajes llegan por `history()`.
+
+        Raises:
+            ConnectionError: Si la identidad no está conectada
+        """
+        if not self.connected:
+            raise ConnectionError(f"{self.client_name} no está conectado al servidor")
+
+        timestamp = self.lamport_clock.send_event()
+        await self.mux.enqueue({
+            'type': 'catch_up',
+            'client_id': self.client_id,
+            'since': since,
+            'timestamp': timestamp
+        })
+
+    async def broadcasts(self) -> AsyncIterator[dict]:
+        """Itera los broadcasts recibidos en vivo, en orden de Lamport."""
+        while True:
+            yield await self.incoming.get()
+
+    async def history(self) -> AsyncIterator[dict]:
+        """Itera los mensajes del historial pedidos con `request_catch_up`, en orden de Lamport."""
+        while True:
+            yield await self.incoming_history.get()
+
+    def handle(self, data: dict):
+        """Procesa un datagrama dirigido a esta identidad (hilo del event loop)."""
+        msg_type = data.get('type')
+
+        if msg_type == 'register_response':
+            if data.get('status') != 'success':
+                return
+            self.connected = True
+            self.holdback.reset()
+            new_time = self.lamport_clock.receive_event(data.get('server_timestamp', 0))
+            if self.registered is not None and not self.registered.done():
+                self.registered.set_result(new_time)
+        elif msg_type == 'message_ack':
+            new_time = self.lamport_clock.receive_event(data.get('server_timestamp'))
+            ack = self.pending_acks.get(data.get('original_timestamp'))
+            if ack is not None and not ack.done():
+                ack.set_result(new_time)
+        elif msg_type == 'broadcast':
+            self.lamport_clock.receive_event(data.get('server_timestamp'))
+            self.deliver(self.holdback.push(data))
+        elif msg_type == 'catch_up_batch':
+            self.lamport_clock.receive_event(data.get('server_timestamp'))
+            for message in data.get('messages', []):
+                if self.incoming_history.full():
+                    self.incoming_history.get_nowait()
+                    self.dropped_history += 1
+                self.incoming_history.put_nowait(message)
+
+    def deliver(self, messages: list):
+        """Pasa broadcasts liberados a la cola de `broadcasts()` y programa el próximo vencimiento."""
+        for message in messages:
+            if self.incoming.full():
+                self.incoming.get_nowait()
+                self.dropped_broadcasts += 1
+            self.incoming.put_nowait(message)
+
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+            self.expiry_timer = None
+        deadline = self.holdback.next_deadline()
+        if deadline is not None:
+            self.expiry_timer = asyncio.get_running_loop().call_later(
+                max(0.0, deadline - time.monotonic()),
+                lambda: self.deliver(self.holdback.release_expired()))
+
+    def close(self):
+        """Deja de usar esta identidad."""
+        self.connected = False
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+        for ack in self.pending_acks.values():
+            ack.cancel()
+        self.mux.clients.pop(self.client_id, None)
@@ -0,0 +1,123 @@
+"""
+Benchmark de arranque y memoria de los clientes UDP.
+
+Compara, en procesos nuevos, el tiempo de arranque (importación y
+construcción del cliente) y la memoria residente (RSS) de un cliente sin interfaz (lamport_client.LamportClient) contra
+el cliente con interfaz tkinter (udp_client.UDPClient, si hay tkinter y
+display), y mide cuánta memoria agrega cada cliente sin interfaz adicional
+dentro de un mismo proceso para estimar cuántos caben por GB.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Código ejecutado en cada proceso hijo; imprime una línea JSON
+CHILD_CODE = """
+import sys, json, time, resource
+start = time.perf_counter()
+mode, count = sys.argv[1], int(sys.argv[2])
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+if mode == 'gui':
+    from udp_client import UDPClient
+    client = UDPClient(1, 'Cliente-1', 'localhost', 9)
+    client.root.update()
+    startup = time.perf_counter() - start
+    base = rss_kb()
+    clients = [client]
+else:
+    from lamport_client import LamportClient
+    client = LamportClient(1, 'Cliente-1', 'localhost', 9, log_stdout=False)
+    startup = time.perf_counter() - start
+    base = rss_kb()
+    clients = [client]
+    for i in range(2, count + 1):
+        extra = LamportClient(i, f'Cliente-{i}', 'localhost', 9, log_stdout=False)
+        extra.running = True
+        extra.start_background_threads()
+        clients.append(extra)
+    time.sleep(0.2)
+
+print(json.dumps({'startup': startup, 'rss_kb': base, 'total_rss_kb': rss_kb(), 'clients': len(clients)}))
+"""
+
+
+def run_child(mode: str, count: int = 1) -> dict:
+    """Ejecuta un proceso hijo y devuelve sus mediciones (o None si falló)."""
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE, mode, str(count)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(mode: str, runs: int) -> dict:
+    """Promedia el arranque y la RSS de `runs` procesos con un cliente."""
+    samples = [run_child(mode) for _ in range(runs)]
+    if any(sample is None for sample in samples):
+        return None
+    return {
+        'startup_ms': sum(s['startup'] for s in samples) / runs * 1000,
+        'rss_mb': sum(s['rss_kb'] for s in samples) / runs / 1024
+    }
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Benchmark de arranque y memoria de clientes UDP")
+    parser.add_argument('--runs', type=int, default=5, help="Procesos por medición de arranque")
+    parser.add_argument('--clients', type=int, default=200, help="Clientes sin interfaz en un mismo proceso")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args()
+
+    headless = measure_startup('headless', args.runs)
+    gui = measure_startup('gui', args.runs)
+
+    fleet = run_child('headless', args.clients)
+    per_client_kb = (fleet['total_rss_kb'] - fleet['rss_kb']) / max(1, args.clients - 1)
+
+    results = {
+        'headless': headless,
+        'gui': gui,
+        'in_process': {
+            'clients': args.clients,
+            'per_client_kb': per_client_kb,
+            'clients_per_gb_in_process': int(1024 * 1024 / per_client_kb) if per_client_kb > 0 else None,
+            'clients_per_gb_one_process_each': int(1024 / headless['rss_mb'])
+        }
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("📊 Arranque y memoria de clientes")
+    print("=" * 50)
+    print(f"  Sin interfaz: {headless['startup_ms']:7.1f} ms  {headless['rss_mb']:6.1f} MB RSS")
+    if gui is None:
+        print("  Con tkinter:  no disponible (sin tkinter o sin display)")
+    else:
+        print(f"  Con tkinter:  {gui['startup_ms']:7.1f} ms  {gui['rss_mb']:6.1f} MB RSS")
+    print("-" * 50)
+    print(f"  {args.clients} clientes sin interfaz en un proceso: {per_client_kb:.0f} KB por cliente")
+    print(f"  Clientes por GB (un proceso cada uno): {results['in_process']['clients_per_gb_one_process_each']}")
+    print(f"  Clientes por GB (en un mismo proceso): {results['in_process']['clients_per_gb_in_process']}")
+    print("=" * 50)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark de la página principal y /status del servidor UNAP (server.py).
+
+Mide peticiones por segundo en proceso (cliente de pruebas de Flask, sin red)
+para comparar el render original con render_template_string contra la
+plantilla compilada con caché y las peticiones condicionales (304).
+"""
+
+import sys
+import time
+import argparse
+from flask import render_template_string
+import server
+
+
+def populate(num_clients: int, num_events: int):
+    """Carga clientes y eventos de ejemplo en el servidor."""
+    client = server.app.test_client()
+    for i in range(1, num_clients + 1):
+        client.post('/register', json={
+            'process_id': i,
+            'process_name': f'Cliente-{i}',
+            'logical_time': i
+        })
+    for i in range(num_events):
+        server.add_event(f"Evento de prueba #{i}")
+
+
+def legacy_index():
+    """Render original: render_template_string en cada petición."""
+    with server.client_lock:
+        clients = list(server.connected_clients.values())
+
+    recent_events = [server.event_to_dict(entry) for entry in server.events.latest(10)]
+
+    return render_template_string(server.HTML_TEMPLATE,
+        clock_time=server.lamport_clock.get_time(),
+        process_id=server.PROCESS_ID,
+        process_name=server.PROCESS_NAME,
+        client_count=len(server.connected_clients),
+        clients=clients,
+        events=recent_events
+    )
+
+
+def measure(name: str, request_fn, duration: float) -> dict:
+    """Ejecuta `request_fn` durante `duration` segundos y mide el ritmo."""
+    # Calentamiento
+    for _ in range(20):
+        request_fn()
+
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        request_fn()
+        count += 1
+    elapsed = time.perf_counter() - start
+
+    result = {'name': name, 'requests': count, 'requests_per_second': count / elapsed}
+    print(f"  {name:<32} {result['requests_per_second']:>10.0f} req/s")
+    return result
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Benchmark del dashboard del servidor UNAP")
+    parser.add_argument('--duration', type=float, default=2.0, help="Segundos por escenario")
+    parser.add_argument('--clients', type=int, default=10, help="Clientes registrados")
+    parser.add_argument('--events', type=int, default=50, help="Eventos en el registro")
+    args = parser.parse_args()
+
+    # Ruta original registrada solo para el benchmark (antes de la primera petición)
+    server.app.add_url_rule('/_legacy', 'legacy_index', legacy_index)
+    client = server.app.test_client()
+
+    populate(args.clients, args.events)
+
+    etag = client.get('/').headers['ETag']
+
+    print("📊 Benchmark del dashboard (en proceso, sin red)")
+    print("=" * 50)
+    results = [
+        measure("/ (antes: render_template_string)", lambda: client.get('/_legacy'), args.duration),
+        measure("/ (después: plantilla en caché)", lambda: client.get('/'), args.duration),
+        measure("/ (después: 304 Not Modified)",
+                lambda: client.get('/', headers={'If-None-Match': etag}), args.duration),
+        measure("/status", lambda: client.get('/status'), args.duration),
+    ]
+
+    baseline = results[0]['requests_per_second']
+    print("=" * 50)
+    for result in results[1:3]:
+        print(f"  {result['name']}: x{result['requests_per_second'] / baseline:.1f} respecto al original")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Benchmark de la cola de retención de broadcasts (holdback.py).
+
+Simula en tiempo virtual un flujo de broadcasts con retardo de red variable
+(reordenamiento) y pérdidas, y compara:
+
+- Orden de llegada (sin cola): sin latencia agregada, pero desordenado.
+- HoldBackQueue con clave (original_timestamp, sender_id): equivale a un
+  retardo fijo de `max_wait`, porque nada indica que falte un mensaje.
+- HoldBackQueue con `delivery_seq`: solo retiene mientras hay un hueco.
+
+Reporta mensajes mostrados fuera de orden y la latencia agregada
+(mostrado - llegada) en percentiles.
+"""
+
+import sys
+import json
+import random
+import argparse
+from typing import List
+from holdback import HoldBackQueue
+
+
+def generate_traffic(count: int, interval: float, jitter: float, loss: float, seed: int) -> List[tuple]:
+    """
+    Genera broadcasts con retardo de red aleatorio.
+
+    Returns:
+        Lista de (llegada, mensaje) ordenada por llegada, sin los perdidos
+    """
+    rng = random.Random(seed)
+    arrivals = []
+    for seq in range(1, count + 1):
+        if rng.random() < loss:
+            continue
+        sent = seq * interval
+        message = {
+            'type': 'broadcast',
+            'sender_id': rng.randint(1, 5),
+            'original_timestamp': seq,
+            'delivery_seq': seq,
+            'content': f"Mensaje {seq}"
+        }
+        arrivals.append((sent + 0.0005 + rng.expovariate(1 / jitter) if jitter > 0 else sent, message))
+    arrivals.sort(key=lambda item: item[0])
+    return arrivals
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por rango más cercano (0 si no hay valores)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(name: str, shown: List[tuple], arrival_of: dict) -> dict:
+    """Cuenta inversiones de orden y calcula la latencia agregada."""
+    out_of_order = 0
+    highest = 0
+    for _, message in shown:
+        seq = message['original_timestamp']
+        if seq < highest:
+            out_of_order += 1
+        highest = max(highest, seq)
+
+    added = [(shown_at - arrival_of[message['original_timestamp']]) * 1000 for shown_at, message in shown]
+    return {
+        'name': name,
+        'shown': len(shown),
+        'out_of_order': out_of_order,
+        'added_p50_ms': percentile(added, 0.5),
+        'added_p99_ms': percentile(added, 0.99),
+        'added_max_ms': max(added) if added else 0.0
+    }
+
+
+def run_holdback(arrivals: List[tuple], max_wait: float, use_seq: bool) -> List[tuple]:
+    """Pasa el tráfico por una HoldBackQueue simulando sus temporizadores."""
+    queue = HoldBackQueue(max_wait)
+    shown = []
+
+    def release_until(now):
+        deadline = queue.next_deadline()
+        while deadline is not None and deadline <= now:
+            shown.extend((deadline, message) for message in queue.release_expired(deadline))
+            deadline = queue.next_deadline()
+
+    for arrival, message in arrivals:
+        release_until(arrival)
+        if not use_seq:
+            message = {key: value for key, value in message.items() if key != 'delivery_seq'}
+        shown.extend((arrival, released) for released in queue.push(message, arrival))
+    release_until(float('inf'))
+    return shown
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de retención de broadcasts")
+    parser.add_argument('--count', type=int, default=20000, help="Broadcasts simulados")
+    parser.add_argument('--interval', type=float, default=0.001, help="Segundos entre envíos")
+    parser.add_argument('--jitter', type=float, default=0.002, help="Retardo aleatorio medio (segundos)")
+    parser.add_argument('--loss', type=float, default=0.001, help="Fracción de datagramas perdidos")
+    parser.add_argument('--max-wait', type=float, default=0.05, help="Espera máxima de la cola")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args()
+
+    arrivals = generate_traffic(args.count, args.interval, args.jitter, args.loss, args.seed)
+    arrival_of = {message['original_timestamp']: arrival for arrival, message in arrivals}
+
+    results = [
+        summarize("Orden de llegada", arrivals, arrival_of),
+        summarize("Retención (delivery_seq)", run_holdback(arrivals, args.max_wait, True), arrival_of),
+        summarize("Retención (timestamp, emisor)", run_holdback(arrivals, args.max_wait, False), arrival_of),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"📊 Cola de retención: {len(arrivals)} broadcasts, jitter medio {args.jitter * 1000:g} ms, "
+          f"pérdida {args.loss:.1%}")
+    print("=" * 78)
+    print(f"  {'Estrategia':<32}{'desordenados':>13}{'p50 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for result in results:
+        print(f"  {result['name']:<32}{result['out_of_order']:>13}{result['added_p50_ms']:>10.2f}"
+              f"{result['added_p99_ms']:>10.2f}{result['added_max_ms']:>10.2f}")
+    print("=" * 78)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Benchmark de latencia y orden de entrega bajo impedimentos de red.
+
+Para cada escenario levanta un servidor nuevo, interpone un
+ImpairmentProxy (impairment_proxy.py) con el perfil del escenario en ambos
+sentidos y genera la carga de lazo abierto de benchmark_udp.py a través de
+él. Además de latencias y pérdidas mide el orden:
+
+- Servidor fuera de orden: broadcasts que, ordenados por delivery_seq (el
+  orden en que el servidor los entregó), tienen una clave de Lamport menor
+  que alguno anterior. Es lo que la cola de process_ordered_messages no
+  logra ordenar cuando los mensajes le llegan con jitter.
+- Llegadas reordenadas: broadcasts que llegan al cliente después de uno con
+  delivery_seq mayor (reordenamiento de la red).
+- Mostrados fuera de orden y duplicados: lo que la cola de retención de los
+  clientes (holdback.py) finalmente entrega a la aplicación.
+
+Uso:
+
+    python benchmark_impairment.py --clients 5 --rate 50 --duration 3 --output impairment.json
+    python benchmark_impairment.py --scenarios clean,wan,wan-loss --json
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+from typing import List
+from benchmark_udp import TimedClient, run_load, start_server, parse_args as parse_load_args
+from holdback import HoldBackQueue
+from impairment_proxy import ImpairmentProxy, LinkProfile, UPSTREAM, DOWNSTREAM
+from lamport_sim import ConstantDelay, UniformDelay, ExponentialDelay, BernoulliLoss, BurstLoss
+
+# Escenarios de impedimentos crecientes (el mismo perfil en ambos sentidos)
+SCENARIOS = {
+    'clean': lambda: LinkProfile(),
+    'lan': lambda: LinkProfile(delay=UniformDelay(0.0002, 0.002)),
+    'wan': lambda: LinkProfile(delay=ExponentialDelay(0.02, 0.01)),
+    'wan-loss': lambda: LinkProfile(delay=ExponentialDelay(0.02, 0.01), loss=BernoulliLoss(0.02)),
+    'burst-loss': lambda: LinkProfile(delay=ExponentialDelay(0.02, 0.01), loss=BurstLoss(0.02, 0.5)),
+    'dup-reorder': lambda: LinkProfile(delay=ConstantDelay(0.005), duplicate=0.05, reorder=0.1,
+                                       reorder_delay=0.03),
+    'bandwidth': lambda: LinkProfile(delay=ConstantDelay(0.005), bandwidth=64000)
+}
+
+
+class OrderedClient(TimedClient):
+    """Identidad que además registra el orden de llegada y el orden mostrado de los broadcasts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.arrivals: List[tuple] = []    # (delivery_seq, clave de Lamport) en orden de llegada
+        self.displayed: List[tuple] = []   # Claves liberadas por la cola de retención
+
+    def handle(self, data: dict):
+        if data.get('type') == 'broadcast':
+            self.arrivals.append((data.get('delivery_seq') or 0, HoldBackQueue.order_key(data)))
+        super().handle(data)
+
+    def deliver(self, messages: list):
+        self.displayed.extend(HoldBackQueue.order_key(m) for m in messages)
+        super().deliver(messages)
+
+
+def inversions(keys: List[tuple]) -> int:
+    """Elementos menores que alguno anterior de la secuencia."""
+    count = 0
+    highest = None
+    for key in keys:
+        if highest is not None and key < highest:
+            count += 1
+        else:
+            highest = key
+    return count
+
+
+def ordering_summary(clients: List[OrderedClient]) -> dict:
+    """Suma las métricas de orden de todos los clientes."""
+    summary = {'server_out_of_order': 0, 'arrivals_reordered': 0, 'displayed_out_of_order': 0,
+               'displayed_duplicates': 0, 'holdback_skipped': 0, 'holdback_late': 0,
+               'holdback_duplicates': 0}
+    for client in clients:
+        by_seq = dict(sorted(client.arrivals))
+        summary['server_out_of_order'] += inversions(list(by_seq.values()))
+        summary['arrivals_reordered'] += inversions([seq for seq, _ in client.arrivals])
+        summary['displayed_out_of_order'] += inversions(client.displayed)
+        summary['displayed_duplicates'] += len(client.displayed) - len(set(client.displayed))
+        summary['holdback_skipped'] += client.holdback.skipped
+        summary['holdback_late'] += client.holdback.late
+        summary['holdback_duplicates'] += client.holdback.duplicates
+    return summary
+
+
+def run_scenario(name: str, load_args, mode: str, seed: int) -> dict:
+    """Ejecuta la carga de un escenario contra un servidor nuevo detrás del proxy."""
+    port, pid, stop = start_server(mode, load_args.process_interval)
+    profile = SCENARIOS[name]()
+    proxy = ImpairmentProxy('localhost', port, upstream=profile, downstream=profile, seed=seed)
+    proxy.start()
+
+    clients: List[OrderedClient] = []
+
+    def client_factory(*args):
+        client = OrderedClient(*args)
+        clients.append(client)
+        return client
+
+    try:
+        result = asyncio.run(run_load(load_args, proxy.port, pid, client_factory))
+    finally:
+        proxy.stop()
+        stop()
+
+    result['scenario'] = name
+    result['ordering'] = ordering_summary(clients)
+    result['proxy'] = {UPSTREAM: proxy.stats[UPSTREAM], DOWNSTREAM: proxy.stats[DOWNSTREAM]}
+    return result
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Latencia y orden de entrega bajo impedimentos de red")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Escenarios separados por comas ({', '.join(SCENARIOS)})")
+    parser.add_argument('--clients', type=int, default=5, help="Clientes simulados")
+    parser.add_argument('--rate', type=float, default=50, help="Mensajes por segundo (total)")
+    parser.add_argument('--payload', type=int, default=100, help="Bytes de contenido por mensaje")
+    parser.add_argument('--duration', type=float, default=3, help="Segundos medidos por escenario")
+    parser.add_argument('--process-interval', type=float, default=0.01,
+                        help="process_interval del servidor (con 0 la cola casi nunca ordena nada)")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help="Dónde corre el servidor")
+    parser.add_argument('--seed', type=int, default=1, help="Semilla del proxy")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+    load_args = parse_load_args(['--clients', str(args.clients), '--rate', str(args.rate),
+                                 '--payload', str(args.payload), '--duration', str(args.duration),
+                                 '--process-interval', str(args.process_interval), '--mode', args.mode])
+
+    results = [run_scenario(name, load_args, args.mode, args.seed) for name in names]
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"🌐 Impedimentos: {args.clients} clientes, {args.rate:g} msg/s, {args.duration:g} s por escenario, "
+          f"process_interval {args.process_interval:g} s")
+    print("=" * 100)
+    print(f"  {'Escenario':<12}{'ack p50':>9}{'ack p99':>9}{'bcast p99':>10}{'pérd. ack':>10}{'pérd. bc':>10}"
+          f"{'srv desord':>11}{'reord red':>10}{'mostr desord':>13}{'dupl':>6}")
+    for result in results:
+        latency, drops, ordering = result['latency'], result['drops'], result['ordering']
+        print(f"  {result['scenario']:<12}{latency['ack']['p50_ms']:>9.1f}{latency['ack']['p99_ms']:>9.1f}"
+              f"{latency['broadcast']['p99_ms']:>10.1f}{drops['ack_drop_rate']:>10.1%}"
+              f"{drops['broadcast_drop_rate']:>10.1%}{ordering['server_out_of_order']:>11}"
+              f"{ordering['arrivals_reordered']:>10}{ordering['displayed_out_of_order']:>13}"
+              f"{ordering['displayed_duplicates']:>6}")
+    print("=" * 100)
+    print("  Latencias en ms; desorden y duplicados sumados sobre todos los clientes")
+    if args.output:
+        print(f"💾 Resultados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
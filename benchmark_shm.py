@@ -0,0 +1,215 @@
+"""
+Benchmark del transporte por memoria compartida (shm_transport.py) frente a UDP.
+
+Dos mediciones, cada una con ambos transportes:
+
+- echo: un proceso hijo devuelve cada mensaje tal cual. Mide el costo del
+  transporte solo: latencia de ida y vuelta (p50/p99 en µs) con un mensaje
+  en vuelo y mensajes por segundo con una ventana de varios en vuelo.
+- server: un cliente registrado en UDPServer (proceso hijo) envía mensajes
+  y espera cada message_ack. Mide lo que gana un cliente local real, con
+  el costo del servidor (hilo por mensaje, JSON, locks) incluido.
+
+Uso:
+
+    python benchmark_shm.py --count 20000 --window 32 --payload 100
+    python benchmark_shm.py --parts echo --json
+"""
+
+import sys
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+from typing import Callable, List
+from benchmark_udp import start_server, percentile
+from shm_transport import ShmSocket, create_channel, attach_channel
+
+TRANSPORTS = ('udp', 'shm')
+PARTS = ('echo', 'server')
+
+
+def echo_ring(name: str):
+    """Proceso hijo: devuelve cada registro del segmento hasta recibir uno vacío."""
+    channel = attach_channel(name)
+    try:
+        while True:
+            data = channel.recv(10.0)
+            if not data:
+                break
+            channel.send(data, 1.0)
+    finally:
+        channel.close()
+
+
+def echo_udp(connection):
+    """Proceso hijo: devuelve cada datagrama hasta recibir uno vacío."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('localhost', 0))
+    sock.settimeout(10.0)
+    connection.send(sock.getsockname()[1])
+    try:
+        while True:
+            data, address = sock.recvfrom(65536)
+            if not data:
+                break
+            sock.sendto(data, address)
+    except socket.timeout:
+        pass
+    finally:
+        sock.close()
+
+
+def measure(send: Callable[[bytes], None], recv: Callable[[], bytes], message: bytes,
+            count: int, window: int) -> dict:
+    """
+    Latencia de ida y vuelta con un mensaje en vuelo y rendimiento con `window` en vuelo.
+
+    Args:
+        send: Envía un mensaje
+        recv: Espera la respuesta al próximo mensaje
+        message: Mensaje a enviar
+        count: Mensajes de cada medición
+        window: Mensajes en vuelo como máximo en la medición de rendimiento
+    """
+    samples: List[float] = []
+    for _ in range(count):
+        start = time.perf_counter()
+        send(message)
+        recv()
+        samples.append(time.perf_counter() - start)
+
+    sent = received = 0
+    start = time.perf_counter()
+    while received < count:
+        while sent < count and sent - received < window:
+            send(message)
+            sent += 1
+        recv()
+        received += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'p50_us': percentile(samples, 0.5) * 1e6,
+        'p99_us': percentile(samples, 0.99) * 1e6,
+        'round_trips_per_second': count / sum(samples),
+        'windowed_per_second': count / elapsed
+    }
+
+
+def run_echo(transport: str, args) -> dict:
+    """Mide el transporte contra un proceso hijo que hace eco."""
+    context = multiprocessing.get_context('fork')
+    message = b'x' * args.payload
+
+    if transport == 'shm':
+        channel = create_channel()
+        child = context.Process(target=echo_ring, args=(channel.shm.name,), daemon=True)
+        child.start()
+
+        def recv():
+            data = channel.recv(5.0)
+            if data is None:
+                raise TimeoutError("Sin respuesta del eco")
+            return data
+
+        try:
+            result = measure(lambda data: channel.send(data, 1.0), recv, message, args.count, args.window)
+            channel.send(b'', 1.0)
+            child.join(5)
+        finally:
+            shm = channel.shm
+            channel.close()
+            shm.unlink()
+        return result
+
+    parent, child_end = context.Pipe()
+    child = context.Process(target=echo_udp, args=(child_end,), daemon=True)
+    child.start()
+    address = ('localhost', parent.recv())
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(5.0)
+    try:
+        result = measure(lambda data: sock.sendto(data, address), lambda: sock.recvfrom(65536)[0],
+                         message, args.count, args.window)
+        sock.sendto(b'', address)
+        child.join(5)
+    finally:
+        sock.close()
+    return result
+
+
+def run_server(transport: str, args) -> dict:
+    """Mide envío -> message_ack de un cliente registrado en un servidor nuevo."""
+    port, _, stop = start_server(args.mode, 0)
+    if transport == 'shm':
+        sock = ShmSocket('localhost', port)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(5.0)
+    server = ('localhost', port)
+
+    def recv_type(expected: str) -> dict:
+        while True:
+            data = json.loads(sock.recvfrom(65536)[0])
+            if data.get('type') == expected:
+                return data
+
+    try:
+        sock.sendto(json.dumps({'type': 'register', 'client_id': 1, 'client_name': 'Bench',
+                                'timestamp': 1}).encode(), server)
+        recv_type('register_response')
+        message = json.dumps({'type': 'message', 'sender_id': 1, 'content': 'x' * args.payload,
+                              'timestamp': 2}).encode()
+        return measure(lambda data: sock.sendto(data, server), lambda: recv_type('message_ack'),
+                       message, args.count // 10 or 1, args.window)
+    finally:
+        sock.close()
+        stop()
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Memoria compartida frente a UDP en la misma máquina")
+    parser.add_argument('--parts', default=','.join(PARTS), help=f"Mediciones ({', '.join(PARTS)})")
+    parser.add_argument('--count', type=int, default=20000,
+                        help="Mensajes por medición de eco (la del servidor usa la décima parte)")
+    parser.add_argument('--window', type=int, default=32, help="Mensajes en vuelo en la medición de rendimiento")
+    parser.add_argument('--payload', type=int, default=100, help="Bytes de contenido por mensaje")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help="Dónde corre el servidor")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    parts = [part.strip() for part in args.parts.split(',') if part.strip()]
+    unknown = [part for part in parts if part not in PARTS]
+    if unknown:
+        parser.error(f"Mediciones desconocidas: {', '.join(unknown)}")
+
+    runners = {'echo': run_echo, 'server': run_server}
+    results = {part: {transport: runners[part](transport, args) for transport in TRANSPORTS} for part in parts}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"⚡ Memoria compartida frente a UDP: {args.payload} bytes por mensaje, ventana {args.window}")
+    print("=" * 72)
+    print(f"  {'Medición':<10}{'Transporte':<12}{'p50 µs':>10}{'p99 µs':>10}{'ida/vuelta/s':>14}{'ventana/s':>12}")
+    for part, by_transport in results.items():
+        for transport, result in by_transport.items():
+            print(f"  {part:<10}{transport:<12}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+                  f"{result['round_trips_per_second']:>14,.0f}{result['windowed_per_second']:>12,.0f}")
+    print("=" * 72)
+    if args.output:
+        print(f"💾 Resultados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
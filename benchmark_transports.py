@@ -0,0 +1,119 @@
+"""
+Benchmark comparativo de los transportes cliente-servidor (transports.py).
+
+Para cada transporte levanta un servidor nuevo con todos los transportes
+habilitados, registra un cliente y mide envío -> message_ack:
+
+- Latencia p50/p99 con un mensaje en vuelo.
+- Mensajes por segundo con una ventana de varios en vuelo (pipelining).
+- Mensajes por segundo y MB/s con mensajes grandes (`--bulk-payload`),
+  que UDP no puede llevar: el servidor lee datagramas de 1024 bytes.
+
+Uso:
+
+    python benchmark_transports.py --count 2000 --window 32 --bulk-payload 16384
+    python benchmark_transports.py --transports udp,tcp --json
+"""
+
+import sys
+import json
+import socket
+import argparse
+from benchmark_udp import MAX_PAYLOAD, start_server
+from benchmark_shm import measure
+from transports import TRANSPORTS, open_client_socket
+
+
+def run_transport(transport: str, args) -> dict:
+    """Mide un transporte contra un servidor nuevo."""
+    port, _, stop = start_server(args.mode, 0, ('unix', 'tcp'))
+    sock = open_client_socket(transport, 'localhost', port)
+    sock.settimeout(5.0)
+    server = ('localhost', port)
+
+    def recv_type(expected: str) -> dict:
+        while True:
+            data = json.loads(sock.recvfrom(65536)[0])
+            if data.get('type') == expected:
+                return data
+
+    def message(payload: int) -> bytes:
+        return json.dumps({'type': 'message', 'sender_id': 1, 'content': 'x' * payload,
+                           'timestamp': 2}).encode()
+
+    result = {}
+    try:
+        sock.sendto(json.dumps({'type': 'register', 'client_id': 1, 'client_name': 'Bench',
+                                'timestamp': 1}).encode(), server)
+        recv_type('register_response')
+
+        send = lambda data: sock.sendto(data, server)
+        recv = lambda: recv_type('message_ack')
+        result['small'] = measure(send, recv, message(args.payload), args.count, args.window)
+        if transport == 'udp' and args.bulk_payload > MAX_PAYLOAD:
+            result['bulk'] = None
+        else:
+            bulk = measure(send, recv, message(args.bulk_payload), args.count // 4 or 1, args.window)
+            bulk['mb_per_second'] = bulk['windowed_per_second'] * args.bulk_payload / 1e6
+            result['bulk'] = bulk
+    except (socket.timeout, OSError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        sock.close()
+        stop()
+    return result
+
+
+def main(argv=None):
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Compara UDP, AF_UNIX, TCP y memoria compartida")
+    parser.add_argument('--transports', default=','.join(TRANSPORTS),
+                        help=f"Transportes separados por comas ({', '.join(TRANSPORTS)})")
+    parser.add_argument('--count', type=int, default=2000, help="Mensajes por medición (un cuarto con los grandes)")
+    parser.add_argument('--window', type=int, default=32, help="Mensajes en vuelo en las mediciones de rendimiento")
+    parser.add_argument('--payload', type=int, default=100, help="Bytes de contenido por mensaje")
+    parser.add_argument('--bulk-payload', type=int, default=16384, help="Bytes de contenido de los mensajes grandes")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help="Dónde corre el servidor")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.transports.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TRANSPORTS]
+    if unknown:
+        parser.error(f"Transportes desconocidos: {', '.join(unknown)}")
+    if args.payload > MAX_PAYLOAD:
+        parser.error(f"--payload debe ser de hasta {MAX_PAYLOAD} bytes para poder comparar con UDP")
+
+    results = {name: run_transport(name, args) for name in names}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"🔀 Transportes: {args.payload} bytes por mensaje ({args.bulk_payload} los grandes), "
+          f"ventana {args.window}")
+    print("=" * 76)
+    print(f"  {'Transporte':<12}{'p50 µs':>10}{'p99 µs':>10}{'ventana/s':>12}{'grandes/s':>12}{'MB/s':>10}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"  {name:<12}❌ {result['error']}")
+            continue
+        small, bulk = result['small'], result['bulk']
+        bulk_columns = (f"{bulk['windowed_per_second']:>12,.0f}{bulk['mb_per_second']:>10.1f}" if bulk
+                        else f"{'-':>12}{'-':>10}")
+        print(f"  {name:<12}{small['p50_us']:>10.1f}{small['p99_us']:>10.1f}"
+              f"{small['windowed_per_second']:>12,.0f}{bulk_columns}")
+    print("=" * 76)
+    print("  Envío -> message_ack a través del servidor; '-' = el transporte no admite ese tamaño")
+    if args.output:
+        print(f"💾 Resultados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""
+Benchmark de carga del servidor UDP (udp_server.UDPServer).
+
+Levanta el servidor en un proceso hijo (o en este mismo proceso) y lo
+somete a carga de lazo abierto: N clientes envían en conjunto R mensajes
+por segundo con un contenido de P bytes, según un calendario fijo que no
+espera las confirmaciones (así la latencia medida incluye las colas del
+servidor en lugar de frenar la carga).
+
+Reporta:
+
+- Rendimiento sostenido: confirmaciones y mensajes retransmitidos por segundo.
+- Latencia p50/p99/p999 de la confirmación (envío -> message_ack) y del
+  broadcast (envío -> recepción en cada uno de los otros clientes).
+- Tasa de pérdida de confirmaciones y de broadcasts esperados.
+- CPU y memoria residente (RSS) del proceso del servidor.
+
+El resultado se escribe en JSON (`--output`) para comparar corridas.
+
+Uso:
+
+    python benchmark_udp.py --clients 20 --rate 500 --payload 200 --duration 10 --output run.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import subprocess
+from typing import Dict, List, Optional
+from async_client import AsyncLamportMux, AsyncLamportClient
+
+# Límite del contenido: el servidor lee datagramas de 1024 bytes
+MAX_PAYLOAD = 800
+
+# Código del proceso hijo: inicia el servidor y anuncia su puerto en una línea JSON
+SERVER_CODE = """
+import sys, json, signal, threading
+from udp_server import UDPServer
+server = UDPServer(port=0, log_stdout=False, process_interval=float(sys.argv[1]),
+                   transports=[t for t in (sys.argv[2] if len(sys.argv) > 2 else '').split(',') if t])
+
+def announce():
+    server.ready.wait()
+    print(json.dumps({'port': server.port}), flush=True)
+
+def terminate(signum, frame):
+    server.stop()
+    sys.exit(0)
+
+signal.signal(signal.SIGTERM, terminate)
+threading.Thread(target=announce, daemon=True).start()
+server.start()
+"""
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por rango más cercano (0 si no hay valores)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_summary(samples: List[float]) -> dict:
+    """Resume latencias en segundos como percentiles en milisegundos."""
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 0.5) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'p999_ms': percentile(samples, 0.999) * 1000,
+        'max_ms': max(samples) * 1000 if samples else 0.0
+    }
+
+
+def process_usage(pid: int) -> Optional[dict]:
+    """
+    Lee CPU acumulada y memoria de un proceso desde /proc.
+
+    Returns:
+        {'cpu_seconds', 'rss_mb', 'peak_rss_mb'} o None si /proc no está disponible
+    """
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # Los campos después del nombre del comando (que puede tener espacios)
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/status') as f:
+            status = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+
+    ticks = os.sysconf('SC_CLK_TCK')
+    return {
+        'cpu_seconds': (int(fields[11]) + int(fields[12])) / ticks,
+        'rss_mb': int(status['VmRSS'].split()[0]) / 1024,
+        'peak_rss_mb': int(status['VmHWM'].split()[0]) / 1024
+    }
+
+
+class LoadRecorder:
+    """Registra envíos y respuestas para calcular latencias y pérdidas."""
+
+    def __init__(self):
+        self.sent: Dict[tuple, float] = {}   # (cliente, timestamp) -> instante de envío
+        self.measuring = False
+        self.ack_latencies: List[float] = []
+        self.broadcast_latencies: List[float] = []
+        self.acked = set()
+        self.broadcast_keys = set()
+        self.broadcast_receipts = set()      # (destinatario, emisor, timestamp) ya medidos
+        self.duplicates = 0
+        self.unmatched = 0
+
+    def record_send(self, client_id: int, timestamp: int):
+        """Anota un envío si se está midiendo (se excluye el calentamiento)."""
+        if self.measuring:
+            self.sent[(client_id, timestamp)] = time.perf_counter()
+
+    def record_reply(self, data: dict):
+        """Asocia una respuesta del servidor con su envío."""
+        msg_type = data.get('type')
+        if msg_type == 'message_ack':
+            key = (data.get('client_id'), data.get('original_timestamp'))
+            sent_at = self.sent.get(key)
+            if sent_at is not None and key not in self.acked:
+                self.acked.add(key)
+                self.ack_latencies.append(time.perf_counter() - sent_at)
+            elif sent_at is None and self.measuring:
+                self.unmatched += 1
+        elif msg_type == 'broadcast':
+            key = (data.get('sender_id'), data.get('original_timestamp'))
+            sent_at = self.sent.get(key)
+            if sent_at is not None:
+                receipt = (data.get('recipient_id'),) + key
+                if receipt in self.broadcast_receipts:
+                    # Duplicado por la red: no es una entrega más
+                    self.duplicates += 1
+                    return
+                self.broadcast_receipts.add(receipt)
+                self.broadcast_keys.add(key)
+                self.broadcast_latencies.append(time.perf_counter() - sent_at)
+
+
+class TimedClient(AsyncLamportClient):
+    """Identidad que reporta cada datagrama recibido al registrador."""
+
+    def __init__(self, mux: AsyncLamportMux, client_id: int, client_name: str, recorder: LoadRecorder):
+        # Nadie consume `broadcasts()`: una cola mínima evita acumularlos
+        super().__init__(mux, client_id, client_name, broadcast_queue_size=1)
+        self.recorder = recorder
+
+    def handle(self, data: dict):
+        self.recorder.record_reply(data)
+        super().handle(data)
+
+
+def start_server(mode: str, process_interval: float, transports=()):
+    """
+    Inicia el servidor en un puerto libre.
+
+    Args:
+        transports: Transportes adicionales a UDP (ver transports.py)
+
+    Returns:
+        (puerto, pid, función para detenerlo)
+    """
+    if mode == 'inprocess':
+        from udp_server import UDPServer
+        server = UDPServer(port=0, log_stdout=False, process_interval=process_interval, transports=transports)
+        threading.Thread(target=server.start, daemon=True).start()
+        if not server.ready.wait(5):
+            raise RuntimeError("El servidor no se inició")
+        return server.port, os.getpid(), server.stop
+
+    child = subprocess.Popen(
+        [sys.executable, '-c', SERVER_CODE, str(process_interval), ','.join(transports)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE, text=True
+    )
+    for line in child.stdout:
+        if line.startswith('{'):
+            port = json.loads(line)['port']
+            break
+    else:
+        raise RuntimeError(f"El servidor terminó con código {child.wait()}")
+
+    # Vaciar la salida restante para que el hijo no se bloquee escribiendo
+    threading.Thread(target=child.stdout.read, daemon=True).start()
+
+    def stop():
+        child.terminate()
+        child.wait(5)
+
+    return port, child.pid, stop
+
+
+async def run_load(args, port: int, pid: int, client_class=TimedClient) -> dict:
+    """
+    Conecta los clientes, genera la carga y recoge las mediciones.
+
+    Args:
+        client_class: Clase de las identidades (TimedClient o una subclase que mida algo más)
+    """
+    recorder = LoadRecorder()
+    mux = await AsyncLamportMux.open('localhost', port, send_buffer=args.send_buffer)
+    clients = []
+    for i in range(1, args.clients + 1):
+        client = client_class(mux, i, f"Cliente-{i}", recorder)
+        mux.clients[i] = client
+        clients.append(client)
+
+    async def connect(client, attempts: int = 5):
+        # El registro puede perderse (p. ej. detrás de impairment_proxy.py): reintentar
+        for attempt in range(attempts):
+            try:
+                return await client.connect(timeout=2.0)
+            except asyncio.TimeoutError:
+                if attempt == attempts - 1:
+                    raise
+
+    await asyncio.gather(*(connect(client) for client in clients))
+
+    content = 'x' * args.payload
+    interval = 1 / args.rate
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    measure_start = start + args.warmup
+    end = measure_start + args.duration
+    offered = 0
+    send_buffer_full = 0
+    usage_start = None
+    next_index = 0
+
+    # Lazo abierto: en cada despertar se envía todo lo que el calendario ya debía
+    while True:
+        now = loop.time()
+        if now >= end:
+            break
+        if not recorder.measuring and now >= measure_start:
+            recorder.measuring = True
+            usage_start = process_usage(pid)
+        while start + next_index * interval <= now:
+            client = clients[next_index % len(clients)]
+            next_index += 1
+            if recorder.measuring:
+                offered += 1
+            if mux.outgoing.full():
+                if recorder.measuring:
+                    send_buffer_full += 1
+                continue
+            timestamp = await client.send(content)
+            recorder.record_send(client.client_id, timestamp)
+        await asyncio.sleep(max(0.0, min(start + next_index * interval, end) - loop.time()))
+
+    usage_end = process_usage(pid)
+    recorder.measuring = False
+
+    # Esperar las respuestas en vuelo
+    await asyncio.sleep(args.grace)
+    await mux.close()
+
+    sent = len(recorder.sent)
+    acked = len(recorder.acked)
+    # Mensajes que llegaron al servidor: confirmados o retransmitidos (la confirmación puede perderse)
+    expected_broadcasts = len(recorder.acked | recorder.broadcast_keys) * (args.clients - 1)
+    server = None
+    if usage_start is not None and usage_end is not None:
+        cpu = usage_end['cpu_seconds'] - usage_start['cpu_seconds']
+        server = {
+            'cpu_seconds': cpu,
+            'cpu_percent': cpu / args.duration * 100,
+            'rss_mb': usage_end['rss_mb'],
+            'peak_rss_mb': usage_end['peak_rss_mb'],
+            'includes_load_generator': args.mode == 'inprocess'
+        }
+
+    return {
+        'config': {
+            'mode': args.mode,
+            'clients': args.clients,
+            'rate': args.rate,
+            'payload': args.payload,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'process_interval': args.process_interval
+        },
+        'throughput': {
+            'offered_per_second': offered / args.duration,
+            'sent_per_second': sent / args.duration,
+            'acked_per_second': acked / args.duration,
+            'delivered_per_second': len(recorder.broadcast_keys) / args.duration,
+            'broadcasts_received_per_second': len(recorder.broadcast_latencies) / args.duration
+        },
+        'latency': {
+            'ack': latency_summary(recorder.ack_latencies),
+            'broadcast': latency_summary(recorder.broadcast_latencies)
+        },
+        'drops': {
+            'send_buffer_full': send_buffer_full,
+            'acks_lost': sent - acked,
+            'ack_drop_rate': (sent - acked) / sent if sent else 0.0,
+            'broadcasts_lost': expected_broadcasts - len(recorder.broadcast_latencies),
+            'broadcast_drop_rate': (1 - len(recorder.broadcast_latencies) / expected_broadcasts
+                                    if expected_broadcasts else 0.0),
+            'unmatched_replies': recorder.unmatched,
+            'duplicate_broadcasts': recorder.duplicates
+        },
+        'server': server
+    }
+
+
+def parse_args(argv=None):
+    """Procesa los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmark de carga de lazo abierto del servidor UDP")
+    parser.add_argument('--clients', type=int, default=10, help="Clientes simulados")
+    parser.add_argument('--rate', type=float, default=200, help="Mensajes por segundo (total)")
+    parser.add_argument('--payload', type=int, default=100, help="Bytes de contenido por mensaje")
+    parser.add_argument('--duration', type=float, default=10, help="Segundos medidos")
+    parser.add_argument('--warmup', type=float, default=1, help="Segundos de carga sin medir")
+    parser.add_argument('--grace', type=float, default=2, help="Espera de respuestas en vuelo al final")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help="Dónde corre el servidor (inprocess comparte CPU con la carga)")
+    parser.add_argument('--process-interval', type=float, default=0.0,
+                        help="process_interval del servidor (0.5 es el valor por defecto del servidor)")
+    parser.add_argument('--send-buffer', type=int, default=10000, help="Datagramas en cola de envío")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    if args.clients < 1 or args.rate <= 0 or args.duration <= 0:
+        parser.error("--clients, --rate y --duration deben ser positivos")
+    if not 0 <= args.payload <= MAX_PAYLOAD:
+        parser.error(f"--payload debe estar entre 0 y {MAX_PAYLOAD} bytes")
+    return args
+
+
+def main(argv=None):
+    """Función principal."""
+    args = parse_args(argv)
+
+    port, pid, stop = start_server(args.mode, args.process_interval)
+    try:
+        results = asyncio.run(run_load(args, port, pid))
+    finally:
+        stop()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    throughput, latency, drops, server = (results['throughput'], results['latency'],
+                                          results['drops'], results['server'])
+    print(f"📊 Carga: {args.clients} clientes, {args.rate:g} msg/s, {args.payload} bytes, "
+          f"{args.duration:g} s ({args.mode})")
+    print("=" * 64)
+    print(f"  Ofrecidos:    {throughput['offered_per_second']:10.1f} msg/s")
+    print(f"  Confirmados:  {throughput['acked_per_second']:10.1f} msg/s")
+    print(f"  Entregados:   {throughput['delivered_per_second']:10.1f} msg/s "
+          f"({throughput['broadcasts_received_per_second']:.1f} broadcasts/s)")
+    print("-" * 64)
+    print(f"  {'Latencia':<12}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'máx ms':>10}")
+    for name in ('ack', 'broadcast'):
+        summary = latency[name]
+        print(f"  {name:<12}{summary['p50_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+              f"{summary['p999_ms']:>10.2f}{summary['max_ms']:>10.2f}")
+    print("-" * 64)
+    print(f"  Pérdida de confirmaciones: {drops['ack_drop_rate']:.2%}  "
+          f"de broadcasts: {drops['broadcast_drop_rate']:.2%}  "
+          f"(cola de envío llena: {drops['send_buffer_full']})")
+    if server is not None:
+        print(f"  Servidor: {server['cpu_percent']:.0f}% CPU, {server['rss_mb']:.1f} MB RSS "
+              f"(pico {server['peak_rss_mb']:.1f} MB)")
+    print("=" * 64)
+    if args.output:
+        print(f"💾 Resultados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,530 @@
+"""
+Registro de eventos para los servidores y clientes de Lamport.
+
+- EventRing: buffer circular en memoria con cursores por secuencia y tiempo lógico.
+- EventPipeline: registro estructurado asíncrono. Los eventos se guardan como
+  tuplas compactas y un hilo escritor los formatea y vuelca a stdout, a
+  archivos JSONL rotativos y/o a trazas columnares binarias, fuera del camino
+  de datos.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from trace_format import EXTENSION as COLUMNAR_EXTENSION, TraceWriter
+
+# Niveles de severidad
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+
+class LogEntry(NamedTuple):
+    """Entrada del registro de eventos."""
+    seq: int
+    lamport: int
+    item: Any
+
+
+class EventRing:
+    """
+    Buffer circular de solo-anexado con secuencia monótona.
+
+    Cada evento recibe un número de secuencia creciente y una marca de Lamport
+    no decreciente (el máximo entre la recibida y la anterior), lo que permite
+    buscar por cualquiera de los dos cursores: por secuencia en O(1) y por
+    tiempo lógico en O(log n). Los eventos más antiguos se sobrescriben al
+    llenarse el buffer, sin el costo O(n) de `list.pop(0)`.
+
+    Las escrituras se serializan con un lock; las lecturas no lo toman y
+    validan la secuencia de cada ranura para descartar las sobrescritas.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Inicializa el buffer.
+
+        Args:
+            capacity: Cantidad máxima de eventos retenidos
+        """
+        if capacity < 1:
+            raise ValueError("capacity debe ser mayor o igual a 1")
+
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.next_seq = 0
+        self.last_lamport = 0
+        self.lock = threading.Lock()
+
+    def append(self, lamport: int, item: Any) -> int:
+        """
+        Agrega un evento al buffer.
+
+        Returns:
+            Secuencia asignada al evento
+        """
+        return self.extend(lamport, [item])[0]
+
+    def extend(self, lamport: Union[int, List[int]], items: List[Any]) -> List[int]:
+        """
+        Agrega varios eventos con una sola toma del lock.
+
+        Args:
+            lamport: Marca de Lamport de todos los eventos, o una lista con la de cada uno
+            items: Eventos
+
+        Returns:
+            Secuencias asignadas a los eventos
+        """
+        lamports = lamport if isinstance(lamport, list) else [lamport] * len(items)
+        with self.lock:
+            seqs = []
+            for item, lamport in zip(items, lamports):
+                lamport = max(lamport, self.last_lamport)
+                self.last_lamport = lamport
+                seq = self.next_seq
+                self.slots[seq % self.capacity] = LogEntry(seq, lamport, item)
+                self.next_seq = seq + 1
+                seqs.append(seq)
+            return seqs
+
+    @property
+    def first_seq(self) -> int:
+        """Secuencia del evento más antiguo retenido."""
+        return max(0, self.next_seq - self.capacity)
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def _read(self, start: int, end: int) -> List[LogEntry]:
+        """Lee las entradas con secuencia en [start, end) que sigan disponibles."""
+        entries = []
+        for seq in range(start, end):
+            entry = self.slots[seq % self.capacity]
+            # Descartar ranuras sobrescritas por un escritor concurrente
+            if entry is not None and entry.seq == seq:
+                entries.append(entry)
+        return entries
+
+    def latest(self, count: int) -> List[LogEntry]:
+        """Obtiene los últimos `count` eventos en orden de llegada."""
+        return self.before(self.next_seq, count)
+
+    def before(self, seq: int, count: int) -> List[LogEntry]:
+        """Obtiene hasta `count` eventos con secuencia menor que `seq`, en orden de llegada."""
+        end = min(seq, self.next_seq)
+        start = max(self.first_seq, end - count)
+        return self._read(start, end)
+
+    def after(self, seq: int, limit: int) -> List[LogEntry]:
+        """
+        Obtiene hasta `limit` eventos con secuencia mayor que `seq`.
+
+        Si `seq` ya fue sobrescrito, se empieza por el más antiguo disponible.
+        """
+        end = self.next_seq
+        start = max(self.first_seq, seq + 1)
+        return self._read(start, min(end, start + limit))
+
+    def seek_lamport(self, lamport: int) -> int:
+        """
+        Busca el primer evento con marca de Lamport mayor que `lamport`.
+
+        Returns:
+            Secuencia encontrada (o la próxima secuencia si no hay ninguno)
+        """
+        low, high = self.first_seq, self.next_seq
+        while low < high:
+            middle = (low + high) // 2
+            entry = self.slots[middle % self.capacity]
+            if entry is None or entry.seq != middle:
+                # Ranura sobrescrita: el inicio real está más adelante
+                low = middle + 1
+            elif entry.lamport <= lamport:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def after_lamport(self, lamport: int, limit: int) -> List[LogEntry]:
+        """Obtiene hasta `limit` eventos con marca de Lamport mayor que `lamport`."""
+        return self.after(self.seek_lamport(lamport) - 1, limit)
+
+
+class EventRecord(NamedTuple):
+    """
+    Evento estructurado sin formatear.
+
+    El texto se construye solo cuando alguien lo lee (`text()`), a partir de
+    la plantilla `fmt` y sus argumentos.
+    """
+    mono_ns: int
+    wall_time: float
+    lamport: int
+    level: int
+    event_type: str
+    peer: Optional[int]
+    msg_ts: Optional[int]
+    msg_id: Optional[int]
+    fmt: str
+    args: tuple
+
+    def text(self) -> str:
+        """Descripción formateada del evento."""
+        return self.fmt.format(*self.args) if self.args else self.fmt
+
+    def clock_time(self) -> str:
+        """Hora local del evento (HH:MM:SS)."""
+        return time.strftime('%H:%M:%S', time.localtime(self.wall_time))
+
+    def line(self) -> str:
+        """Evento formateado como '[HH:MM:SS] descripción'."""
+        return f"[{self.clock_time()}] {self.text()}"
+
+
+class StdoutSink:
+    """Destino que imprime los eventos en stdout con un prefijo."""
+
+    def __init__(self, prefix: str = ''):
+        self.prefix = f"{prefix} " if prefix else ''
+
+    def write(self, records: List[EventRecord], process: dict):
+        lines = [f"{self.prefix}{record.text()}\n" for record in records]
+        sys.stdout.write(''.join(lines))
+        sys.stdout.flush()
+
+    def tick(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlFileSink:
+    """Destino que escribe un objeto JSON por línea, con rotación por tamaño."""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """
+        Args:
+            path: Archivo de destino
+            max_bytes: Tamaño a partir del cual se rota el archivo
+            backup_count: Cantidad de archivos rotados que se conservan (path.1 ... path.N)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.file = open(path, 'a', encoding='utf-8')
+        self.size = self.file.tell()
+
+    def rotate(self):
+        """Rota path -> path.1 -> ... -> path.N, descartando el más antiguo."""
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.size = 0
+
+    def write(self, records: List[EventRecord], process: dict):
+        for record in records:
+            line = json.dumps({
+                'mono_ns': record.mono_ns,
+                'time': record.wall_time,
+                'lamport': record.lamport,
+                'process': process['id'],
+                'process_name': process['name'],
+                'level': LEVEL_NAMES.get(record.level, record.level),
+                'type': record.event_type,
+                'peer': record.peer,
+                'msg_ts': record.msg_ts,
+                'msg_id': record.msg_id,
+                'text': record.text()
+            }, ensure_ascii=False) + '\n'
+
+            line_size = len(line.encode('utf-8'))
+            if self.size + line_size > self.max_bytes and self.size > 0:
+                self.rotate()
+            self.file.write(line)
+            self.size += line_size
+        self.file.flush()
+
+    def tick(self):
+        pass
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarFileSink:
+    """
+    Destino que escribe los eventos en el formato columnar binario de trace_format.py.
+
+    Las filas se acumulan y se escriben como un lote cada `chunk_rows` eventos
+    o cuando el lote pendiente tiene más de `max_delay` segundos; el escritor
+    de EventPipeline llama a `tick` aunque no haya eventos nuevos, así que un
+    lote no queda retenido mientras el proceso está inactivo.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 65536, max_delay: float = 1.0):
+        """
+        Args:
+            path: Archivo de destino (se anexa si ya existe)
+            chunk_rows: Eventos por lote
+            max_delay: Antigüedad máxima (segundos) de un lote sin escribir
+        """
+        self.writer = TraceWriter(path, chunk_rows)
+        self.max_delay = max_delay
+        self.pending_since = None
+        self.rejected = 0  # Eventos descartados por valores no representables
+
+    def write(self, records: List[EventRecord], process: dict):
+        append = self.writer.append
+        process_id, process_name = process['id'], process['name']
+        for record in records:
+            try:
+                append(record.mono_ns, record.wall_time, record.lamport, process_id, process_name,
+                       record.event_type, record.peer, record.msg_ts, record.msg_id)
+            except ValueError:
+                self.rejected += 1
+        self.tick()
+
+    def tick(self):
+        """Escribe el lote pendiente si superó `max_delay` (se llama también sin eventos nuevos)."""
+        if not len(self.writer):
+            self.pending_since = None
+        elif self.pending_since is None:
+            self.pending_since = time.monotonic()
+        elif time.monotonic() - self.pending_since >= self.max_delay:
+            self.writer.flush()
+            self.pending_since = None
+
+    def close(self):
+        self.writer.close()
+
+
+class EventPipeline:
+    """
+    Registro de eventos estructurado y asíncrono.
+
+    `emit` solo construye una tupla, la agrega al buffer circular de eventos
+    recientes y a la cola del escritor: no formatea, no toma el reloj de
+    pared con strftime ni escribe en stdout. Un hilo escritor vacía la cola
+    en lotes hacia los destinos configurados, aplicando el muestreo por tipo.
+    """
+
+    def __init__(self, process_id: int, process_name: str, clock=None,
+                 stdout_prefix: Optional[str] = None, log_path: Optional[str] = None,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 level: int = INFO, sample_rates: Optional[Dict[str, float]] = None,
+                 recent_capacity: int = 1000, flush_interval: float = 0.1, max_pending: int = 100000):
+        """
+        Inicializa el registro y su hilo escritor.
+
+        Args:
+            process_id: Identificador del proceso que emite los eventos
+            process_name: Nombre del proceso
+            clock: Reloj de Lamport del proceso (se lee sin lock al emitir)
+            stdout_prefix: Si no es None, los eventos se imprimen con este prefijo
+            log_path: Archivo de destino (opcional): JSONL con rotación, o el
+                formato columnar binario si termina en '.ltrc' (ver trace_format.py)
+            max_bytes: Tamaño máximo de cada archivo JSONL
+            backup_count: Archivos rotados que se conservan
+            level: Nivel mínimo de los eventos registrados
+            sample_rates: Fracción de eventos de cada tipo enviados a los destinos
+            recent_capacity: Eventos retenidos en memoria para consultas de estado
+            flush_interval: Intervalo máximo entre vaciados de la cola (segundos)
+            max_pending: Eventos en cola hacia el escritor; si un destino lento la
+                llena, los nuevos se descartan y se cuentan en `dropped`
+        """
+        self.process = {'id': process_id, 'name': process_name}
+        self.clock = clock
+        self.level = level
+        self.sample_rates = dict(sample_rates or {})
+        self.random = random.Random()
+
+        # Vista en memoria de los eventos recientes
+        self.ring = EventRing(recent_capacity)
+
+        self.sinks = []
+        if stdout_prefix is not None:
+            self.sinks.append(StdoutSink(stdout_prefix))
+        if log_path and log_path.endswith(COLUMNAR_EXTENSION):
+            self.sinks.append(ColumnarFileSink(log_path))
+        elif log_path:
+            self.sinks.append(JsonlFileSink(log_path, max_bytes, backup_count))
+
+        # Cola acotada hacia el escritor (deque: append/popleft seguros entre hilos)
+        self.pending = deque()
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.wakeup = threading.Event()
+        self.running = True
+        self.writer = None
+        if self.sinks:
+            self.writer = threading.Thread(target=self.write_loop, daemon=True)
+            self.writer.start()
+
+    def _lamport(self) -> int:
+        """Lee el reloj lógico sin tomar su lock (lectura atómica de un int)."""
+        return self.clock.logical_time if self.clock is not None else 0
+
+    def emit(self, event_type: str, fmt: str, *args, level: int = INFO, lamport: Optional[int] = None,
+             peer: Optional[int] = None, msg_ts: Optional[int] = None, msg_id: Optional[int] = None) -> Optional[int]:
+        """
+        Registra un evento.
+
+        Args:
+            event_type: Tipo de evento (p. ej. 'message_received')
+            fmt: Plantilla str.format de la descripción, formateada en diferido
+            *args: Argumentos de la plantilla
+            level: Severidad
+            lamport: Tiempo lógico del evento (por defecto, el valor actual del reloj)
+            peer: Proceso remoto involucrado
+            msg_ts: Timestamp de Lamport del mensaje involucrado
+            msg_id: Identificador del mensaje involucrado
+
+        Returns:
+            Secuencia del evento, o None si fue filtrado por nivel
+        """
+        if level < self.level:
+            return None
+
+        if lamport is None:
+            lamport = self._lamport()
+        record = EventRecord(time.monotonic_ns(), time.time(), lamport, level, event_type,
+                             peer, msg_ts, msg_id, fmt, args)
+        seq = self.ring.append(lamport, record)
+        self._enqueue(record)
+        return seq
+
+    def emit_many(self, event_type: str, fmt: str, args_list: List[tuple], level: int = INFO,
+                  lamports: Optional[List[int]] = None) -> List[int]:
+        """
+        Registra varios eventos del mismo tipo con una sola toma del lock del buffer.
+
+        Args:
+            lamports: Tiempo lógico de cada evento (por defecto, el reloj actual para todos)
+        """
+        if level < self.level:
+            return []
+
+        if lamports is None:
+            lamports = [self._lamport()] * len(args_list)
+        elif len(lamports) != len(args_list):
+            raise ValueError("lamports debe tener un valor por evento")
+        mono_ns, wall_time = time.monotonic_ns(), time.time()
+        records = [EventRecord(mono_ns, wall_time, lamport, level, event_type, None, None, None, fmt, tuple(args))
+                   for args, lamport in zip(args_list, lamports)]
+        seqs = self.ring.extend(lamports, records)
+        for record in records:
+            self._enqueue(record)
+        return seqs
+
+    def _enqueue(self, record: EventRecord):
+        """Envía el evento al escritor si pasa el muestreo de su tipo."""
+        if not self.sinks:
+            return
+        rate = self.sample_rates.get(record.event_type)
+        if rate is not None and self.random.random() >= rate:
+            return
+        if not self.running:
+            return
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append(record)
+
+    def recent(self, count: int, end_seq: Optional[int] = None) -> List[str]:
+        """
+        Últimos eventos formateados como '[HH:MM:SS] descripción'.
+
+        Args:
+            count: Cantidad máxima de eventos
+            end_seq: Considerar solo eventos con secuencia menor (por defecto, todos)
+        """
+        entries = self.ring.latest(count) if end_seq is None else self.ring.before(end_seq, count)
+        return [entry.item.line() for entry in entries]
+
+    def write_loop(self):
+        """Hilo escritor: vacía la cola hacia los destinos en lotes y los cierra al terminar."""
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.drain()
+        self.drain()
+
+        # Solo este hilo escribe en los destinos: cerrarlos aquí evita escrituras sobre archivos cerrados
+        for sink in self.sinks:
+            sink.close()
+
+    def drain(self):
+        """Escribe en los destinos todos los eventos pendientes y avisa a quienes esperan en `flush`."""
+        records = []
+        flushed = []
+        try:
+            while True:
+                record = self.pending.popleft()
+                if isinstance(record, threading.Event):
+                    flushed.append(record)
+                else:
+                    records.append(record)
+        except IndexError:
+            pass
+
+        for sink in self.sinks:
+            try:
+                if records:
+                    sink.write(records, self.process)
+                else:
+                    sink.tick()  # Escrituras diferidas por tiempo
+            except Exception as e:
+                sys.stderr.write(f"Error escribiendo eventos: {e}\n")
+
+        for done in flushed:
+            done.set()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """
+        Espera a que los destinos terminen de escribir los eventos emitidos hasta ahora.
+
+        Returns:
+            True si se escribieron antes de `timeout`
+        """
+        writer = self.writer
+        if writer is None or not writer.is_alive():
+            return not self.pending
+
+        # Marca en la cola: el escritor la señala después de que los destinos escriben lo anterior
+        done = threading.Event()
+        self.pending.append(done)
+        self.wakeup.set()
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        """
+        Detiene el escritor tras vaciar la cola; el propio escritor cierra los destinos.
+
+        Si no termina en `timeout` (un destino bloqueado), los destinos quedan
+        abiertos hasta que el escritor salga, en lugar de cerrarse bajo una
+        escritura en curso.
+        """
+        self.running = False
+        self.wakeup.set()
+        if self.writer is not None:
+            self.writer.join(timeout)
+            if self.writer.is_alive():
+                sys.stderr.write("El escritor de eventos no terminó a tiempo; cerrará los destinos al salir\n")
@@ -0,0 +1,150 @@
+"""
+Cola de retención (hold-back queue) para mostrar broadcasts en orden de Lamport.
+
+El servidor entrega los mensajes en orden de Lamport, pero UDP puede
+reordenarlos en el camino. La cola retiene los que llegan adelantados y los
+libera en cuanto son entregables:
+
+- Con `delivery_seq` (secuencia de entrega por destinatario asignada por el
+  servidor) un mensaje es entregable si es el siguiente esperado; si falta
+  uno por más de `max_wait` segundos se da por perdido y se continúa. Las
+  secuencias ya entregadas se descartan (la red puede duplicar datagramas):
+  por debajo de la esperada solo se acepta una que se dio por perdida.
+- Sin secuencia se ordena por (original_timestamp, sender_id): cada mensaje
+  espera a lo sumo `max_wait` y se liberan junto con él los de clave menor.
+
+El tiempo se pasa explícitamente (`now`) para poder simularlo en benchmarks.
+"""
+
+import heapq
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Secuencias dadas por perdidas que se recuerdan para aceptarlas si llegan tarde
+MAX_MISSING = 1024
+
+
+class HoldBackQueue:
+    """Buffer de reordenamiento con espera acotada."""
+
+    def __init__(self, max_wait: float = 0.2):
+        """
+        Inicializa la cola.
+
+        Args:
+            max_wait: Tiempo máximo (segundos) que se retiene un mensaje esperando a otro
+        """
+        self.max_wait = max_wait
+        self.reset()
+
+        # Estadísticas
+        self.released = 0
+        self.late = 0        # Llegaron después de que se dio por perdida su secuencia
+        self.skipped = 0     # Secuencias dadas por perdidas
+        self.duplicates = 0  # Secuencias ya entregadas o retenidas que volvieron a llegar
+
+    def reset(self):
+        """Descarta lo retenido y vuelve a esperar la secuencia 1 (p. ej. al reconectar)."""
+        self.expected_seq = 1      # Todo lo anterior ya se entregó o se dio por perdido
+        self.missing_seqs = set()  # Secuencias anteriores a la esperada dadas por perdidas
+        self.pending_seq = {}      # delivery_seq -> (llegada, mensaje)
+        self.pending_keys = []     # heap de (clave, contador, mensaje) sin secuencia
+        self.arrivals = deque()    # (llegada, contador) en orden de llegada, sin secuencia
+        self.held_keys = set()     # contadores aún retenidos en pending_keys
+        self.counter = 0
+
+    def __len__(self) -> int:
+        return len(self.pending_seq) + len(self.held_keys)
+
+    @staticmethod
+    def order_key(message: dict) -> Tuple[int, int]:
+        """Clave de orden de Lamport de un broadcast: (timestamp original, emisor)."""
+        return (message.get('original_timestamp') or 0, message.get('sender_id') or 0)
+
+    def push(self, message: dict, now: Optional[float] = None) -> List[dict]:
+        """
+        Agrega un broadcast recibido.
+
+        Returns:
+            Mensajes que pasan a ser entregables, en orden
+        """
+        now = time.monotonic() if now is None else now
+        seq = message.get('delivery_seq')
+
+        if seq is None:
+            self.counter += 1
+            heapq.heappush(self.pending_keys, (self.order_key(message), self.counter, message))
+            self.arrivals.append((now, self.counter))
+            self.held_keys.add(self.counter)
+            return self.release_expired(now)
+
+        if seq < self.expected_seq:
+            if seq not in self.missing_seqs:
+                self.duplicates += 1
+                return []
+            # Su secuencia ya se dio por perdida: mostrarlo de inmediato
+            self.missing_seqs.discard(seq)
+            self.late += 1
+            self.released += 1
+            return [message]
+
+        if seq in self.pending_seq:
+            self.duplicates += 1
+            return []
+        self.pending_seq[seq] = (now, message)
+        return self._release_consecutive() + self.release_expired(now)
+
+    def _release_consecutive(self) -> List[dict]:
+        """Libera los mensajes con secuencia consecutiva desde la esperada."""
+        released = []
+        while self.expected_seq in self.pending_seq:
+            released.append(self.pending_seq.pop(self.expected_seq)[1])
+            self.expected_seq += 1
+        self.released += len(released)
+        return released
+
+    def release_expired(self, now: Optional[float] = None) -> List[dict]:
+        """
+        Libera lo que ya esperó `max_wait`.
+
+        Returns:
+            Mensajes liberados, en orden
+        """
+        now = time.monotonic() if now is None else now
+        released = []
+
+        # Secuencias: saltar el hueco si el primer retenido esperó demasiado
+        while self.pending_seq:
+            oldest = min(arrival for arrival, _ in self.pending_seq.values())
+            if oldest + self.max_wait > now:
+                break
+            first = min(self.pending_seq)
+            self.skipped += first - self.expected_seq
+            self.missing_seqs.update(range(max(self.expected_seq, first - MAX_MISSING), first))
+            if len(self.missing_seqs) > MAX_MISSING:
+                self.missing_seqs = set(sorted(self.missing_seqs)[-MAX_MISSING:])
+            self.expected_seq = first
+            released.extend(self._release_consecutive())
+
+        # Claves de Lamport: el mensaje vencido se libera con todos los de clave menor
+        while self.arrivals and self.arrivals[0][0] + self.max_wait <= now:
+            _, counter = self.arrivals.popleft()
+            while counter in self.held_keys:
+                _, head_counter, message = heapq.heappop(self.pending_keys)
+                self.held_keys.discard(head_counter)
+                released.append(message)
+                self.released += 1
+
+        return released
+
+    def next_deadline(self) -> Optional[float]:
+        """Instante en que vence el próximo mensaje retenido (None si no hay ninguno)."""
+        deadlines = []
+        if self.pending_seq:
+            deadlines.append(min(arrival for arrival, _ in self.pending_seq.values()) + self.max_wait)
+        while self.arrivals and self.arrivals[0][1] not in self.held_keys:
+            self.arrivals.popleft()
+        if self.arrivals:
+            deadlines.append(self.arrivals[0][0] + self.max_wait)
+        return min(deadlines) if deadlines else None
@@ -0,0 +1,281 @@
+"""
+Proxy UDP de impedimentos de red para probar el protocolo fuera de loopback limpio.
+
+Se ubica entre los clientes y UDPServer: los clientes apuntan al puerto del
+proxy en lugar del 5000 y el proxy reenvía cada datagrama aplicando, por
+enlace (cada cliente y sentido tiene su propio estado):
+
+- Retardo con cualquier modelo de lamport_sim.py (constante, uniforme,
+  exponencial); los retardos variables reordenan datagramas.
+- Pérdida independiente o en ráfagas (Gilbert-Elliott).
+- Duplicación con probabilidad dada.
+- Reordenamiento explícito: una fracción de datagramas se retiene un tiempo extra.
+- Ancho de banda máximo (bytes/s) con cola acotada: lo que no cabe se descarta.
+
+Cada cliente sale hacia el servidor desde un socket propio del proxy, así
+el servidor los sigue viendo como direcciones distintas y sus respuestas
+vuelven al cliente correcto.
+
+Uso:
+
+    python impairment_proxy.py --port 6000 --server-port 5000 --delay exp:0.02:0.01 --loss 0.01
+    python launch_clients.py --fleet --port 6000 --clients 50
+
+benchmark_impairment.py mide latencia y orden de entrega en escenarios de
+impedimentos crecientes.
+"""
+
+import copy
+import heapq
+import random
+import socket
+import argparse
+import selectors
+import threading
+import time
+from typing import Dict, List, Optional
+from lamport_sim import parse_delay, parse_loss
+
+UPSTREAM = 'upstream'      # Cliente -> servidor
+DOWNSTREAM = 'downstream'  # Servidor -> cliente
+
+
+class LinkProfile:
+    """Impedimentos de un sentido de un enlace."""
+
+    def __init__(self, delay=None, loss=None, duplicate: float = 0.0, reorder: float = 0.0,
+                 reorder_delay: float = 0.02, bandwidth: Optional[float] = None, queue_limit: float = 0.5):
+        """
+        Args:
+            delay: Modelo de retardo (ver lamport_sim.py) o None
+            loss: Modelo de pérdida (ver lamport_sim.py) o None
+            duplicate: Probabilidad de entregar un datagrama dos veces
+            reorder: Probabilidad de retener un datagrama `reorder_delay` segundos más
+            reorder_delay: Retención extra de los datagramas reordenados
+            bandwidth: Bytes por segundo del enlace (None = sin límite)
+            queue_limit: Segundos de transmisión encolados como máximo con ancho de banda limitado
+        """
+        self.delay = delay
+        self.loss = loss
+        self.duplicate = duplicate
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+        self.bandwidth = bandwidth
+        self.queue_limit = queue_limit
+
+
+class Link:
+    """Estado de un sentido de un enlace: decide cuándo (y si) sale cada datagrama."""
+
+    def __init__(self, profile: LinkProfile, rng: random.Random):
+        self.profile = profile
+        self.rng = rng
+        self.loss = copy.copy(profile.loss)  # Los modelos en ráfagas tienen estado propio
+        self.busy_until = 0.0
+
+    def schedule(self, now: float, size: int, stats: dict) -> List[float]:
+        """
+        Instantes de salida de un datagrama de `size` bytes que llega en `now`.
+
+        Returns:
+            Lista vacía si se pierde; dos instantes si se duplica
+        """
+        profile, rng = self.profile, self.rng
+        if self.loss is not None and self.loss(rng):
+            stats['lost'] += 1
+            return []
+
+        copies = 2 if profile.duplicate and rng.random() < profile.duplicate else 1
+        if copies == 2:
+            stats['duplicated'] += 1
+
+        departures = []
+        for _ in range(copies):
+            start = now
+            if profile.bandwidth:
+                # El enlace transmite un datagrama a la vez; la cola tiene un límite de tiempo
+                if self.busy_until - now > profile.queue_limit:
+                    stats['queue_dropped'] += 1
+                    continue
+                self.busy_until = start = max(now, self.busy_until) + size / profile.bandwidth
+            if profile.delay is not None:
+                start += profile.delay(rng)
+            if profile.reorder and rng.random() < profile.reorder:
+                start += profile.reorder_delay
+                stats['reordered'] += 1
+            departures.append(start)
+        return departures
+
+
+class ImpairmentProxy:
+    """Proxy UDP entre clientes y servidor con impedimentos por enlace."""
+
+    def __init__(self, server_host: str = 'localhost', server_port: int = 5000, host: str = 'localhost',
+                 port: int = 0, upstream: Optional[LinkProfile] = None,
+                 downstream: Optional[LinkProfile] = None, seed: Optional[int] = None):
+        """
+        Abre el socket de escucha (se reenvía al iniciar con `start`).
+
+        Args:
+            server_host, server_port: Servidor al que se reenvía
+            host, port: Dirección de escucha de los clientes (0 = puerto efímero)
+            upstream: Impedimentos cliente -> servidor
+            downstream: Impedimentos servidor -> cliente
+            seed: Semilla de las decisiones aleatorias
+        """
+        self.server = (server_host, server_port)
+        self.host = host
+        self.profiles = {UPSTREAM: upstream or LinkProfile(), DOWNSTREAM: downstream or LinkProfile()}
+        self.rng = random.Random(seed)
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.port = self.socket.getsockname()[1]
+
+        # Por cliente: socket hacia el servidor y estado de cada sentido
+        self.upstream_sockets: Dict[tuple, socket.socket] = {}
+        self.links: Dict[tuple, Link] = {}
+
+        # Datagramas en tránsito: (instante de salida, orden, socket, datos, destino)
+        self.in_flight = []
+        self.sequence = 0
+
+        self.stats = {direction: {'received': 0, 'forwarded': 0, 'lost': 0, 'duplicated': 0,
+                                  'reordered': 0, 'queue_dropped': 0}
+                      for direction in (UPSTREAM, DOWNSTREAM)}
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ, None)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Inicia el reenvío en un hilo propio."""
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def link(self, client: tuple, direction: str) -> Link:
+        """Estado del enlace de un cliente en un sentido (se crea al primer uso)."""
+        key = (client, direction)
+        link = self.links.get(key)
+        if link is None:
+            link = self.links[key] = Link(self.profiles[direction], self.rng)
+        return link
+
+    def upstream_socket(self, client: tuple) -> socket.socket:
+        """Socket desde el que se reenvían al servidor los datagramas de un cliente."""
+        sock = self.upstream_sockets.get(client)
+        if sock is None:
+            sock = self.upstream_sockets[client] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((self.host, 0))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, client)
+        return sock
+
+    def receive(self, sock: socket.socket, client: Optional[tuple], now: float):
+        """Lee todo lo disponible en un socket y programa su reenvío."""
+        while True:
+            try:
+                data, address = sock.recvfrom(65536)
+            except (BlockingIOError, OSError):
+                return
+
+            if client is None:
+                # Del cliente `address` hacia el servidor
+                direction, source, out, destination = UPSTREAM, address, self.upstream_socket(address), self.server
+            else:
+                # Del servidor hacia `client`
+                direction, source, out, destination = DOWNSTREAM, client, self.socket, client
+
+            stats = self.stats[direction]
+            stats['received'] += 1
+            for departure in self.link(source, direction).schedule(now, len(data), stats):
+                self.sequence += 1
+                heapq.heappush(self.in_flight, (departure, self.sequence, out, data, destination))
+
+    def run(self):
+        """Bucle del proxy: recibe, y envía lo que ya debe salir."""
+        self.socket.setblocking(False)
+        in_flight = self.in_flight
+        while self.running:
+            timeout = 0.1
+            if in_flight:
+                timeout = min(timeout, max(0.0, in_flight[0][0] - time.monotonic()))
+            for key, _ in self.selector.select(timeout):
+                self.receive(key.fileobj, key.data, time.monotonic())
+
+            now = time.monotonic()
+            while in_flight and in_flight[0][0] <= now:
+                _, _, out, data, destination = heapq.heappop(in_flight)
+                try:
+                    out.sendto(data, destination)
+                    self.stats[UPSTREAM if out is not self.socket else DOWNSTREAM]['forwarded'] += 1
+                except OSError:
+                    pass
+
+    def stop(self):
+        """Detiene el reenvío y cierra los sockets."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+        self.selector.close()
+        for sock in list(self.upstream_sockets.values()) + [self.socket]:
+            sock.close()
+
+
+def profile_from_args(args, prefix: str = '') -> LinkProfile:
+    """Construye un LinkProfile a partir de los argumentos `--{prefix}delay`, etc."""
+    def value(name):
+        return getattr(args, f"{prefix}{name}")
+    delay = value('delay')
+    return LinkProfile(delay=parse_delay(delay) if delay else None, loss=parse_loss(value('loss')),
+                       duplicate=value('duplicate'), reorder=value('reorder'),
+                       reorder_delay=value('reorder_delay'), bandwidth=value('bandwidth'))
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser, prefix: str = '', scope: str = ''):
+    """Agrega las opciones de un LinkProfile al parser."""
+    option = prefix.replace('_', '-')
+    parser.add_argument(f'--{option}delay', help=f"Retardo{scope}: const:S, uniform:MIN:MAX o exp:BASE:MEDIA")
+    parser.add_argument(f'--{option}loss', default='0', help=f"Pérdida{scope}: P o burst:ENTRAR:SALIR[:PERDIDA]")
+    parser.add_argument(f'--{option}duplicate', type=float, default=0.0, help=f"Probabilidad de duplicar{scope}")
+    parser.add_argument(f'--{option}reorder', type=float, default=0.0,
+                        help=f"Probabilidad de retener un datagrama{scope}")
+    parser.add_argument(f'--{option}reorder-delay', type=float, default=0.02,
+                        help=f"Retención extra de los datagramas reordenados{scope}")
+    parser.add_argument(f'--{option}bandwidth', type=float, help=f"Bytes por segundo{scope}")
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Proxy UDP con retardo, pérdida, duplicación y reordenamiento")
+    parser.add_argument('--port', type=int, default=6000, help="Puerto de escucha para los clientes")
+    parser.add_argument('--server-host', default='localhost', help="Host del servidor")
+    parser.add_argument('--server-port', type=int, default=5000, help="Puerto del servidor")
+    parser.add_argument('--seed', type=int, help="Semilla de las decisiones aleatorias")
+    add_profile_arguments(parser)
+    add_profile_arguments(parser, 'down_', " (servidor -> cliente; por defecto igual que hacia el servidor)")
+    args = parser.parse_args()
+
+    upstream = profile_from_args(args)
+    customized = any(getattr(args, f'down_{name}') != parser.get_default(f'down_{name}')
+                     for name in ('delay', 'loss', 'duplicate', 'reorder', 'reorder_delay', 'bandwidth'))
+    downstream = profile_from_args(args, 'down_') if customized else upstream
+
+    proxy = ImpairmentProxy(args.server_host, args.server_port, port=args.port,
+                            upstream=upstream, downstream=downstream, seed=args.seed)
+    proxy.start()
+    print(f"🌐 Proxy de impedimentos en localhost:{proxy.port} -> {args.server_host}:{args.server_port}")
+    try:
+        while True:
+            time.sleep(5)
+            up, down = proxy.stats[UPSTREAM], proxy.stats[DOWNSTREAM]
+            print(f"  ↑ {up['forwarded']} reenviados, {up['lost']} perdidos | "
+                  f"↓ {down['forwarded']} reenviados, {down['lost']} perdidos")
+    except KeyboardInterrupt:
+        print("\n🛑 Deteniendo proxy...")
+        proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,401 @@
+"""
+Núcleo sin interfaz gráfica de un cliente UDP con relojes lógicos de Lamport.
+
+Contiene el protocolo completo (registro, envío, heartbeat, eventos internos,
+historial y recepción) y no importa tkinter, por lo que puede ejecutarse sin
+display y lanzarse por cientos en un mismo proceso. Las interfaces
+(simple_client.py, udp_client.py) extienden LamportClient.
+"""
+
+import socket
+import threading
+import json
+import time
+import random
+from typing import Optional, Tuple
+from lamport_clock import LamportClock
+from event_log import EventPipeline, INFO, WARNING, ERROR
+from holdback import HoldBackQueue
+from timebase import SYSTEM
+from tracing import Tracer, enable_kernel_timestamps, recv_with_timestamp
+from transports import open_client_socket
+
+MAX_DATAGRAM_SIZE = 1024
+
+
+class LamportClient:
+    """Cliente UDP sin interfaz que implementa el algoritmo de Lamport."""
+
+    def __init__(self, client_id: int, client_name: str, server_host='localhost', server_port=5000,
+                 trace_sample_rate: float = 0.0, log_stdout: bool = True,
+                 heartbeat_interval: float = 10, auto_event_interval: Optional[Tuple[int, int]] = (5, 10),
+                 event_capacity: int = 100, holdback_wait: float = 0.2, timebase=None,
+                 log_path: Optional[str] = None, transport: str = 'udp'):
+        """
+        Inicializa el cliente (sin conectarlo).
+
+        Args:
+            client_id: Identificador del cliente
+            client_name: Nombre del cliente
+            server_host: Host del servidor UDP
+            server_port: Puerto del servidor UDP
+            trace_sample_rate: Fracción de mensajes enviados a trazar
+            log_stdout: Imprimir los eventos en stdout
+            heartbeat_interval: Segundos entre heartbeats
+            auto_event_interval: Rango (mín, máx) en segundos entre eventos internos
+                automáticos, o None para desactivarlos
+            event_capacity: Eventos recientes retenidos en memoria
+            holdback_wait: Espera máxima (segundos) de un broadcast adelantado en la cola de retención
+            timebase: Base de tiempo de los temporizadores (por defecto el reloj real, ver timebase.py)
+            log_path: Archivo JSONL o traza .ltrc donde registrar los eventos (opcional, ver trace_analyzer.py)
+            transport: 'udp', 'tcp' (mensajes grandes, varios en vuelo), o 'unix' / 'shm' para
+                un cliente en la misma máquina que el servidor (ver transports.py)
+        """
+        self.client_id = client_id
+        self.client_name = client_name
+        self.server_host = server_host
+        self.server_port = server_port
+        self.heartbeat_interval = heartbeat_interval
+        self.auto_event_interval = auto_event_interval
+        self.timebase = timebase or SYSTEM
+
+        # Socket UDP, o extremo de otro transporte con la misma interfaz
+        self.socket = open_client_socket(transport, server_host, server_port)
+        self.socket.settimeout(5.0)
+
+        # Reloj lógico de Lamport
+        self.lamport_clock = LamportClock(client_id, client_name)
+
+        # Trazado de latencia (muestreo opcional de mensajes enviados)
+        self.tracer = Tracer(trace_sample_rate)
+        self.kernel_timestamps = (trace_sample_rate > 0 and transport == 'udp'
+                                  and enable_kernel_timestamps(self.socket))
+
+        # Registro de eventos estructurado (escritura asíncrona a stdout)
+        self.event_log = EventPipeline(client_id, client_name, self.lamport_clock,
+                                       stdout_prefix=f"[{client_name}]" if log_stdout else None,
+                                       log_path=log_path, recent_capacity=event_capacity)
+
+        # Cola de retención: muestra los broadcasts en orden pese al reordenamiento de UDP
+        # (solo la usa el hilo receptor)
+        self.holdback = HoldBackQueue(holdback_wait)
+
+        # Estado
+        self.connected = False
+        self.running = False
+        self.message_counter = 0
+
+    def on_event(self):
+        """Se invoca tras registrar cada evento (las interfaces lo sobrescriben)."""
+        pass
+
+    def log_event(self, event_type: str, fmt: str, *args, **fields):
+        """Registra un evento estructurado."""
+        self.event_log.emit(event_type, fmt, *args, **fields)
+        self.on_event()
+
+    def add_event(self, description: str, level: int = INFO):
+        """Agrega un evento de texto libre al log."""
+        self.log_event('event', description, level=level)
+
+    def send(self, data: dict):
+        """Envía un datagrama JSON al servidor."""
+        self.socket.sendto(json.dumps(data).encode(), (self.server_host, self.server_port))
+
+    def connect_to_server(self) -> bool:
+        """
+        Se registra en el servidor y espera su confirmación.
+
+        Returns:
+            True si el registro fue aceptado
+        """
+        try:
+            # Enviar registro
+            timestamp = self.lamport_clock.send_event()
+            self.send({
+                'type': 'register',
+                'client_id': self.client_id,
+                'client_name': self.client_name,
+                'timestamp': timestamp
+            })
+            self.add_event(f"Registro enviado con timestamp: {timestamp}")
+
+            # Esperar respuesta
+            try:
+                data, _ = self.socket.recvfrom(MAX_DATAGRAM_SIZE)
+                response = json.loads(data.decode())
+            except socket.timeout:
+                self.add_event("Timeout conectando al servidor", ERROR)
+                return False
+
+            if response.get('type') == 'register_response' and response.get('status') == 'success':
+                self.connected = True
+                self.running = True
+                self.holdback.reset()  # El servidor reinicia la secuencia de entrega al registrar
+
+                # Actualizar reloj con respuesta del servidor
+                server_timestamp = response.get('server_timestamp', 0)
+                new_time = self.lamport_clock.receive_event(server_timestamp)
+
+                self.log_event('connected', "Conectado al servidor - Reloj: {}", new_time, lamport=new_time)
+                return True
+
+            self.add_event("Error en registro con servidor", ERROR)
+            return False
+
+        except Exception as e:
+            self.add_event(f"Error conectando: {e}", ERROR)
+            return False
+
+    def send_message(self, content: str) -> bool:
+        """
+        Envía un mensaje al servidor.
+
+        Returns:
+            True si el mensaje fue enviado
+        """
+        if not self.connected:
+            self.add_event("No conectado al servidor", ERROR)
+            return False
+
+        try:
+            # Incrementar reloj antes de enviar
+            timestamp = self.lamport_clock.send_event()
+            self.message_counter += 1
+
+            message_data = {
+                'type': 'message',
+                'sender_id': self.client_id,
+                'sender_name': self.client_name,
+                'content': content,
+                'timestamp': timestamp,
+                'message_id': self.message_counter
+            }
+
+            trace = self.tracer.start_trace()
+            if trace is not None:
+                message_data['trace'] = trace
+
+            self.send(message_data)
+
+            self.log_event('message_sent', "Mensaje enviado [T:{}]: {}", timestamp, content,
+                           lamport=timestamp, msg_ts=timestamp, msg_id=self.message_counter)
+            return True
+
+        except Exception as e:
+            self.add_event(f"Error enviando mensaje: {e}", ERROR)
+            return False
+
+    def internal_event(self) -> int:
+        """
+        Realiza un evento interno y lo notifica al servidor.
+
+        Returns:
+            Nuevo valor del reloj lógico
+        """
+        new_time = self.lamport_clock.increment()
+        self.log_event('internal_event', "Evento interno - Nuevo reloj: {}", new_time, lamport=new_time)
+
+        # Notificar al servidor del evento interno
+        if self.connected:
+            try:
+                self.send({
+                    'type': 'internal_event',
+                    'client_id': self.client_id,
+                    'timestamp': new_time
+                })
+            except Exception as e:
+                self.add_event(f"Error notificando evento interno: {e}", ERROR)
+
+        return new_time
+
+    def request_catch_up(self, since: int = 0) -> bool:
+        """
+        Solicita al servidor los mensajes entregados con timestamp posterior a `since`.
+
+        El servidor responde con lotes 'catch_up_batch' que se procesan en el
+        hilo receptor.
+        """
+        if not self.connected:
+            self.add_event("No conectado al servidor", ERROR)
+            return False
+
+        try:
+            timestamp = self.lamport_clock.send_event()
+            self.send({
+                'type': 'catch_up',
+                'client_id': self.client_id,
+                'since': since,
+                'timestamp': timestamp
+            })
+            self.add_event(f"Historial solicitado desde T:{since}")
+            return True
+        except Exception as e:
+            self.add_event(f"Error solicitando historial: {e}", ERROR)
+            return False
+
+    def start_background_threads(self):
+        """Inicia hilos en segundo plano."""
+        # Hilo para recibir mensajes
+        receive_thread = threading.Thread(target=self.receive_messages, daemon=True)
+        receive_thread.start()
+
+        # Hilo para heartbeat
+        heartbeat_thread = threading.Thread(target=self.heartbeat, daemon=True)
+        heartbeat_thread.start()
+
+        # Hilo para eventos internos automáticos
+        if self.auto_event_interval:
+            auto_events_thread = threading.Thread(target=self.auto_internal_events, daemon=True)
+            auto_events_thread.start()
+
+    def receive_messages(self):
+        """Recibe mensajes del servidor."""
+        while self.running:
+            try:
+                # Despertar a tiempo para liberar los broadcasts retenidos que vencen
+                deadline = self.holdback.next_deadline()
+                timeout = 5.0 if deadline is None else min(5.0, max(0.001, deadline - self.timebase.monotonic()))
+                self.socket.settimeout(timeout)
+
+                data, _, received_at = recv_with_timestamp(self.socket, MAX_DATAGRAM_SIZE, self.kernel_timestamps)
+                self.handle_datagram(json.loads(data.decode()), received_at)
+            except socket.timeout:
+                for message in self.holdback.release_expired(self.timebase.monotonic()):
+                    self.display_broadcast(message)
+            except Exception as e:
+                if self.running:
+                    self.add_event(f"Error recibiendo mensajes: {e}", ERROR)
+
+    def handle_datagram(self, message_data: dict, received_at: float):
+        """Despacha un datagrama recibido del servidor según su tipo."""
+        msg_type = message_data.get('type')
+
+        if msg_type == 'broadcast':
+            trace = message_data.get('trace')
+            if isinstance(trace, dict):
+                Tracer.mark(trace, 'client_receive', received_at)
+                self.tracer.record(trace)
+            self.handle_broadcast(message_data)
+        elif msg_type == 'message_ack':
+            self.handle_message_ack(message_data)
+        elif msg_type == 'catch_up_batch':
+            self.handle_catch_up_batch(message_data)
+        elif msg_type == 'heartbeat_ack':
+            pass  # Solo para mantener conexión
+
+    def handle_broadcast(self, data: dict):
+        """
+        Maneja un mensaje broadcast del servidor.
+
+        El reloj se actualiza al recibirlo; el mensaje se muestra cuando la
+        cola de retención lo libera en orden.
+        """
+        # Actualizar reloj con timestamp del servidor
+        new_time = self.lamport_clock.receive_event(data.get('server_timestamp'))
+        self.log_event('clock_update', "Reloj actualizado a: {}", new_time, lamport=new_time)
+
+        for message in self.holdback.push(data, self.timebase.monotonic()):
+            self.display_broadcast(message)
+
+    def display_broadcast(self, data: dict):
+        """Registra un broadcast liberado por la cola de retención."""
+        sender_id = data.get('sender_id')
+        original_timestamp = data.get('original_timestamp')
+        self.log_event('broadcast_received', "Mensaje de Cliente-{} [T:{}]: {}",
+                       sender_id, original_timestamp, data.get('content'),
+                       peer=sender_id, msg_ts=original_timestamp, msg_id=data.get('message_id'))
+
+    def handle_catch_up_batch(self, data: dict):
+        """Maneja un lote del historial enviado por el servidor."""
+        server_timestamp = data.get('server_timestamp')
+        new_time = self.lamport_clock.receive_event(server_timestamp)
+
+        if data.get('status') == 'error':
+            self.add_event(f"❌ Historial rechazado por el servidor: {data.get('message')}", WARNING)
+            return
+
+        for message in data.get('messages', []):
+            content = message.get('content')
+            if message.get('truncated'):
+                # El servidor recortó un mensaje que no cabía en un datagrama
+                content = f"{content}… ({message['truncated']} caracteres)"
+            self.log_event('history_received', "Historial de Cliente-{} [T:{}]: {}",
+                           message.get('sender_id'), message.get('original_timestamp'), content,
+                           peer=message.get('sender_id'), msg_ts=message.get('original_timestamp'))
+
+        if data.get('complete'):
+            self.add_event(f"Historial completo - Reloj: {new_time}")
+
+    def handle_message_ack(self, data: dict):
+        """Maneja confirmación de mensaje."""
+        server_timestamp = data.get('server_timestamp')
+        new_time = self.lamport_clock.receive_event(server_timestamp)
+        self.log_event('ack_received', "Mensaje confirmado por servidor - Reloj: {}", new_time,
+                       lamport=new_time, msg_ts=data.get('original_timestamp'))
+
+    def heartbeat(self):
+        """Envía heartbeat al servidor."""
+        while self.running:
+            try:
+                self.timebase.sleep(self.heartbeat_interval)
+                if self.connected:
+                    self.send({
+                        'type': 'heartbeat',
+                        'client_id': self.client_id,
+                        'timestamp': self.lamport_clock.get_time()
+                    })
+            except Exception as e:
+                if self.running:
+                    self.add_event(f"Error en heartbeat: {e}", ERROR)
+
+    def auto_internal_events(self):
+        """Genera eventos internos automáticamente."""
+        low, high = self.auto_event_interval
+        while self.running:
+            self.timebase.sleep(random.randint(low, high))
+            if self.connected:
+                self.internal_event()
+
+    def disconnect(self, close_socket: bool = True):
+        """
+        Desconecta del servidor.
+
+        Args:
+            close_socket: Cerrar también el socket (False permite reconectar)
+        """
+        self.running = False
+        self.connected = False
+        if close_socket:
+            self.socket.close()
+        self.add_event("Desconectado del servidor")
+
+    def close(self):
+        """Desconecta y vacía el registro de eventos."""
+        if self.running:
+            self.disconnect()
+        else:
+            self.socket.close()
+        self.event_log.close()
+
+    def run_headless(self) -> bool:
+        """
+        Conecta y mantiene el cliente activo hasta Ctrl+C, sin interfaz.
+
+        Returns:
+            False si no se pudo conectar
+        """
+        self.add_event(f"Cliente {self.client_name} iniciado")
+        if not self.connect_to_server():
+            self.close()
+            return False
+
+        self.start_background_threads()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+        self.close()
+        return True
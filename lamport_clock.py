@@ -2,9 +2,11 @@
 Implementación del reloj lógico de Lamport para sincronización de procesos distribuidos.
 """
 
+import os
+import json
 import time
 import threading
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 class LamportClock:
@@ -15,21 +17,80 @@ class LamportClock:
     1. Antes de un evento interno: L = L + 1
     2. Antes de enviar un mensaje: L = L + 1, enviar L con el mensaje
     3. Al recibir un mensaje: L = max(L, timestamp_recibido) + 1
+    
+    Opcionalmente el reloj puede persistir una marca de agua alta (high-water
+    mark): se reserva un bloque de `lease_size` timestamps y solo se escribe
+    en disco el límite del bloque. Al reiniciar, el reloj continúa por encima
+    del último límite persistido, por lo que nunca retrocede aunque el
+    proceso haya caído, con una escritura cada `lease_size` ticks.
     """
     
-    def __init__(self, process_id: int, process_name: str):
+    def __init__(self, process_id: int, process_name: str,
+                 persist_path: Optional[str] = None, lease_size: int = 1000):
         """
         Inicializa el reloj lógico de Lamport.
         
         Args:
             process_id: Identificador único del proceso
             process_name: Nombre descriptivo del proceso
+            persist_path: Archivo donde persistir la marca de agua alta (opcional)
+            lease_size: Cantidad de timestamps reservados por cada escritura
         """
+        if lease_size < 1:
+            raise ValueError("lease_size debe ser mayor o igual a 1")
+        
         self.process_id = process_id
         self.process_name = process_name
         self.logical_time = 0
         self.lock = threading.Lock()
         
+        # Marca de agua alta persistente
+        self.persist_path = persist_path
+        self.lease_size = lease_size
+        self.lease_limit = None
+        
+        if self.persist_path:
+            # Todo valor hasta el límite persistido pudo haberse emitido
+            self.logical_time = self._load_high_water_mark()
+            self._extend_lease()
+    
+    def _load_high_water_mark(self) -> int:
+        """
+        Lee el último límite de bloque persistido.
+        
+        Returns:
+            Límite persistido, o 0 si no existe el archivo
+        """
+        try:
+            with open(self.persist_path, 'r') as f:
+                return int(json.load(f)['high_water_mark'])
+        except FileNotFoundError:
+            return 0
+    
+    def _extend_lease(self):
+        """
+        Reserva un nuevo bloque de timestamps y persiste su límite.
+        
+        Se escribe en un archivo temporal y se reemplaza atómicamente, de modo
+        que una caída a mitad de escritura deja el límite anterior intacto.
+        Debe llamarse con el lock tomado (o durante la inicialización).
+        """
+        new_limit = self.logical_time + self.lease_size
+        tmp_path = f"{self.persist_path}.tmp"
+        
+        with open(tmp_path, 'w') as f:
+            json.dump({'high_water_mark': new_limit}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.persist_path)
+        
+        self.lease_limit = new_limit
+    
+    def _check_lease(self):
+        """Extiende la reserva si el tiempo lógico alcanzó el límite del bloque."""
+        if self.lease_limit is not None and self.logical_time > self.lease_limit:
+            self._extend_lease()
+        
     def get_time(self) -> int:
         """
         Obtiene el tiempo lógico actual.
@@ -49,6 +110,7 @@ class LamportClock:
         """
         with self.lock:
             self.logical_time += 1
+            self._check_lease()
             return self.logical_time
     
     def send_event(self) -> int:
@@ -72,8 +134,32 @@ class LamportClock:
         """
         with self.lock:
             self.logical_time = max(self.logical_time, received_timestamp) + 1
+            self._check_lease()
             return self.logical_time
     
+    def receive_events(self, received_timestamps: List[int]) -> List[int]:
+        """
+        Aplica la regla de recepción a un lote de mensajes con una sola toma del lock.
+        
+        Cada mensaje se procesa en orden como en `receive_event`, por lo que el
+        resultado es idéntico a llamarla una vez por mensaje.
+        
+        Args:
+            received_timestamps: Timestamps recibidos, en orden de llegada
+            
+        Returns:
+            Tiempo lógico asignado a cada mensaje
+        """
+        with self.lock:
+            times = []
+            logical_time = self.logical_time
+            for received_timestamp in received_timestamps:
+                logical_time = max(logical_time, received_timestamp) + 1
+                times.append(logical_time)
+            self.logical_time = logical_time
+            self._check_lease()
+            return times
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Obtiene el estado actual del reloj lógico.
@@ -0,0 +1,182 @@
+"""
+Arnés de integración en proceso con tiempo virtual.
+
+Levanta un UDPServer y cualquier cantidad de clientes sin interfaz en el
+mismo proceso, sobre puertos efímeros de localhost, compartiendo una
+VirtualTimebase: los temporizadores (entrega cada 0.5 s, eventos internos
+cada 5 s, heartbeats cada 10 s, limpieza cada 30 s, inactividad a los 60 s)
+avanzan con `advance()` en lugar de esperar.
+
+Uso:
+
+    with LamportHarness() as harness:
+        a, b = harness.client(), harness.client()
+        a.send_message("Hola")
+        harness.wait_for(lambda: a.acked, "confirmación")
+        harness.advance(0.5)
+        harness.wait_for(lambda: b.delivered, "broadcast")
+        harness.assert_lamport_invariants()
+
+Los datagramas viajan por sockets reales, así que lo que depende de la red
+se espera con `wait_for` (tiempo real, acotado) y lo que depende de
+temporizadores se adelanta con `advance` (tiempo virtual).
+"""
+
+import time
+import threading
+from typing import Callable, List
+from lamport_client import LamportClient
+from timebase import VirtualTimebase
+from udp_server import UDPServer
+
+
+class HarnessClient(LamportClient):
+    """Cliente sin interfaz que registra lo recibido para verificar invariantes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delivered: List[dict] = []    # Broadcasts liberados por la cola de retención, en orden
+        self.receipts: List[tuple] = []    # (server_timestamp, reloj tras recibir)
+        self.acked: List[int] = []         # original_timestamp de cada confirmación
+        self.history: List[dict] = []      # Mensajes recibidos por catch-up
+        self.sent: List[int] = []          # Timestamps de los mensajes enviados
+
+    def send(self, data: dict):
+        super().send(data)
+        if data.get('type') == 'message':
+            self.sent.append(data['timestamp'])
+
+    def handle_broadcast(self, data: dict):
+        super().handle_broadcast(data)
+        self.receipts.append((data.get('server_timestamp'), self.lamport_clock.get_time()))
+
+    def display_broadcast(self, data: dict):
+        super().display_broadcast(data)
+        self.delivered.append(data)
+
+    def handle_message_ack(self, data: dict):
+        super().handle_message_ack(data)
+        self.receipts.append((data.get('server_timestamp'), self.lamport_clock.get_time()))
+        self.acked.append(data.get('original_timestamp'))
+
+    def handle_catch_up_batch(self, data: dict):
+        super().handle_catch_up_batch(data)
+        self.history.extend(data.get('messages', []))
+
+
+class LamportHarness:
+    """Servidor y clientes en proceso sobre una base de tiempo virtual."""
+
+    # Hilos del servidor que duermen en la base de tiempo (entrega, eventos internos, limpieza)
+    SERVER_TIMERS = 3
+
+    def __init__(self, wait_timeout: float = 5.0, **server_kwargs):
+        """
+        Inicia el servidor en un puerto efímero.
+
+        Args:
+            wait_timeout: Espera real máxima de `wait_for`
+            **server_kwargs: Parámetros adicionales de UDPServer
+        """
+        self.wait_timeout = wait_timeout
+        self.timebase = VirtualTimebase()
+        self.server = UDPServer(port=0, log_stdout=False, timebase=self.timebase, **server_kwargs)
+        self.clients: List[HarnessClient] = []
+        self.next_client_id = 1
+
+        threading.Thread(target=self.server.start, daemon=True).start()
+        if not self.server.ready.wait(self.wait_timeout):
+            raise RuntimeError("El servidor no se inició")
+        self.wait_for(lambda: self.timebase.sleeping() >= self.SERVER_TIMERS, "temporizadores del servidor")
+
+    def __enter__(self) -> 'LamportHarness':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def client(self, name: str = None, **kwargs) -> HarnessClient:
+        """
+        Crea, conecta e inicia un cliente.
+
+        Args:
+            name: Nombre del cliente (por defecto "Cliente-<id>")
+            **kwargs: Parámetros adicionales de LamportClient; los eventos
+                internos automáticos están desactivados salvo que se pida
+                `auto_event_interval`. Con `server_port` el cliente se conecta
+                a otro puerto (p. ej. un ImpairmentProxy delante del servidor)
+        """
+        client_id = kwargs.pop('client_id', self.next_client_id)
+        server_port = kwargs.pop('server_port', self.server.port)
+        self.next_client_id = max(self.next_client_id, client_id) + 1
+        kwargs.setdefault('auto_event_interval', None)
+        client = HarnessClient(client_id, name or f"Cliente-{client_id}", 'localhost', server_port,
+                               log_stdout=False, timebase=self.timebase, **kwargs)
+        if not client.connect_to_server():
+            client.close()
+            raise RuntimeError(f"{client.client_name} no pudo registrarse")
+
+        # Esperar a que sus temporizadores estén dormidos antes de mover el tiempo
+        timers = 2 if client.auto_event_interval else 1
+        sleeping = self.timebase.sleeping()
+        client.start_background_threads()
+        self.wait_for(lambda: self.timebase.sleeping() >= sleeping + timers,
+                      f"temporizadores de {client.client_name}")
+        self.clients.append(client)
+        return client
+
+    def advance(self, seconds: float):
+        """Adelanta el tiempo virtual, ejecutando en orden los temporizadores vencidos."""
+        self.timebase.advance(seconds)
+
+    def wait_for(self, predicate: Callable[[], bool], what: str = "condición", timeout: float = None):
+        """
+        Espera (en tiempo real) a que `predicate` sea verdadero.
+
+        Raises:
+            AssertionError: Si no se cumple dentro del plazo
+        """
+        limit = time.monotonic() + (self.wait_timeout if timeout is None else timeout)
+        while not predicate():
+            if time.monotonic() > limit:
+                raise AssertionError(f"Tiempo agotado esperando {what}")
+            time.sleep(0.001)
+
+    def deliver_all(self):
+        """Adelanta el tiempo hasta que el servidor entregue todos los mensajes en cola."""
+        while self.server.message_queue:
+            self.advance(max(self.server.process_interval, 0.1))
+
+    def assert_lamport_invariants(self):
+        """
+        Verifica las invariantes de Lamport en todos los clientes:
+
+        - Condición de reloj: tras recibir un datagrama del servidor, el reloj
+          local supera el timestamp con que el servidor lo envió.
+        - Los broadcasts se muestran en orden (original_timestamp, sender_id).
+        - Ningún cliente recibe sus propios mensajes.
+        - Los timestamps de los mensajes propios son estrictamente crecientes.
+        - El reloj del servidor no es menor que ningún timestamp que haya confirmado.
+        """
+        server_time = self.server.lamport_clock.get_time()
+        for client in self.clients:
+            for server_timestamp, local_time in client.receipts:
+                assert local_time > server_timestamp, \
+                    f"{client.client_name}: reloj {local_time} <= timestamp del servidor {server_timestamp}"
+
+            keys = [(m['original_timestamp'], m['sender_id']) for m in client.delivered]
+            assert keys == sorted(keys), f"{client.client_name}: broadcasts fuera de orden: {keys}"
+            assert all(m['sender_id'] != client.client_id for m in client.delivered), \
+                f"{client.client_name} recibió su propio mensaje"
+
+            assert all(a < b for a, b in zip(client.sent, client.sent[1:])), \
+                f"{client.client_name}: timestamps de envío no crecientes: {client.sent}"
+            assert all(timestamp <= server_time for timestamp in client.acked), \
+                f"Servidor en {server_time} tras confirmar {client.acked} a {client.client_name}"
+
+    def close(self):
+        """Detiene clientes y servidor y libera los hilos dormidos."""
+        for client in self.clients:
+            client.close()
+        self.server.stop()
+        self.timebase.close()
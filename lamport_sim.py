@@ -0,0 +1,507 @@
+"""
+Simulador de eventos discretos del protocolo de Lamport.
+
+Reproduce el protocolo del servidor UDP (los clientes envían mensajes al
+servidor, que los confirma, los encola en orden (timestamp, emisor) y los
+retransmite) para poblaciones de 10^4-10^5 procesos, sin sockets ni hilos:
+un único heap de eventos en tiempo simulado.
+
+- El servidor usa un LamportClock y una cola de udp_server.Message, con el
+  mismo orden que el servidor real.
+- Los relojes de los clientes son enteros en una lista (un objeto con lock
+  por proceso sería el costo dominante) y aplican las mismas reglas que
+  LamportClock: +1 en eventos internos y envíos, max(L, t) + 1 al recibir.
+- Los retardos, las pérdidas y la carga de cada proceso son modelos
+  intercambiables (cualquier objeto con la misma interfaz sirve).
+- Con la misma semilla el resultado es idéntico.
+
+Uso:
+
+    python lamport_sim.py --processes 10000 --duration 5 --rate 0.5 --fanout 20
+"""
+
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import itertools
+from math import ceil, log
+from array import array
+from typing import Optional
+from lamport_clock import LamportClock
+from udp_server import Message
+
+# Tipos de evento del heap (las recepciones en clientes van a su bandeja de entrada)
+WORK = 0        # El proceso ejecuta su próxima acción (envío o evento interno)
+ARRIVE = 1      # Un mensaje llega al servidor
+TICK = 2        # El servidor entrega el próximo mensaje de su cola
+
+
+class ConstantDelay:
+    """Retardo de red fijo."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self, rng: random.Random) -> float:
+        return self.seconds
+
+    def many(self, rng: random.Random, count: int) -> list:
+        return [self.seconds] * count
+
+
+class UniformDelay:
+    """Retardo uniforme entre `low` y `high` segundos."""
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.span = high - low
+
+    def __call__(self, rng: random.Random) -> float:
+        return self.low + self.span * rng.random()
+
+    def many(self, rng: random.Random, count: int) -> list:
+        low, span, random_ = self.low, self.span, rng.random
+        return [low + span * random_() for _ in range(count)]
+
+
+class ExponentialDelay:
+    """Retardo base más una cola exponencial de media `mean` (reordena datagramas)."""
+
+    def __init__(self, base: float, mean: float):
+        self.base = base
+        self.rate = 1 / mean
+
+    def __call__(self, rng: random.Random) -> float:
+        return self.base + rng.expovariate(self.rate)
+
+    def many(self, rng: random.Random, count: int) -> list:
+        base, mean, random_ = self.base, 1 / self.rate, rng.random
+        return [base - mean * log(1.0 - random_()) for _ in range(count)]
+
+
+class BernoulliLoss:
+    """Cada datagrama se pierde con probabilidad `p`, independientemente."""
+
+    def __init__(self, p: float):
+        self.p = p
+
+    def __call__(self, rng: random.Random) -> bool:
+        return rng.random() < self.p
+
+
+class BurstLoss:
+    """
+    Pérdidas en ráfagas (modelo de Gilbert-Elliott).
+
+    La red alterna entre un estado bueno y uno malo; en el malo se pierde
+    cada datagrama con probabilidad `bad_loss`.
+    """
+
+    def __init__(self, enter_bad: float, leave_bad: float, bad_loss: float = 1.0):
+        self.enter_bad = enter_bad
+        self.leave_bad = leave_bad
+        self.bad_loss = bad_loss
+        self.bad = False
+
+    def __call__(self, rng: random.Random) -> bool:
+        if self.bad:
+            if rng.random() < self.leave_bad:
+                self.bad = False
+        elif rng.random() < self.enter_bad:
+            self.bad = True
+        return self.bad and rng.random() < self.bad_loss
+
+
+class PoissonWorkload:
+    """Envíos y eventos internos como procesos de Poisson independientes por proceso."""
+
+    def __init__(self, message_rate: float, internal_rate: float = 0.0):
+        """
+        Args:
+            message_rate: Mensajes por segundo de cada proceso
+            internal_rate: Eventos internos por segundo de cada proceso
+
+        Raises:
+            ValueError: Si alguna tasa es negativa o ambas son 0
+        """
+        if message_rate < 0 or internal_rate < 0 or message_rate + internal_rate <= 0:
+            raise ValueError(f"Tasas inválidas: {message_rate} mensajes/s, {internal_rate} eventos internos/s "
+                             f"(deben ser >= 0 y no ambas 0)")
+        self.rate = message_rate + internal_rate
+        self.message_share = message_rate / self.rate
+
+    def __call__(self, rng: random.Random):
+        """Devuelve (segundos hasta la próxima acción, si es un envío)."""
+        return rng.expovariate(self.rate), rng.random() < self.message_share
+
+
+class PeriodicWorkload:
+    """Un envío cada `interval` segundos con fluctuación uniforme de ±`jitter`."""
+
+    def __init__(self, interval: float, jitter: float = 0.0):
+        """
+        Raises:
+            ValueError: Si el intervalo no es positivo o la fluctuación puede anularlo
+        """
+        if interval <= 0 or not 0 <= jitter < interval:
+            raise ValueError(f"Intervalo inválido: {interval} ± {jitter} s")
+        self.interval = interval
+        self.jitter = jitter
+
+    def __call__(self, rng: random.Random):
+        return self.interval + self.jitter * (2 * rng.random() - 1), True
+
+
+class LatencySamples:
+    """Muestras acotadas: al llenarse se descarta una de cada dos y se muestrea la mitad."""
+
+    def __init__(self, capacity: int = 200000):
+        self.capacity = capacity
+        self.values = array('d')
+        self.stride = 1
+        self.seen = 0
+
+    def add(self, value: float):
+        self.seen += 1
+        if self.seen % self.stride:
+            return
+        self.values.append(value)
+        if len(self.values) >= self.capacity:
+            self.values = self.values[::2]
+            self.stride *= 2
+
+    def extend(self, values: list):
+        """Agrega varias muestras con la misma regla que `add`."""
+        first = (self.stride - (self.seen + 1) % self.stride) % self.stride
+        self.seen += len(values)
+        self.values.extend(values[first::self.stride] if self.stride > 1 else values)
+        while len(self.values) >= self.capacity:
+            self.values = self.values[::2]
+            self.stride *= 2
+
+    def summary(self) -> dict:
+        """Percentiles en milisegundos."""
+        values = sorted(self.values)
+        if not values:
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'p999_ms': 0.0, 'max_ms': 0.0}
+
+        def at(q):
+            return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+        return {'count': self.seen, 'p50_ms': at(0.5), 'p99_ms': at(0.99),
+                'p999_ms': at(0.999), 'max_ms': values[-1] * 1000}
+
+
+class Simulation:
+    """Simulación del servidor de Lamport con N procesos cliente."""
+
+    def __init__(self, processes: int, workload=None, delay=None, loss=None,
+                 process_interval: float = 0.0, fanout: Optional[int] = None,
+                 seed: int = 0, max_samples: int = 200000):
+        """
+        Configura la simulación.
+
+        Args:
+            processes: Cantidad de procesos cliente
+            workload: Modelo de carga por proceso (por defecto PoissonWorkload(1.0))
+            delay: Modelo de retardo de red de cada datagrama (por defecto ConstantDelay(0.001))
+            loss: Modelo de pérdida de datagramas (None = sin pérdidas)
+            process_interval: Pausa entre entregas del servidor (0 = entregar al llegar)
+            fanout: Destinatarios de cada broadcast elegidos al azar (None = todos los demás)
+            seed: Semilla del generador aleatorio
+            max_samples: Muestras de latencia retenidas por métrica
+        """
+        if processes < 2:
+            raise ValueError("Se necesitan al menos 2 procesos")
+        self.processes = processes
+        self.workload = workload or PoissonWorkload(1.0)
+        self.delay = delay or ConstantDelay(0.001)
+        self.loss = loss
+        self.process_interval = process_interval
+        self.fanout = fanout
+        self.seed = seed
+        self.max_samples = max_samples
+
+    def run(self, duration: float) -> dict:
+        """
+        Simula `duration` segundos.
+
+        Returns:
+            Diccionario con eventos procesados, ordenamiento, relojes y latencias
+        """
+        rng = random.Random(self.seed)
+        n = self.processes
+        workload, delay, loss = self.workload, self.delay, self.loss
+        fanout = self.fanout if self.fanout is not None and self.fanout < n - 1 else None
+        interval = self.process_interval
+
+        heap = []
+        push, pop = heapq.heappush, heapq.heappop
+        random_ = rng.random
+        delay_many = getattr(delay, 'many', None) or (lambda rng, count: [delay(rng) for _ in range(count)])
+        counter = itertools.count()
+
+        server_clock = LamportClock(0, "Servidor-Sim")
+        server_queue = []
+        clocks = [0] * (n + 1)          # Relojes de los clientes (índice = id de proceso)
+        message_ids = [0] * (n + 1)
+        last_received = [0] * (n + 1)   # Clave de orden del último broadcast recibido
+        key_base = n + 1                # clave = timestamp * key_base + emisor, igual que Message.__lt__
+
+        # Bandeja de entrada de cada cliente: (llegada, timestamp del servidor, clave, envío original).
+        # Una recepción solo modifica el estado del destinatario, así que no pasa por el heap:
+        # se aplica en orden de llegada cuando el proceso vuelve a actuar (o al final).
+        inboxes = [[] for _ in range(n + 1)]
+
+        delivery_latency = LatencySamples(self.max_samples)
+        receive_latency = LatencySamples(self.max_samples)
+        sent = internal = lost = acks = delivered = receipts = 0
+        out_of_order = reordered = 0
+        last_delivered = 0
+        tick_pending = False
+        events = 0
+
+        for process in range(1, n + 1):
+            dt, _ = workload(rng)
+            push(heap, (dt, next(counter), WORK, process, None))
+
+        def drain(process, now):
+            """Aplica las recepciones de `process` que llegaron hasta `now` (regla de recepción)."""
+            nonlocal acks, receipts, reordered, events
+            inbox = inboxes[process]
+            inbox.sort()
+            clock = clocks[process]
+            last = last_received[process]
+            applied = 0
+            latencies = []
+            for arrival, timestamp, key, sent_at in inbox:
+                if arrival > now:
+                    break
+                applied += 1
+                clock = (clock if clock > timestamp else timestamp) + 1
+                if key:
+                    latencies.append(arrival - sent_at)
+                    if key < last:
+                        reordered += 1
+                    else:
+                        last = key
+            if applied:
+                receive_latency.extend(latencies)
+                receipts += len(latencies)
+                acks += applied - len(latencies)
+                events += applied
+                clocks[process] = clock
+                last_received[process] = last
+                if applied == len(inbox):
+                    inbox.clear()
+                else:
+                    del inbox[:applied]
+
+        def broadcast(now, message):
+            """Entrega un mensaje del servidor: clave de orden y retransmisión."""
+            nonlocal delivered, out_of_order, last_delivered, lost
+            delivered += 1
+            delivery_latency.add(now - message.sent_at)
+            key = message.order_key
+            if key < last_delivered:
+                out_of_order += 1
+            else:
+                last_delivered = key
+
+            server_timestamp = server_clock.send_event()
+            sender = message.sender_id
+            sent_at = message.sent_at
+            if fanout is None:
+                recipients = [recipient for recipient in range(1, n + 1) if recipient != sender]
+            else:
+                recipients = [recipient for recipient in (int(random_() * n) + 1 for _ in range(fanout))
+                              if recipient != sender]
+            if loss is not None:
+                kept = [recipient for recipient in recipients if not loss(rng)]
+                lost += len(recipients) - len(kept)
+                recipients = kept
+            for recipient, latency in zip(recipients, delay_many(rng, len(recipients))):
+                inboxes[recipient].append((now + latency, server_timestamp, key, sent_at))
+
+        started = time.perf_counter()
+        # Lo que queda en el heap al llegar al horizonte sigue en vuelo
+        while heap and heap[0][0] <= duration:
+            now, _, kind, process, message = pop(heap)
+            events += 1
+
+            if kind == WORK:
+                if inboxes[process]:
+                    drain(process, now)
+                dt, is_message = workload(rng)
+                push(heap, (now + dt, next(counter), WORK, process, None))
+                clocks[process] += 1
+                if not is_message:
+                    internal += 1
+                    continue
+
+                sent += 1
+                message_ids[process] += 1
+                message = Message(process, None, clocks[process], message_ids[process])
+                message.sent_at = now
+                message.order_key = clocks[process] * key_base + process
+                if loss is not None and loss(rng):
+                    lost += 1
+                    continue
+                push(heap, (now + delay(rng), next(counter), ARRIVE, process, message))
+
+            elif kind == ARRIVE:
+                server_timestamp = server_clock.receive_event(message.timestamp)
+                message.received_time = now
+                if loss is not None and loss(rng):
+                    lost += 1
+                else:
+                    inboxes[process].append((now + delay(rng), server_timestamp, 0, now))
+
+                if interval <= 0:
+                    broadcast(now, message)
+                else:
+                    heapq.heappush(server_queue, message)
+                    if not tick_pending:
+                        # El servidor real revisa la cola cada `interval` aunque esté vacía
+                        tick_pending = True
+                        push(heap, (ceil(now / interval) * interval, next(counter), TICK, 0, None))
+
+            else:  # TICK: un mensaje por intervalo, como process_ordered_messages
+                broadcast(now, heapq.heappop(server_queue))
+                if server_queue:
+                    push(heap, (now + interval, next(counter), TICK, 0, None))
+                else:
+                    tick_pending = False
+
+        for process in range(1, n + 1):
+            if inboxes[process]:
+                drain(process, duration)
+        in_flight = sum(1 for entry in heap if entry[2] == ARRIVE)
+        receipts_in_flight = sum(len(inbox) for inbox in inboxes)
+
+        wall = time.perf_counter() - started
+        client_clocks = clocks[1:]
+        return {
+            'config': {
+                'processes': n,
+                'duration': duration,
+                'process_interval': interval,
+                'fanout': self.fanout,
+                'seed': self.seed
+            },
+            'events': events,
+            'wall_seconds': wall,
+            'events_per_second': events / wall if wall > 0 else 0.0,
+            'messages': {
+                'sent': sent,
+                'internal_events': internal,
+                'acks': acks,
+                'delivered': delivered,
+                'pending': len(server_queue),
+                # Enviados que no llegaron al servidor antes del horizonte
+                'in_flight': in_flight,
+                # Confirmaciones y broadcasts que no llegaron a su cliente antes del horizonte
+                'receipts_in_flight': receipts_in_flight,
+                'broadcast_receipts': receipts,
+                'datagrams_lost': lost
+            },
+            'ordering': {
+                # Entregados por el servidor con clave menor que uno ya entregado
+                'server_out_of_order': out_of_order,
+                # Broadcasts que llegaron a un cliente después de uno de clave mayor
+                'client_reordered': reordered
+            },
+            'clocks': {
+                'server': server_clock.get_time(),
+                'client_mean': sum(client_clocks) / n,
+                'client_max': max(client_clocks),
+                'server_ticks_per_second': server_clock.get_time() / duration
+            },
+            'latency': {
+                'delivery': delivery_latency.summary(),
+                'receive': receive_latency.summary()
+            }
+        }
+
+
+def parse_delay(spec: str):
+    """Construye un modelo de retardo: 'const:S', 'uniform:MIN:MAX' o 'exp:BASE:MEDIA'."""
+    name, *values = spec.split(':')
+    values = [float(value) for value in values]
+    models = {'const': ConstantDelay, 'uniform': UniformDelay, 'exp': ExponentialDelay}
+    if name not in models:
+        raise ValueError(f"Modelo de retardo desconocido: {name}")
+    return models[name](*values)
+
+
+def parse_loss(spec: str):
+    """Construye un modelo de pérdida: 'P' (independiente) o 'burst:ENTRAR:SALIR[:PERDIDA]'."""
+    if not spec or spec == '0':
+        return None
+    name, *values = spec.split(':')
+    if name == 'burst':
+        return BurstLoss(*(float(value) for value in values))
+    return BernoulliLoss(float(name))
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Simulador de eventos discretos del protocolo de Lamport")
+    parser.add_argument('--processes', type=int, default=10000, help="Procesos cliente")
+    parser.add_argument('--duration', type=float, default=10, help="Segundos simulados")
+    parser.add_argument('--rate', type=float, default=1.0, help="Mensajes por segundo de cada proceso")
+    parser.add_argument('--internal-rate', type=float, default=0.0, help="Eventos internos por segundo de cada proceso")
+    parser.add_argument('--delay', default='exp:0.0005:0.002', help="const:S, uniform:MIN:MAX o exp:BASE:MEDIA")
+    parser.add_argument('--loss', default='0', help="Probabilidad de pérdida o burst:ENTRAR:SALIR[:PERDIDA]")
+    parser.add_argument('--fanout', type=int, default=10, help="Destinatarios por broadcast (0 = todos)")
+    parser.add_argument('--process-interval', type=float, default=0.0, help="Pausa entre entregas del servidor")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args()
+
+    try:
+        simulation = Simulation(
+            args.processes,
+            workload=PoissonWorkload(args.rate, args.internal_rate),
+            delay=parse_delay(args.delay),
+            loss=parse_loss(args.loss),
+            process_interval=args.process_interval,
+            fanout=args.fanout or None,
+            seed=args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    result = simulation.run(args.duration)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    messages, ordering, clocks, latency = (result['messages'], result['ordering'],
+                                           result['clocks'], result['latency'])
+    print(f"🧮 Simulación: {args.processes} procesos, {args.duration:g} s simulados")
+    print("=" * 64)
+    print(f"  Eventos: {result['events']} en {result['wall_seconds']:.2f} s "
+          f"({result['events_per_second'] / 1e6:.2f} M eventos/s)")
+    print(f"  Mensajes: {messages['sent']} enviados, {messages['delivered']} entregados, "
+          f"{messages['pending']} pendientes, {messages['in_flight']} en vuelo, "
+          f"{messages['datagrams_lost']} datagramas perdidos")
+    print(f"  Orden: {ordering['server_out_of_order']} entregas fuera de orden en el servidor, "
+          f"{ordering['client_reordered']} broadcasts reordenados en clientes")
+    print(f"  Relojes: servidor {clocks['server']}, clientes media {clocks['client_mean']:.1f} "
+          f"máx {clocks['client_max']}")
+    print("-" * 64)
+    print(f"  {'Latencia':<12}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'máx ms':>10}")
+    for name in ('delivery', 'receive'):
+        summary = latency[name]
+        print(f"  {name:<12}{summary['p50_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+              f"{summary['p999_ms']:>10.2f}{summary['max_ms']:>10.2f}")
+    print("=" * 64)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
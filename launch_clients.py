@@ -1,11 +1,42 @@
 """
 Script para lanzar múltiples clientes UDP de forma automática.
+
+Sin argumentos abre clientes con interfaz gráfica, uno por ventana. Con
+--fleet lanza una flota de clientes sin interfaz: cada proceso de un pool
+aloja muchos clientes asyncio sobre un solo socket (async_client.py), se
+conectan a una tasa configurable y siguen un perfil de comportamiento; al
+terminar se imprimen estadísticas agregadas de todos los procesos.
+    
+    python launch_clients.py --fleet --clients 1000 --workers 8 --ramp-rate 200 \
+        --profiles default:0.7,chatty:0.2,idle:0.1 --duration 60
 """
 
 import subprocess
 import time
 import sys
 import os
+import json
+import random
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+# Perfiles de comportamiento: mensajes/s, bytes de contenido, eventos internos/s
+PROFILES = {
+    'idle': {'send_rate': 0.0, 'message_size': 16, 'internal_rate': 0.05},
+    'default': {'send_rate': 0.2, 'message_size': 32, 'internal_rate': 0.1},
+    'chatty': {'send_rate': 2.0, 'message_size': 128, 'internal_rate': 0.5},
+}
+
+# Contenido máximo que cabe en un datagrama junto con el resto de los campos
+MAX_MESSAGE_SIZE = 800
+
+# Intentos de registro de cada cliente de la flota
+CONNECT_ATTEMPTS = 3
+
+# Muestras de latencia que devuelve cada proceso como máximo
+MAX_LATENCY_SAMPLES = 20000
 
 def launch_client(client_id: int, client_name: str, server_host="localhost", server_port=5000):
     """Lanza un cliente UDP en una nueva ventana de comando."""
@@ -16,19 +47,231 @@ def launch_client(client_id: int, client_name: str, server_host="localhost", ser
         
         # En Windows, usar start para abrir nueva ventana
         if os.name == 'nt':  # Windows
-            cmd = f'start "Cliente-{client_id}" cmd /k "{python_cmd}" "{script_path}" {client_id} "{client_name}"'
+            cmd = (f'start "Cliente-{client_id}" cmd /k "{python_cmd}" "{script_path}" {client_id} "{client_name}" '
+                   f'{server_host} {server_port}')
             subprocess.run(cmd, shell=True)
         else:  # Linux/Mac
-            cmd = [python_cmd, script_path, str(client_id), client_name]
+            cmd = [python_cmd, script_path, str(client_id), client_name, server_host, str(server_port)]
             subprocess.Popen(cmd)
         
         print(f"✅ Cliente {client_name} (ID: {client_id}) iniciado")
-        
+    
     except Exception as e:
         print(f"❌ Error iniciando cliente {client_id}: {e}")
 
+def parse_profiles(spec: str) -> List[tuple]:
+    """
+    Interpreta una mezcla de perfiles 'nombre:peso,nombre:peso'.
+    
+    Returns:
+        Lista de (nombre, peso)
+    """
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+        if name not in PROFILES:
+            raise ValueError(f"Perfil desconocido: {name} (disponibles: {', '.join(PROFILES)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+async def run_fleet_client(mux, client_id: int, profile: dict, start_at: float, stop_at: float,
+                           rng: random.Random, stats: dict, latencies: List[float]):
+    """Conecta un cliente a su hora de llegada y ejecuta su perfil hasta `stop_at`."""
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(max(0.0, start_at - loop.time()))
+    
+    # El registro viaja por UDP: reintentar si se pierde el datagrama o la respuesta
+    client = mux.client(client_id, f"Cliente-{client_id}")
+    for attempt in range(CONNECT_ATTEMPTS):
+        try:
+            await client.connect(timeout=2.0)
+            break
+        except asyncio.TimeoutError:
+            stats['connect_retries'] += 1
+    else:
+        stats['connect_failures'] += 1
+        client.close()
+        return
+    stats['connected'] += 1
+    
+    async def consume():
+        async for _ in client.broadcasts():
+            stats['broadcasts_received'] += 1
+    
+    consumer = loop.create_task(consume())
+    content = 'x' * min(profile['message_size'], MAX_MESSAGE_SIZE)
+    total_rate = profile['send_rate'] + profile['internal_rate']
+    
+    # Llegadas de Poisson; cada una es un mensaje o un evento interno según las tasas
+    while total_rate > 0:
+        delay = rng.expovariate(total_rate)
+        if loop.time() + delay >= stop_at:
+            break
+        await asyncio.sleep(delay)
+        
+        if rng.random() * total_rate < profile['send_rate']:
+            sent_at = loop.time()
+            try:
+                await client.send(content, wait_ack=True, timeout=2.0)
+                stats['acks_received'] += 1
+                latencies.append(loop.time() - sent_at)
+            except asyncio.TimeoutError:
+                stats['ack_timeouts'] += 1
+            stats['messages_sent'] += 1
+        else:
+            await client.internal_event()
+            stats['internal_events'] += 1
+    
+    await asyncio.sleep(max(0.0, stop_at - loop.time()))
+    consumer.cancel()
+    stats['dropped_broadcasts'] += client.dropped_broadcasts
+    client.close()
+
+async def run_fleet_worker_async(config: dict) -> dict:
+    """Ejecuta los clientes asignados a un proceso sobre un único socket."""
+    from async_client import AsyncLamportMux
+    
+    mux = await AsyncLamportMux.open(config['host'], config['port'], send_buffer=config['send_buffer'])
+    loop = asyncio.get_running_loop()
+    # Convertir la hora de pared común de inicio al reloj del event loop
+    origin = loop.time() + (config['start_time'] - time.time())
+    stop_at = origin + config['ramp_seconds'] + config['duration']
+    
+    stats = {key: 0 for key in ('connected', 'connect_failures', 'connect_retries', 'messages_sent', 'acks_received',
+                                'ack_timeouts', 'internal_events', 'broadcasts_received',
+                                'dropped_broadcasts')}
+    latencies = []
+    rng = random.Random(config['seed'])
+    
+    await asyncio.gather(*(
+        run_fleet_client(mux, client_id, PROFILES[profile], origin + offset, stop_at, rng, stats, latencies)
+        for client_id, profile, offset in config['clients']
+    ))
+    await mux.close()
+    
+    if len(latencies) > MAX_LATENCY_SAMPLES:
+        latencies = rng.sample(latencies, MAX_LATENCY_SAMPLES)
+    stats['ack_latencies'] = latencies
+    stats['datagrams_sent'] = mux.stats['sent']
+    stats['datagrams_received'] = mux.stats['received']
+    return stats
+
+def run_fleet_worker(config: dict) -> dict:
+    """Punto de entrada de cada proceso del pool."""
+    return asyncio.run(run_fleet_worker_async(config))
+
+def plan_fleet(args) -> List[dict]:
+    """
+    Reparte los clientes entre procesos.
+    
+    Cada cliente recibe un perfil según la mezcla y una hora de llegada
+    (índice / ramp_rate); los clientes se intercalan entre procesos para que
+    todos arranquen en paralelo.
+    """
+    rng = random.Random(args.seed)
+    names, weights = zip(*parse_profiles(args.profiles))
+    ramp_seconds = args.clients / args.ramp_rate if args.ramp_rate > 0 else 0.0
+    start_time = time.time() + 1.0  # Margen para que arranquen los procesos
+    
+    configs = [{
+        'host': args.host, 'port': args.port, 'duration': args.duration,
+        'ramp_seconds': ramp_seconds, 'start_time': start_time,
+        'send_buffer': args.send_buffer, 'seed': args.seed + worker, 'clients': []
+    } for worker in range(args.workers)]
+    
+    for index in range(args.clients):
+        client_id = args.first_id + index
+        offset = index / args.ramp_rate if args.ramp_rate > 0 else 0.0
+        configs[index % args.workers]['clients'].append((client_id, rng.choices(names, weights)[0], offset))
+    
+    return [config for config in configs if config['clients']]
+
+def aggregate_fleet(results: List[dict], elapsed: float) -> dict:
+    """Suma las estadísticas de todos los procesos."""
+    totals: Dict[str, float] = {}
+    latencies = []
+    for result in results:
+        latencies.extend(result.pop('ack_latencies'))
+        for key, value in result.items():
+            totals[key] = totals.get(key, 0) + value
+    
+    latencies.sort()
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+    
+    totals['elapsed_seconds'] = elapsed
+    totals['ack_latency_ms'] = {'p50': percentile(0.5), 'p99': percentile(0.99), 'p999': percentile(0.999)}
+    return totals
+
+def run_fleet(args) -> int:
+    """Lanza la flota, espera a que termine y muestra las estadísticas."""
+    configs = plan_fleet(args)
+    print(f"🚀 Flota: {args.clients} clientes en {len(configs)} procesos hacia {args.host}:{args.port}")
+    print(f"📈 Rampa: {args.ramp_rate:g} clientes/s, perfiles: {args.profiles}, duración: {args.duration:g} s")
+    
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=len(configs)) as pool:
+        results = list(pool.map(run_fleet_worker, configs))
+    totals = aggregate_fleet(results, time.time() - started)
+    
+    if args.json:
+        print(json.dumps(totals, indent=2))
+        return 0
+    
+    latency = totals['ack_latency_ms']
+    print("=" * 50)
+    print(f"  Conectados:            {totals['connected']} ({totals['connect_failures']} fallidos, "
+          f"{totals['connect_retries']} reintentos)")
+    print(f"  Mensajes enviados:     {totals['messages_sent']} ({totals['ack_timeouts']} sin confirmar)")
+    print(f"  Eventos internos:      {totals['internal_events']}")
+    print(f"  Broadcasts recibidos:  {totals['broadcasts_received']} ({totals['dropped_broadcasts']} descartados)")
+    if latency['p50'] is not None:
+        print(f"  Latencia de ack (ms):  p50={latency['p50']:.2f}  p99={latency['p99']:.2f}  "
+              f"p999={latency['p999']:.2f}")
+    print(f"  Tiempo total:          {totals['elapsed_seconds']:.1f} s")
+    print("=" * 50)
+    return 0
+
+def parse_args(argv=None):
+    """
+    Argumentos del modo flota.
+    
+    Sin `--fleet` no se acepta ningún argumento: el launcher interactivo no
+    los usa y se ignorarían en silencio.
+    """
+    parser = argparse.ArgumentParser(description="Launcher de clientes UDP - Algoritmo de Lamport")
+    parser.add_argument('--fleet', action='store_true', help="Lanzar una flota de clientes sin interfaz")
+    parser.add_argument('--host', default='localhost', help="Servidor UDP")
+    parser.add_argument('--port', type=int, default=5000, help="Puerto del servidor UDP")
+    parser.add_argument('--clients', type=int, default=100, help="Cantidad de clientes")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Procesos del pool")
+    parser.add_argument('--ramp-rate', type=float, default=100.0,
+                        help="Clientes que se conectan por segundo (0 = todos a la vez)")
+    parser.add_argument('--profiles', default='default',
+                        help=f"Mezcla de perfiles nombre:peso ({', '.join(PROFILES)})")
+    parser.add_argument('--duration', type=float, default=30.0, help="Segundos de actividad tras la rampa")
+    parser.add_argument('--first-id', type=int, default=1, help="ID del primer cliente")
+    parser.add_argument('--send-buffer', type=int, default=1000, help="Datagramas en cola por proceso")
+    parser.add_argument('--seed', type=int, default=1, help="Semilla de perfiles y tiempos")
+    parser.add_argument('--json', action='store_true', help="Imprimir las estadísticas en JSON")
+    args = parser.parse_args(argv)
+    if not args.fleet:
+        parser.error("los argumentos solo se usan en el modo flota: agregue --fleet "
+                     "o ejecute sin argumentos para el launcher interactivo")
+    if args.clients < 1:
+        parser.error("--clients debe ser al menos 1")
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    for name in ('ramp_rate', 'duration', 'send_buffer'):
+        if getattr(args, name) < 0:
+            parser.error(f"--{name.replace('_', '-')} no puede ser negativo")
+    return args
+
 def main():
     """Función principal."""
+    if len(sys.argv) > 1:
+        return run_fleet(parse_args())
+    
     print("🚀 Launcher de Clientes UDP - Algoritmo de Lamport")
     print("=" * 50)
     
@@ -65,4 +308,4 @@ def main():
     input()
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
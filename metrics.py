@@ -0,0 +1,233 @@
+"""
+Métricas de bajo costo para los servidores de Lamport.
+Contadores e histogramas por hilo, sin locks en el camino caliente,
+con exportación en formato de texto de Prometheus.
+"""
+
+import bisect
+import threading
+from typing import Dict, Tuple
+
+# Límites (en segundos) de los histogramas de latencia
+DEFAULT_LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """Contadores e histogramas escritos por un único hilo a la vez."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas con fragmentos por hilo.
+
+    Cada hilo escribe solo en su propio fragmento, por lo que incrementar un
+    contador u observar una latencia no toma ningún lock. La agregación se
+    hace al recolectar (scrape), que es infrecuente.
+
+    Los fragmentos se indexan por identificador de hilo: el sistema solo
+    reutiliza un identificador cuando el hilo anterior terminó, así que cada
+    fragmento sigue teniendo un único escritor, y los hilos efímeros (uno por
+    datagrama en el servidor UDP) reutilizan fragmentos en vez de crearlos.
+    """
+
+    def __init__(self):
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+
+        # Metadatos: nombre -> (tipo, ayuda)
+        self._descriptions = {}
+        self._buckets = {}
+
+        # Gauges: (nombre, labels) -> valor o función
+        self._gauges = {}
+
+    def describe(self, name: str, metric_type: str, help_text: str, buckets: Tuple[float, ...] = None):
+        """
+        Declara una métrica.
+
+        Args:
+            name: Nombre de la métrica
+            metric_type: 'counter', 'gauge' o 'histogram'
+            help_text: Descripción mostrada en /metrics
+            buckets: Límites de los buckets (solo histogramas)
+        """
+        self._descriptions[name] = (metric_type, help_text)
+        if metric_type == 'histogram':
+            self._buckets[name] = tuple(buckets or DEFAULT_LATENCY_BUCKETS)
+
+    def _shard(self) -> _Shard:
+        """Obtiene (o crea) el fragmento del hilo actual."""
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._shards_lock:
+                shard = self._shards[ident] = _Shard()
+        return shard
+
+    @staticmethod
+    def _merge_into(target: _Shard, source: _Shard):
+        """Suma los valores de `source` en `target`."""
+        for key, value in list(source.counters.items()):
+            target.counters[key] = target.counters.get(key, 0) + value
+        for key, (counts, total) in list(source.histograms.items()):
+            existing = target.histograms.get(key)
+            if existing is None:
+                target.histograms[key] = [list(counts), total]
+            else:
+                existing[0] = [a + b for a, b in zip(existing[0], counts)]
+                existing[1] += total
+
+    def inc(self, name: str, labels: Labels = (), amount: int = 1):
+        """Incrementa un contador."""
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        """Registra una observación en un histograma."""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            # Un bucket por límite más el bucket +Inf
+            entry = histograms[key] = [[0] * (len(self._buckets[name]) + 1), 0.0]
+        entry[0][bisect.bisect_left(self._buckets[name], value)] += 1
+        entry[1] += value
+
+    def set_gauge(self, name: str, value, labels: Labels = ()):
+        """
+        Define el valor de un gauge.
+
+        Args:
+            value: Número, o función sin argumentos evaluada al recolectar
+        """
+        self._gauges[(name, labels)] = value
+
+    def collect(self) -> Dict[str, dict]:
+        """
+        Agrega todos los fragmentos.
+
+        Returns:
+            Diccionario con 'counters', 'histograms' y 'gauges' indexados por (nombre, labels)
+        """
+        total = _Shard()
+        with self._shards_lock:
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._merge_into(total, shard)
+
+        gauges = {}
+        for key, value in list(self._gauges.items()):
+            gauges[key] = value() if callable(value) else value
+
+        return {'counters': total.counters, 'histograms': total.histograms, 'gauges': gauges}
+
+    def quantile(self, name: str, q: float, labels: Labels = ()) -> float:
+        """
+        Estima un percentil de un histograma interpolando dentro del bucket.
+
+        Args:
+            name: Nombre del histograma
+            q: Cuantil entre 0 y 1 (p. ej. 0.99)
+            labels: Labels de la serie
+
+        Returns:
+            Valor estimado, o None si no hay observaciones
+        """
+        entry = self.collect()['histograms'].get((name, labels))
+        if entry is None:
+            return None
+
+        counts = entry[0]
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        buckets = self._buckets[name]
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                if index == len(buckets):
+                    # Bucket +Inf: el mejor estimado es el último límite
+                    return buckets[-1]
+                lower = buckets[index - 1] if index > 0 else 0.0
+                upper = buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return buckets[-1]
+
+    def snapshot(self) -> dict:
+        """Obtiene las métricas en un formato serializable a JSON."""
+        collected = self.collect()
+
+        def label_key(name, labels):
+            if not labels:
+                return name
+            return name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+        histograms = {}
+        for (name, labels), (counts, total) in collected['histograms'].items():
+            histograms[label_key(name, labels)] = {
+                'buckets': list(self._buckets[name]),
+                'counts': counts,
+                'count': sum(counts),
+                'sum': total
+            }
+
+        return {
+            'counters': {label_key(n, l): v for (n, l), v in collected['counters'].items()},
+            'gauges': {label_key(n, l): v for (n, l), v in collected['gauges'].items()},
+            'histograms': histograms
+        }
+
+    def render_prometheus(self) -> str:
+        """Genera las métricas en formato de texto de Prometheus (0.0.4)."""
+        collected = self.collect()
+
+        # Agrupar por nombre de métrica
+        families = {}
+        for kind in ('counters', 'gauges', 'histograms'):
+            for (name, labels), value in collected[kind].items():
+                families.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(families):
+            metric_type, help_text = self._descriptions.get(name, ('untyped', ''))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for labels, value in sorted(families[name], key=lambda item: item[0]):
+                if metric_type == 'histogram':
+                    counts, total = value
+                    cumulative = 0
+                    for limit, count in zip(self._buckets[name] + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(limit)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Labels) -> str:
+    """Formatea labels como {k="v",...} escapando los valores."""
+    if not labels:
+        return ''
+    formatted = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        formatted.append(f'{key}="{value}"')
+    return '{' + ','.join(formatted) + '}'
@@ -0,0 +1,189 @@
+"""
+Perfilador de spans activable en tiempo de ejecución.
+Registra la duración de handlers y esperas de locks en un buffer acotado y
+los exporta en formato Chrome trace-event (chrome://tracing, Perfetto).
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Optional
+
+
+class _NullSpan:
+    """Span vacío usado mientras el perfilador está desactivado."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span activo: mide desde __enter__ hasta __exit__."""
+
+    def __init__(self, profiler: 'SpanProfiler', name: str, category: str):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class ProfiledLock:
+    """
+    Envoltorio de un lock que registra el tiempo de espera para adquirirlo.
+
+    Mientras el perfilador está desactivado solo agrega una comprobación.
+    """
+
+    def __init__(self, lock, name: str, profiler: 'SpanProfiler'):
+        self.lock = lock
+        self.name = name
+        self.profiler = profiler
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self.profiler.enabled:
+            return self.lock.acquire(blocking, timeout)
+
+        start = time.perf_counter_ns()
+        acquired = self.lock.acquire(blocking, timeout)
+        self.profiler.record(f"wait {self.name}", 'lock', start, time.perf_counter_ns() - start)
+        return acquired
+
+    def release(self):
+        self.lock.release()
+
+    def locked(self) -> bool:
+        return self.lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class SpanProfiler:
+    """
+    Perfilador de spans con buffer en memoria acotado.
+
+    Los spans se guardan como tuplas compactas y se convierten a JSON solo al
+    exportar. Si el buffer se llena se descartan los más antiguos.
+    """
+
+    def __init__(self, process_name: str = 'lamport', max_spans: int = 100000, output_dir: str = 'profiles'):
+        """
+        Inicializa el perfilador (desactivado).
+
+        Args:
+            process_name: Nombre usado en el archivo y en la traza
+            max_spans: Cantidad máxima de spans retenidos en memoria
+            output_dir: Directorio donde se escriben las trazas
+        """
+        self.process_name = process_name
+        self.output_dir = output_dir
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)
+        self.started_at = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Activa el registro de spans, descartando los anteriores."""
+        with self.lock:
+            self.spans.clear()
+            self.started_at = time.time()
+            self.enabled = True
+
+    def stop(self) -> Optional[str]:
+        """
+        Desactiva el registro y exporta lo capturado.
+
+        Returns:
+            Ruta del archivo escrito, o None si no estaba activo
+        """
+        with self.lock:
+            if not self.enabled:
+                return None
+            self.enabled = False
+        return self.export_chrome_trace()
+
+    def toggle(self) -> Optional[str]:
+        """Alterna el estado; al desactivar devuelve la ruta exportada."""
+        if self.enabled:
+            return self.stop()
+        self.start()
+        return None
+
+    def span(self, name: str, category: str = 'handler'):
+        """Crea un span para usar con `with` (no hace nada si está desactivado)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category)
+
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int):
+        """Registra un span ya medido."""
+        self.spans.append((name, category, start_ns, duration_ns, threading.get_ident()))
+
+    def wrap_lock(self, lock, name: str) -> ProfiledLock:
+        """Envuelve un lock para medir sus tiempos de espera."""
+        return ProfiledLock(lock, name, self)
+
+    def export_chrome_trace(self, path: str = None) -> str:
+        """
+        Escribe los spans capturados en formato Chrome trace-event.
+
+        Args:
+            path: Archivo de destino (por defecto, uno nuevo en `output_dir`)
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        if path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.output_dir, f"{self.process_name}-{os.getpid()}-{stamp}.json")
+
+        spans = list(self.spans)
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        events = [{
+            'name': 'process_name', 'ph': 'M', 'pid': pid,
+            'args': {'name': self.process_name}
+        }]
+        for ident in sorted({span[4] for span in spans}):
+            events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident,
+                'args': {'name': thread_names.get(ident, f"thread-{ident}")}
+            })
+
+        for name, category, start_ns, duration_ns, ident in spans:
+            events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': start_ns / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': ident
+            })
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
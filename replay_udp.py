@@ -0,0 +1,352 @@
+"""
+Reproducción de capturas de tráfico UDP contra un servidor nuevo.
+
+Lee una captura .lcap (udp_capture.py, `UDPServer(capture_path=...)` o
+`CAPTURE_PATH=...` al iniciar udp_server.py) y reenvía sus datagramas al
+ritmo original, N veces más rápido o sin pausas. Cada dirección de origen
+de la captura se reproduce desde un socket propio, de modo que el servidor
+ve la misma cantidad de clientes y les responde por separado.
+
+Un cliente observador (registrado antes de empezar, sin enviar mensajes)
+recibe todos los broadcasts; ordenados por su delivery_seq dan el orden de
+entrega del servidor, que se verifica contra:
+
+- Los mensajes de la captura: faltantes, duplicados y desconocidos.
+- El orden de Lamport (timestamp, emisor): entregas fuera de orden.
+- Opcionalmente, el orden de otra corrida (`--expect run.json`): las
+  corridas guardan un resumen (digest) del orden de entrega.
+
+Uso:
+
+    CAPTURE_PATH=trafico.lcap python udp_server.py
+    python replay_udp.py trafico.lcap --speed 1 --output original.json
+    python replay_udp.py trafico.lcap --speed 0 --expect original.json
+"""
+
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import selectors
+import threading
+from typing import Dict, List, Optional
+from benchmark_udp import start_server, process_usage, latency_summary
+from udp_capture import read_capture
+
+# Consultas administrativas: no forman parte del tráfico del protocolo
+ADMIN_TYPES = ('metrics', 'profiler')
+
+# Buffer de recepción pedido para los sockets de la reproducción (el kernel lo limita a rmem_max)
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+class ReplayObserver:
+    """Recibe las respuestas de todos los sockets de la reproducción."""
+
+    def __init__(self, sockets: List[socket.socket], observer: socket.socket):
+        self.sockets = sockets
+        self.observer = observer
+        self.acks = 0
+        self.broadcasts = 0
+        self.deliveries: List[tuple] = []   # (delivery_seq, sender_id, original_timestamp)
+        self.registered = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self.receive_loop, daemon=True)
+
+    def receive_loop(self):
+        """Lee de todos los sockets hasta que se detenga la reproducción."""
+        selector = selectors.DefaultSelector()
+        for sock in self.sockets + [self.observer]:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+
+        while self.running:
+            for key, _ in selector.select(0.1):
+                sock = key.fileobj
+                while True:
+                    try:
+                        data = sock.recv(65536)
+                    except (BlockingIOError, OSError):
+                        break
+                    try:
+                        message = json.loads(data)
+                    except ValueError:
+                        continue
+                    self.handle(sock, message)
+        selector.close()
+
+    def handle(self, sock: socket.socket, message: dict):
+        """Cuenta una respuesta (y anota la entrega si llegó al observador)."""
+        msg_type = message.get('type')
+        if sock is self.observer:
+            if msg_type == 'register_response':
+                self.registered.set()
+            elif msg_type == 'broadcast':
+                self.deliveries.append((message.get('delivery_seq', 0), message.get('sender_id'),
+                                        message.get('original_timestamp')))
+        elif msg_type == 'message_ack':
+            self.acks += 1
+        elif msg_type == 'broadcast':
+            self.broadcasts += 1
+
+    def observer_lost(self) -> int:
+        """Broadcasts que el servidor envió al observador y no llegaron (huecos en delivery_seq)."""
+        return max((seq for seq, _, _ in self.deliveries), default=0) - len(self.deliveries)
+
+    def delivered_order(self) -> List[tuple]:
+        """Claves (emisor, timestamp) en el orden en que el servidor las entregó."""
+        return [(sender_id, timestamp) for _, sender_id, timestamp in sorted(self.deliveries)]
+
+
+def inspect_capture(datagrams) -> dict:
+    """
+    Decodifica la captura una vez para saber qué debe entregarse.
+
+    Returns:
+        'replayable' (datagramas a enviar), 'messages' (claves (emisor,
+        timestamp) en orden de llegada), 'max_client_id' y 'types'
+    """
+    replayable = []
+    messages = []
+    types: Dict[str, int] = {}
+    max_client_id = 0
+    for datagram in datagrams:
+        try:
+            data = json.loads(datagram.data)
+            msg_type = data.get('type')
+        except (ValueError, AttributeError):
+            data, msg_type = {}, None
+        if msg_type in ADMIN_TYPES:
+            continue
+        types[str(msg_type)] = types.get(str(msg_type), 0) + 1
+        replayable.append(datagram)
+
+        if msg_type == 'message':
+            messages.append((data.get('sender_id'), data.get('timestamp')))
+        for field in ('client_id', 'sender_id'):
+            if isinstance(data.get(field), int):
+                max_client_id = max(max_client_id, data[field])
+    return {'replayable': replayable, 'messages': messages, 'max_client_id': max_client_id, 'types': types}
+
+
+def order_digest(order: List[tuple]) -> str:
+    """Resumen SHA-256 de un orden de entrega."""
+    return hashlib.sha256(json.dumps(order).encode()).hexdigest()
+
+
+def lamport_inversions(order: List[tuple]) -> int:
+    """Entregas cuya clave de Lamport (timestamp, emisor) es menor que alguna anterior."""
+    inversions = 0
+    highest = None
+    for sender_id, timestamp in order:
+        key = (timestamp, sender_id)
+        if highest is not None and key < highest:
+            inversions += 1
+        else:
+            highest = key
+    return inversions
+
+
+def open_socket(host: str) -> socket.socket:
+    """Socket UDP con un buffer de recepción amplio para no perder respuestas en ráfagas."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+    sock.bind((host, 0))
+    return sock
+
+
+def replay(datagrams, host: str, port: int, speed: float = 1.0, grace: float = 3.0,
+           pid: Optional[int] = None) -> dict:
+    """
+    Reenvía la captura al servidor y verifica las entregas.
+
+    Args:
+        datagrams: Datagramas leídos con read_capture
+        host, port: Servidor de destino
+        speed: Factor de velocidad respecto de la captura (0 = sin pausas)
+        grace: Segundos sin nuevas entregas tras los que se deja de esperar
+        pid: Proceso del servidor, para medir su CPU (opcional)
+    """
+    capture = inspect_capture(datagrams)
+    replayable = capture['replayable']
+    address = (host, port)
+
+    # Un socket por origen de la captura y uno para el observador
+    used = sorted({datagram.source for datagram in replayable})
+    sockets = {source: open_socket(host) for source in used}
+    observer_socket = open_socket(host)
+    receiver = ReplayObserver(list(sockets.values()), observer_socket)
+    receiver.thread.start()
+
+    observer_id = capture['max_client_id'] + 1
+    register = json.dumps({'type': 'register', 'client_id': observer_id,
+                           'client_name': 'Observador-replay', 'timestamp': 1}).encode()
+    for _ in range(5):
+        observer_socket.sendto(register, address)
+        if receiver.registered.wait(1.0):
+            break
+    else:
+        raise RuntimeError(f"El servidor en {host}:{port} no respondió al registro del observador")
+
+    # Envío según el calendario de la captura
+    usage_start = process_usage(pid) if pid else None
+    lateness = []
+    send_dropped = 0
+    first = replayable[0].time_ns if replayable else 0
+    start = time.perf_counter()
+    next_heartbeat = start + 10
+    for datagram in replayable:
+        if speed > 0:
+            target = start + (datagram.time_ns - first) / 1e9 / speed
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lateness.append(-delay)
+        try:
+            sockets[datagram.source].sendto(datagram.data, address)
+        except BlockingIOError:
+            send_dropped += 1
+
+        if time.perf_counter() >= next_heartbeat:
+            observer_socket.sendto(json.dumps({'type': 'heartbeat', 'client_id': observer_id,
+                                               'timestamp': 1}).encode(), address)
+            next_heartbeat += 10
+    send_seconds = time.perf_counter() - start
+
+    # Esperar las entregas hasta completar o hasta `grace` segundos sin progreso
+    expected = len(capture['messages'])
+    delivered = -1
+    deadline = time.perf_counter() + grace
+    while len(receiver.deliveries) < expected and time.perf_counter() < deadline:
+        if len(receiver.deliveries) != delivered:
+            delivered = len(receiver.deliveries)
+            deadline = time.perf_counter() + grace
+        time.sleep(0.01)
+    total_seconds = time.perf_counter() - start
+    usage_end = process_usage(pid) if pid else None
+
+    receiver.running = False
+    receiver.thread.join(1.0)
+    for sock in list(sockets.values()) + [observer_socket]:
+        sock.close()
+
+    order = receiver.delivered_order()
+    expected_keys = set(capture['messages'])
+    delivered_keys = set(order)
+    server = None
+    if usage_start is not None and usage_end is not None:
+        server = {'cpu_seconds': usage_end['cpu_seconds'] - usage_start['cpu_seconds'],
+                  'rss_mb': usage_end['rss_mb'], 'peak_rss_mb': usage_end['peak_rss_mb']}
+
+    return {
+        'capture': {
+            'datagrams': len(datagrams),
+            'replayed': len(replayable),
+            'sources': len(used),
+            'seconds': (replayable[-1].time_ns - first) / 1e9 if replayable else 0.0,
+            'types': capture['types']
+        },
+        'config': {'speed': speed, 'grace': grace},
+        'throughput': {
+            'send_seconds': send_seconds,
+            'datagrams_per_second': len(replayable) / send_seconds if send_seconds > 0 else 0.0,
+            'delivered_per_second': len(order) / total_seconds if total_seconds > 0 else 0.0,
+            'send_dropped': send_dropped,
+            'acks': receiver.acks,
+            'broadcasts': receiver.broadcasts
+        },
+        'schedule_lateness': latency_summary(lateness),
+        'order': {
+            'expected': expected,
+            'delivered': len(order),
+            'missing': len(expected_keys - delivered_keys),
+            'duplicates': len(order) - len(delivered_keys),
+            'unknown': len(delivered_keys - expected_keys),
+            'observer_lost': receiver.observer_lost(),
+            'lamport_inversions': lamport_inversions(order),
+            'digest': order_digest(order)
+        },
+        'server': server
+    }
+
+
+def parse_args(argv=None):
+    """Procesa los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Reproduce una captura UDP contra un servidor nuevo")
+    parser.add_argument('capture', help="Archivo .lcap capturado por el servidor")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Factor de velocidad (1 = ritmo original, 10 = 10x, 0 = sin pausas)")
+    parser.add_argument('--mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help="Dónde corre el servidor nuevo")
+    parser.add_argument('--process-interval', type=float, default=0.5,
+                        help="process_interval del servidor nuevo")
+    parser.add_argument('--port', type=int, help="Usar un servidor ya iniciado en este puerto de localhost")
+    parser.add_argument('--grace', type=float, default=3.0, help="Segundos de espera sin nuevas entregas")
+    parser.add_argument('--expect', help="Resultado JSON de otra corrida cuyo orden de entrega debe coincidir")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args(argv)
+    if args.speed < 0:
+        parser.error("--speed no puede ser negativo")
+    return args
+
+
+def main(argv=None):
+    """Función principal."""
+    args = parse_args(argv)
+    datagrams, _ = read_capture(args.capture)
+
+    if args.port:
+        port, pid, stop = args.port, None, lambda: None
+    else:
+        port, pid, stop = start_server(args.mode, args.process_interval)
+    try:
+        results = replay(datagrams, 'localhost', port, args.speed, args.grace,
+                         pid if args.mode == 'subprocess' else None)
+    finally:
+        stop()
+
+    order = results['order']
+    complete = order['missing'] == 0 and order['duplicates'] == 0 and order['unknown'] == 0
+    if args.expect:
+        with open(args.expect) as f:
+            order['matches_expected'] = json.load(f)['order']['digest'] == order['digest']
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    ok = complete and order.get('matches_expected', True)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0 if ok else 1
+
+    capture, throughput, lateness = results['capture'], results['throughput'], results['schedule_lateness']
+    speed = "sin pausas" if args.speed == 0 else f"{args.speed:g}x"
+    print(f"🔁 Reproducción de {args.capture}: {capture['replayed']} datagramas de "
+          f"{capture['sources']} orígenes ({capture['seconds']:.1f} s capturados, {speed})")
+    print("=" * 64)
+    print(f"  Envío:      {throughput['send_seconds']:8.2f} s  "
+          f"({throughput['datagrams_per_second']:.0f} datagramas/s)")
+    print(f"  Entregas:   {order['delivered']:8d} de {order['expected']}  "
+          f"({throughput['delivered_per_second']:.0f} msg/s)")
+    if lateness['count']:
+        print(f"  Retraso del calendario: p50 {lateness['p50_ms']:.2f} ms, p99 {lateness['p99_ms']:.2f} ms")
+    print("-" * 64)
+    print(f"  Faltantes: {order['missing']} (perdidos hacia el observador: {order['observer_lost']})  "
+          f"duplicados: {order['duplicates']}  desconocidos: {order['unknown']}")
+    print(f"  Fuera de orden de Lamport: {order['lamport_inversions']}")
+    if 'matches_expected' in order:
+        print(f"  Orden igual al de {args.expect}: {'sí' if order['matches_expected'] else 'no'}")
+    print("=" * 64)
+    print("✅ Entregas verificadas" if ok else "❌ Las entregas no coinciden")
+    if args.output:
+        print(f"💾 Resultados en {args.output}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
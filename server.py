@@ -3,12 +3,17 @@ Servidor UNAP - Coordinador principal del sistema distribuido con relojes lógic
 """
 
 import os
+import json
 import time
+import queue
 import threading
 import random
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from lamport_clock import LamportClock
+from event_log import EventPipeline
+from metrics import MetricsRegistry
+from snapshot import SnapshotPublisher
 
 # Configuración del servidor
 app = Flask(__name__)
@@ -17,14 +22,38 @@ CORS(app)
 # Variables de entorno
 PROCESS_ID = int(os.getenv('PROCESS_ID', 0))
 PROCESS_NAME = os.getenv('PROCESS_NAME', 'UNAP-Server')
+CLOCK_STATE_PATH = os.getenv('CLOCK_STATE_PATH')
 
-# Inicializar reloj lógico de Lamport
-lamport_clock = LamportClock(PROCESS_ID, PROCESS_NAME)
+# Inicializar reloj lógico de Lamport (persistencia opcional de la marca de agua alta)
+lamport_clock = LamportClock(PROCESS_ID, PROCESS_NAME, persist_path=CLOCK_STATE_PATH)
 
 # Almacenar información de clientes conectados
+# Los registros no se modifican en el lugar: se reemplazan por copias, para
+# que las instantáneas publicadas puedan compartirlos sin copiarlos
 connected_clients = {}
 client_lock = threading.Lock()
 
+# Métricas del servidor
+metrics = MetricsRegistry()
+metrics.describe('lamport_http_requests_total', 'counter', 'Peticiones HTTP por endpoint y estado')
+metrics.describe('lamport_http_request_seconds', 'histogram', 'Latencia de peticiones HTTP por endpoint')
+metrics.describe('lamport_messages_received_total', 'counter', 'Mensajes de clientes recibidos')
+metrics.describe('lamport_batch_size', 'histogram', 'Mensajes por lote en /messages/batch',
+                 buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+metrics.describe('lamport_logical_time', 'gauge', 'Reloj lógico del servidor')
+metrics.describe('lamport_connected_clients', 'gauge', 'Clientes registrados')
+metrics.describe('lamport_sse_subscribers', 'gauge', 'Suscriptores del stream SSE')
+metrics.describe('lamport_events_logged', 'gauge', 'Eventos registrados desde el inicio')
+metrics.describe('lamport_events_dropped', 'gauge', 'Eventos descartados por la cola llena del escritor de logs')
+
+# Suscriptores del stream SSE: una cola acotada por suscriptor
+SSE_QUEUE_SIZE = 100
+SSE_KEEPALIVE_SECONDS = 15
+sse_subscribers = []
+sse_lock = threading.Lock()
+SSE_RESYNC = "event: resync\ndata: {}\n\n"
+sse_resync = set()  # Suscriptores que perdieron eventos y deben recargar el estado
+
 # Plantilla HTML para mostrar el estado del servidor
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -49,8 +78,66 @@ HTML_TEMPLATE = """
             location.reload();
         }
         
-        // Auto-refresh cada 2 segundos
-        setInterval(refreshPage, 2000);
+        function renderEvent(event) {
+            const div = document.createElement('div');
+            const strong = document.createElement('strong');
+            div.className = 'event';
+            strong.textContent = event.timestamp;
+            div.appendChild(strong);
+            div.appendChild(document.createTextNode(' - ' + event.description));
+            return div;
+        }
+        
+        function renderClient(client) {
+            const div = document.createElement('div');
+            const strong = document.createElement('strong');
+            div.className = 'event';
+            div.dataset.clientId = client.id;
+            strong.textContent = client.name;
+            div.appendChild(strong);
+            div.appendChild(document.createTextNode(' (ID: ' + client.id + ') - Reloj: ' + client.clock));
+            return div;
+        }
+        
+        function subscribe() {
+            const source = new EventSource('/events/stream');
+            
+            source.addEventListener('clock', function(e) {
+                document.getElementById('clock-time').textContent = JSON.parse(e.data).logical_time;
+            });
+            
+            source.addEventListener('client', function(e) {
+                const data = JSON.parse(e.data);
+                const list = document.getElementById('client-list');
+                const existing = list.querySelector('[data-client-id="' + data.client.id + '"]');
+                const element = renderClient(data.client);
+                if (existing) {
+                    list.replaceChild(element, existing);
+                } else {
+                    list.appendChild(element);
+                }
+                document.getElementById('client-count').textContent = data.client_count;
+            });
+            
+            source.addEventListener('log', function(e) {
+                const log = document.getElementById('event-log');
+                log.appendChild(renderEvent(JSON.parse(e.data)));
+                // Mantener solo los últimos 10 eventos
+                while (log.children.length > 10) {
+                    log.removeChild(log.firstElementChild);
+                }
+            });
+            
+            // El servidor descartó eventos para este suscriptor: recargar estado completo
+            source.addEventListener('resync', refreshPage);
+        }
+        
+        if (window.EventSource) {
+            window.addEventListener('load', subscribe);
+        } else {
+            // Sin soporte SSE: auto-refresh cada 2 segundos
+            setInterval(refreshPage, 2000);
+        }
     </script>
 </head>
 <body>
@@ -58,82 +145,307 @@ HTML_TEMPLATE = """
         <h1>🕐 Servidor UNAP - Algoritmo de Lamport</h1>
         
         <div class="clock-display">
-            Reloj Lógico: <span style="color: #e74c3c;">{{ clock_time }}</span>
+            Reloj Lógico: <span id="clock-time" style="color: #e74c3c;">{{ clock_time }}</span>
         </div>
         
         <div class="status">
             <h3>Estado del Servidor:</h3>
             <p><strong>ID del Proceso:</strong> {{ process_id }}</p>
             <p><strong>Nombre:</strong> {{ process_name }}</p>
-            <p><strong>Clientes Conectados:</strong> {{ client_count }}</p>
+            <p><strong>Clientes Conectados:</strong> <span id="client-count">{{ client_count }}</span></p>
         </div>
         
         <div class="client-list">
             <h3>Clientes Registrados:</h3>
+            <div id="client-list">
             {% for client in clients %}
-            <div class="event">
+            <div class="event" data-client-id="{{ client.id }}">
                 <strong>{{ client.name }}</strong> (ID: {{ client.id }}) - Reloj: {{ client.clock }}
             </div>
             {% endfor %}
+            </div>
         </div>
         
         <div class="event-log">
             <h3>Registro de Eventos:</h3>
+            <div id="event-log">
             {% for event in events %}
             <div class="event">
                 <strong>{{ event.timestamp }}</strong> - {{ event.description }}
             </div>
             {% endfor %}
+            </div>
         </div>
         
         <div class="auto-refresh">
             <button class="btn" onclick="refreshPage()">Actualizar Manualmente</button>
-            <span style="color: #6c757d; font-size: 12px;">(Auto-actualización cada 2 segundos)</span>
+            <span style="color: #6c757d; font-size: 12px;">(Actualización en tiempo real)</span>
         </div>
     </div>
 </body>
 </html>
 """
 
-# Lista para almacenar eventos
-events = []
-events_lock = threading.Lock()
-
-def add_event(description: str):
-    """Agrega un evento al registro."""
-    with events_lock:
-        events.append({
-            'timestamp': time.strftime('%H:%M:%S'),
-            'description': description
-        })
-        # Mantener solo los últimos 50 eventos
-        if len(events) > 50:
-            events.pop(0)
+# Gauges evaluados solo al recolectar
+metrics.set_gauge('lamport_logical_time', lambda: lamport_clock.logical_time)
+metrics.set_gauge('lamport_connected_clients', lambda: len(connected_clients))
+metrics.set_gauge('lamport_sse_subscribers', lambda: len(sse_subscribers))
+
+# Plantilla compilada una sola vez (evita la búsqueda y caché de Jinja por request)
+index_template = app.jinja_env.from_string(HTML_TEMPLATE)
+
+# Última página renderizada: (versión del estado, cuerpo en bytes)
+index_cache = {'entry': None}
+
+# Registro de eventos: buffer circular con cursores por secuencia y tiempo lógico
+EVENT_LOG_CAPACITY = 1000
+EVENTS_PAGE_MAX = 500
+EVENT_LOG_PATH = os.getenv('EVENT_LOG_PATH')
+event_log = EventPipeline(PROCESS_ID, PROCESS_NAME, lamport_clock, log_path=EVENT_LOG_PATH,
+                          recent_capacity=EVENT_LOG_CAPACITY)
+events = event_log.ring
+
+# Instantánea del estado visible (reloj, clientes, eventos) leída sin locks
+status = SnapshotPublisher(lamport_clock, events)
+metrics.set_gauge('lamport_events_logged', lambda: events.next_seq)
+metrics.set_gauge('lamport_events_dropped', lambda: event_log.dropped)
+
+@app.before_request
+def start_request_timer():
+    """Marca el inicio de la petición para medir su latencia."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Registra latencia y estado de cada petición."""
+    endpoint = request.endpoint or 'unknown'
+    metrics.observe('lamport_http_request_seconds', time.perf_counter() - g.request_start,
+                    (('endpoint', endpoint),))
+    metrics.inc('lamport_http_requests_total',
+                (('endpoint', endpoint), ('status', str(response.status_code))))
+    return response
+
+def publish(event_type: str, data: dict):
+    """
+    Publica un evento a todos los suscriptores SSE.
+    
+    Cada suscriptor tiene una cola acotada: si se llena (cliente lento), se
+    vacía y se le envía un evento 'resync' para que recargue el estado
+    completo, sin bloquear al resto de suscriptores.
+    
+    Con varios publicadores a la vez otro puede volver a llenar la cola antes
+    de encolar el 'resync': por eso el suscriptor queda además marcado en
+    `sse_resync`, y su stream envía el 'resync' antes del próximo evento.
+    """
+    payload = f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+    
+    with sse_lock:
+        subscribers = list(sse_subscribers)
+    
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(payload)
+        except queue.Full:
+            with sse_lock:
+                sse_resync.add(subscriber)
+            try:
+                while True:
+                    subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(SSE_RESYNC)  # Despierta al stream
+            except queue.Full:
+                pass
+
+def publish_client(client_id):
+    """Publica el estado actual de un cliente registrado."""
+    with client_lock:
+        client = dict(connected_clients[client_id])
+        client_count = len(connected_clients)
+    publish('client', {'client': client, 'client_count': client_count})
+
+def publish_clients():
+    """Publica el conjunto de clientes en la instantánea (llamar con `client_lock` tomado)."""
+    status.publish(clients=tuple(connected_clients.values()))
+
+def add_event(description: str, event_type: str = 'event'):
+    """Agrega un evento de texto libre al registro."""
+    add_events(event_type, description, [()])
+
+def add_events(event_type: str, fmt: str, args_list: list, lamports: list = None):
+    """
+    Agrega varios eventos del mismo tipo al registro con una sola toma del lock.
+    
+    La descripción se formatea en diferido: solo al leerla desde la API, la
+    página o un suscriptor SSE.
+    
+    Args:
+        event_type: Tipo de evento (p. ej. 'message_received')
+        fmt: Plantilla str.format de la descripción
+        args_list: Argumentos de la plantilla para cada evento
+        lamports: Tiempo lógico de cada evento (por defecto, el reloj actual)
+    """
+    seqs = event_log.emit_many(event_type, fmt, args_list, lamports=lamports)
+    status.publish()
+    
+    if not sse_subscribers or not seqs:
+        return
+    publish('clock', {'logical_time': lamport_clock.get_time()})
+    for entry in events.after(seqs[0] - 1, len(seqs)):
+        publish('log', event_to_dict(entry))
+
+def event_to_dict(entry) -> dict:
+    """Convierte una entrada del registro al formato JSON de la API."""
+    record = entry.item
+    return {
+        'timestamp': record.clock_time(),
+        'description': record.text(),
+        'type': record.event_type,
+        'seq': entry.seq,
+        'lamport': entry.lamport
+    }
 
 def perform_internal_events():
     """Realiza eventos internos periódicamente."""
     while True:
         time.sleep(random.randint(3, 8))  # Evento cada 3-8 segundos
         new_time = lamport_clock.increment()
-        add_event(f"Evento interno - Nuevo reloj: {new_time}")
+        add_events('internal_event', "Evento interno - Nuevo reloj: {}", [(new_time,)], lamports=[new_time])
 
-@app.route('/')
-def index():
-    """Página principal del servidor."""
-    with client_lock:
-        clients = list(connected_clients.values())
+def state_version(snapshot) -> tuple:
+    """
+    Versión del estado visible en la página principal.
     
-    with events_lock:
-        recent_events = events[-10:]  # Últimos 10 eventos
+    Returns:
+        Tupla (reloj lógico, época de la instantánea)
+    """
+    return (snapshot.logical_time, snapshot.epoch)
+
+def render_index(snapshot) -> bytes:
+    """Renderiza la página principal a partir de una instantánea publicada."""
+    clients = snapshot.clients
+    recent_events = [event_to_dict(entry) for entry in status.recent_events(snapshot, 10)]  # Últimos 10 eventos
     
-    return render_template_string(HTML_TEMPLATE,
-        clock_time=lamport_clock.get_time(),
+    return index_template.render(
+        clock_time=snapshot.logical_time,
         process_id=PROCESS_ID,
         process_name=PROCESS_NAME,
-        client_count=len(connected_clients),
+        client_count=len(clients),
         clients=clients,
         events=recent_events
-    )
+    ).encode()
+
+@app.route('/')
+def index():
+    """Página principal del servidor (sin tomar locks del camino de datos)."""
+    snapshot = status.current
+    version = state_version(snapshot)
+    etag = '-'.join(str(part) for part in version)
+    
+    # Petición condicional: el navegador ya tiene esta versión
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    # Reutilizar la página si el estado no cambió desde el último render
+    entry = index_cache['entry']
+    if entry is not None and entry[0] == version:
+        body = entry[1]
+    else:
+        body = render_index(snapshot)
+        index_cache['entry'] = (version, body)
+    
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/events')
+def list_events():
+    """
+    Obtiene eventos del registro de forma incremental.
+    
+    Parámetros:
+        after: Última secuencia ya leída (cursor); sin él se empieza por el más antiguo
+        after_lamport: Alternativa a `after`, eventos con tiempo lógico mayor
+        limit: Cantidad máxima de eventos a devolver
+    """
+    after = request.args.get('after', type=int)
+    after_lamport = request.args.get('after_lamport', type=int)
+    limit = max(0, min(request.args.get('limit', 100, type=int), EVENTS_PAGE_MAX))
+    
+    if after_lamport is not None:
+        entries = events.after_lamport(after_lamport, limit)
+    else:
+        entries = events.after(-1 if after is None else after, limit)
+    
+    if entries:
+        next_cursor = entries[-1].seq
+    elif after_lamport is not None:
+        next_cursor = events.next_seq - 1  # Ningún evento retenido supera ese tiempo lógico
+    else:
+        next_cursor = -1 if after is None else after
+    
+    return jsonify({
+        'events': [event_to_dict(entry) for entry in entries],
+        'next_cursor': next_cursor,
+        'first_available': events.first_seq,
+        'has_more': next_cursor < events.next_seq - 1,
+        # El cursor quedó fuera del buffer: se perdieron eventos intermedios
+        'truncated': after is not None and after + 1 < events.first_seq
+    })
+
+@app.route('/clients')
+def list_clients():
+    """Obtiene la lista de clientes registrados, paginada con offset y limit."""
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = max(0, min(request.args.get('limit', 100, type=int), EVENTS_PAGE_MAX))
+    
+    snapshot_clients = status.current.clients
+    total = len(snapshot_clients)
+    clients = [dict(client) for client in snapshot_clients[offset:offset + limit]]
+    
+    return jsonify({
+        'clients': clients,
+        'total': total,
+        'offset': offset,
+        'limit': limit
+    })
+
+@app.route('/events/stream')
+def events_stream():
+    """Stream SSE con cambios de reloj, registros de clientes y nuevos eventos."""
+    subscriber = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+    with sse_lock:
+        sse_subscribers.append(subscriber)
+    
+    def stream():
+        try:
+            # Estado inicial del reloj para sincronizar la página
+            yield f"event: clock\ndata: {json.dumps({'logical_time': lamport_clock.get_time()})}\n\n"
+            while True:
+                try:
+                    payload = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Comentario SSE para mantener viva la conexión
+                    yield ": keepalive\n\n"
+                    continue
+                with sse_lock:
+                    resync = subscriber in sse_resync
+                    sse_resync.discard(subscriber)
+                if resync:
+                    yield SSE_RESYNC
+                elif payload != SSE_RESYNC:  # El aviso de un 'resync' ya enviado
+                    yield payload
+        finally:
+            with sse_lock:
+                sse_subscribers.remove(subscriber)
+                sse_resync.discard(subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/register', methods=['POST'])
 def register_client():
@@ -149,10 +461,13 @@ def register_client():
             'name': client_name,
             'clock': client_clock
         }
+        publish_clients()
     
     # Actualizar reloj al recibir registro
     new_time = lamport_clock.receive_event(client_clock)
-    add_event(f"Cliente {client_name} registrado - Reloj actualizado: {new_time}")
+    add_events('client_registered', "Cliente {} registrado - Reloj actualizado: {}",
+               [(client_name, new_time)], lamports=[new_time])
+    publish_client(client_id)
     
     return jsonify({
         'status': 'success',
@@ -171,13 +486,18 @@ def receive_message():
     
     # Actualizar reloj según algoritmo de Lamport
     new_time = lamport_clock.receive_event(sender_clock)
+    metrics.inc('lamport_messages_received_total')
     
     # Actualizar información del cliente
     with client_lock:
         if sender_id in connected_clients:
-            connected_clients[sender_id]['clock'] = sender_clock
+            connected_clients[sender_id] = dict(connected_clients[sender_id], clock=sender_clock)
+            publish_clients()
     
-    add_event(f"Mensaje de {sender_name}: '{message}' - Reloj actualizado: {new_time}")
+    add_events('message_received', "Mensaje de {}: '{}' - Reloj actualizado: {}",
+               [(sender_name, message, new_time)], lamports=[new_time])
+    if sender_id in connected_clients:
+        publish_client(sender_id)
     
     return jsonify({
         'status': 'success',
@@ -185,6 +505,64 @@ def receive_message():
         'server_clock': new_time
     })
 
+@app.route('/messages/batch', methods=['POST'])
+def receive_message_batch():
+    """
+    Recibe un lote de mensajes de uno o varios clientes.
+    
+    Acepta {"messages": [...]} o directamente una lista, con los mismos campos
+    que /message. El reloj se actualiza una sola vez para todo el lote y se
+    devuelve el reloj del servidor asignado a cada mensaje.
+    """
+    data = request.get_json()
+    messages = data.get('messages') if isinstance(data, dict) else data
+    
+    if not isinstance(messages, list) or not all(
+            isinstance(m, dict) and isinstance(m.get('logical_time'), int)
+            and not isinstance(m.get('logical_time'), bool) for m in messages):
+        return jsonify({
+            'status': 'error',
+            'message': 'Se esperaba una lista de mensajes con logical_time'
+        }), 400
+    
+    # Actualizar reloj según algoritmo de Lamport, una vez por lote
+    server_clocks = lamport_clock.receive_events([m['logical_time'] for m in messages])
+    metrics.inc('lamport_messages_received_total', amount=len(messages))
+    metrics.observe('lamport_batch_size', len(messages))
+    
+    # Último reloj de cada emisor dentro del lote
+    sender_clocks = {}
+    for m in messages:
+        sender_clocks[m.get('sender_id')] = m['logical_time']
+    
+    # Actualizar información de los clientes, una vez por emisor
+    updated = []
+    with client_lock:
+        for sender_id, sender_clock in sender_clocks.items():
+            if sender_id in connected_clients:
+                connected_clients[sender_id] = dict(connected_clients[sender_id], clock=sender_clock)
+                updated.append(sender_id)
+        if updated:
+            publish_clients()
+    
+    add_events('message_received', "Mensaje de {}: '{}' - Reloj actualizado: {}",
+               [(m.get('sender_name'), m.get('message'), new_time)
+                for m, new_time in zip(messages, server_clocks)], lamports=server_clocks)
+    for sender_id in updated:
+        publish_client(sender_id)
+    
+    return jsonify({
+        'status': 'success',
+        'message': f'{len(messages)} mensajes recibidos',
+        'server_clock': server_clocks[-1] if server_clocks else lamport_clock.get_time(),
+        'server_clocks': server_clocks
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    """Métricas del servidor en formato de texto de Prometheus."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/status')
 def get_status():
     """Obtiene el estado actual del servidor."""
@@ -199,7 +577,8 @@ def broadcast_message():
     # Incrementar reloj antes de enviar
     new_time = lamport_clock.send_event()
     
-    add_event(f"Broadcast enviado: '{message}' - Reloj: {new_time}")
+    add_events('broadcast_sent', "Broadcast enviado: '{}' - Reloj: {}", [(message, new_time)],
+               lamports=[new_time])
     
     return jsonify({
         'status': 'success',
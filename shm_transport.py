@@ -0,0 +1,434 @@
+"""
+Transporte por memoria compartida para clientes en la misma máquina que el servidor.
+
+Cada cliente crea un segmento de multiprocessing.shared_memory con dos
+buffers circulares de un solo productor y un solo consumidor (SPSC): uno
+hacia el servidor y otro de vuelta. Los hilos de cada lado que escriben en
+el mismo buffer se serializan con un lock del proceso, así que en la
+práctica cada buffer admite varios productores de un mismo proceso (MPSC).
+
+- Los registros son [longitud uint32][datos] alineados a 8 bytes; un
+  registro que no cabe al final del buffer se escribe desde el principio.
+- Las posiciones de lectura y escritura son contadores de 64 bits que solo
+  escribe su dueño, en palabras alineadas y líneas de caché distintas.
+- Despertares estilo futex: el consumidor que encuentra el buffer vacío
+  duerme en FUTEX_WAIT sobre un contador que el productor incrementa y
+  despierta con FUTEX_WAKE solo si hay alguien esperando. Sin futex (fuera
+  de Linux) se sondea con pausas cortas. La espera tiene siempre un
+  límite, que también acota un despertar perdido.
+- Orden de memoria: las posiciones se publican con escrituras comunes
+  (Python no expone barreras ni operaciones atómicas). Esto es correcto solo
+  donde el procesador hace visibles las escrituras en el orden del programa
+  y no adelanta lecturas a otras lecturas (x86 y x86_64, modelo TSO). En
+  otras arquitecturas (ARM, POWER) el productor podría publicar tail antes
+  que los datos, así que el transporte no está disponible allí
+  (`ORDERED_MEMORY`) y los clientes locales deben usar 'unix'.
+
+El contenido sigue siendo el JSON del protocolo: ShmSocket imita un socket
+UDP (sendto/recvfrom/settimeout/close), de modo que LamportClient funciona
+sin cambios con `transport='shm'`. Se evitan las dos pasadas por el kernel
+por mensaje; el límite de 1024 bytes por datagrama sigue rigiendo para lo
+que el servidor retransmite a los clientes UDP.
+
+Conexión: el primer `sendto` envía por UDP un datagrama 'shm_attach' con
+el nombre del segmento; el servidor (solo desde localhost) se adjunta al
+segmento y desde ahí todo el tráfico de ese cliente va por memoria.
+"""
+
+import os
+import json
+import time
+import uuid
+import ctypes
+import socket
+import struct
+import platform
+import threading
+from multiprocessing import shared_memory, resource_tracker
+from typing import Optional
+
+MAGIC = b'LAMSHM01'
+SEGMENT_PREFIX = 'lamport-'
+
+# Cabecera del segmento: magic, capacidad de cada buffer, cliente cerrado, servidor cerrado
+SEGMENT_HEADER = struct.Struct('<8sQII')
+SEGMENT_HEADER_SIZE = 64
+CLIENT_CLOSED_OFFSET = 16
+SERVER_CLOSED_OFFSET = 20
+
+# Control de cada buffer (palabras de 8 bytes): head en [0], tail en [8]; contadores de 4 bytes
+# para el futex: seq en [32] y waiting en [33] (índices de la vista uint32)
+CONTROL_SIZE = 256
+HEAD, TAIL = 0, 8
+SEQ, WAITING = 32, 33
+SEQ_OFFSET = SEQ * 4
+
+RECORD_HEADER = 4
+WRAP = 0xFFFFFFFF
+
+# Espera máxima en el futex antes de volver a mirar el buffer (acota un despertar perdido)
+MAX_FUTEX_WAIT = 0.05
+
+# Pausa entre sondeos cuando no hay futex
+POLL_INTERVAL = 0.0002
+
+# Segmentos creados por este proceso (los registra su propio resource_tracker)
+_created = set()
+
+# Arquitecturas con orden total de escrituras (TSO), donde head/tail no necesitan barreras
+ORDERED_MACHINES = ('x86_64', 'amd64', 'i386', 'i686')
+ORDERED_MEMORY = platform.machine().lower() in ORDERED_MACHINES
+
+
+def check_supported():
+    """
+    Verifica que esta arquitectura publique head/tail en orden.
+
+    Raises:
+        OSError: Si el procesador puede reordenar las escrituras (ver el docstring del módulo)
+    """
+    if not ORDERED_MEMORY:
+        raise OSError(f"Memoria compartida no disponible en {platform.machine()}: "
+                      "el procesador puede reordenar las escrituras (usar transporte 'unix')")
+
+
+def record_size(length: int) -> int:
+    """Espacio que ocupa un registro de `length` bytes."""
+    return (RECORD_HEADER + length + 7) & ~7
+
+
+class Futex:
+    """FUTEX_WAIT / FUTEX_WAKE sobre una palabra de memoria compartida (Linux, vía ctypes)."""
+
+    SYSCALLS = {'x86_64': 202}
+    WAIT, WAKE = 0, 1
+
+    class Timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _number = SYSCALLS.get(os.uname().machine)
+    except (OSError, AttributeError):
+        _libc, _number = None, None
+    available = _libc is not None and _number is not None
+
+    def __init__(self, buffer, offset: int):
+        # La palabra debe estar alineada a 4 bytes; el objeto ctypes retiene el buffer
+        self.word = ctypes.c_uint32.from_buffer(buffer, offset)
+        self.address = ctypes.addressof(self.word)
+
+    def wait(self, expected: int, timeout: float):
+        """Duerme mientras la palabra valga `expected` (como máximo `timeout` segundos)."""
+        seconds = int(timeout)
+        spec = Futex.Timespec(seconds, int((timeout - seconds) * 1e9))
+        Futex._libc.syscall(Futex._number, ctypes.c_void_p(self.address), Futex.WAIT,
+                            ctypes.c_uint32(expected), ctypes.byref(spec), None, 0)
+
+    def wake(self):
+        """Despierta a los hilos o procesos dormidos en la palabra."""
+        Futex._libc.syscall(Futex._number, ctypes.c_void_p(self.address), Futex.WAKE,
+                            ctypes.c_int(2 ** 31 - 1), None, None, 0)
+
+    def release(self):
+        """Suelta la referencia al buffer (necesario antes de cerrar el segmento)."""
+        self.word = None
+
+
+class ShmRing:
+    """Buffer circular SPSC de registros de longitud variable sobre memoria compartida."""
+
+    def __init__(self, buffer: memoryview, offset: int, capacity: int):
+        """
+        Args:
+            buffer: Memoria del segmento
+            offset: Inicio del bloque de control del buffer
+            capacity: Bytes de datos (múltiplo de 8)
+        """
+        self.capacity = capacity
+        self.max_record = capacity // 4
+        self.control = buffer[offset:offset + CONTROL_SIZE]
+        self.counters = self.control.cast('Q')
+        self.words = self.control.cast('I')
+        self.data = buffer[offset + CONTROL_SIZE:offset + CONTROL_SIZE + capacity]
+        self.futex = Futex(buffer, offset + SEQ_OFFSET) if Futex.available else None
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        """Bytes que ocupa en el segmento un buffer de `capacity` bytes de datos."""
+        return CONTROL_SIZE + capacity
+
+    def write(self, payload: bytes) -> bool:
+        """
+        Escribe un registro (solo el productor).
+
+        Returns:
+            False si no hay espacio
+        """
+        length = len(payload)
+        if length > self.max_record:
+            raise ValueError(f"Registro de {length} bytes mayor que el máximo de {self.max_record}")
+
+        counters, capacity = self.counters, self.capacity
+        tail = counters[TAIL]
+        position = tail % capacity
+        needed = record_size(length)
+        skip = capacity - position if capacity - position < needed else 0
+        if tail + skip + needed - counters[HEAD] > capacity:
+            return False
+
+        if skip:
+            # No cabe al final: marcar el resto como salto y empezar desde el principio
+            struct.pack_into('<I', self.data, position, WRAP)
+            position = 0
+        self.data[position + RECORD_HEADER:position + RECORD_HEADER + length] = payload
+        struct.pack_into('<I', self.data, position, length)
+
+        # Publicar después de escribir los datos (en orden solo con ORDERED_MEMORY)
+        counters[TAIL] = tail + skip + needed
+        words = self.words
+        words[SEQ] = (words[SEQ] + 1) & 0xFFFFFFFF
+        if words[WAITING] and self.futex is not None:
+            self.futex.wake()
+        return True
+
+    def read(self) -> Optional[bytes]:
+        """Lee el próximo registro (solo el consumidor); None si el buffer está vacío."""
+        counters, capacity = self.counters, self.capacity
+        head = counters[HEAD]
+        while head != counters[TAIL]:
+            position = head % capacity
+            (length,) = struct.unpack_from('<I', self.data, position)
+            if length == WRAP:
+                head += capacity - position
+                counters[HEAD] = head
+                continue
+            payload = bytes(self.data[position + RECORD_HEADER:position + RECORD_HEADER + length])
+            counters[HEAD] = head + record_size(length)
+            return payload
+        return None
+
+    def wait(self, timeout: float, cancelled=None) -> Optional[bytes]:
+        """
+        Lee el próximo registro esperando a lo sumo `timeout` segundos.
+
+        Args:
+            timeout: Espera máxima
+            cancelled: Función opcional que corta la espera cuando devuelve True
+        """
+        deadline = time.monotonic() + timeout
+        words = self.words
+        while True:
+            seq = words[SEQ]
+            payload = self.read()
+            if payload is not None:
+                return payload
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancelled is not None and cancelled()):
+                return None
+            if self.futex is None:
+                time.sleep(min(POLL_INTERVAL, remaining))
+                continue
+            words[WAITING] = 1
+            if self.counters[HEAD] == self.counters[TAIL]:
+                self.futex.wait(seq, min(remaining, MAX_FUTEX_WAIT))
+            words[WAITING] = 0
+
+    def release(self):
+        """Suelta las vistas sobre el segmento."""
+        if self.futex is not None:
+            self.futex.release()
+        for view in (self.counters, self.words, self.control, self.data):
+            view.release()
+
+
+class ShmChannel:
+    """Un extremo de un segmento: envía por un buffer y recibe por el otro."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, is_client: bool):
+        magic, capacity, _, _ = SEGMENT_HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"El segmento {shm.name} no es un canal de Lamport")
+        self.shm = shm
+        self.capacity = capacity
+        upstream = ShmRing(shm.buf, SEGMENT_HEADER_SIZE, capacity)
+        downstream = ShmRing(shm.buf, SEGMENT_HEADER_SIZE + ShmRing.size(capacity), capacity)
+        self.outgoing, self.incoming = (upstream, downstream) if is_client else (downstream, upstream)
+        self.own_closed = CLIENT_CLOSED_OFFSET if is_client else SERVER_CLOSED_OFFSET
+        self.peer_closed_offset = SERVER_CLOSED_OFFSET if is_client else CLIENT_CLOSED_OFFSET
+        self.send_lock = threading.Lock()
+        self.recv_lock = threading.Lock()
+        self.closed = False
+
+    @staticmethod
+    def segment_size(capacity: int) -> int:
+        return SEGMENT_HEADER_SIZE + 2 * ShmRing.size(capacity)
+
+    @property
+    def peer_closed(self) -> bool:
+        """El otro extremo cerró el canal."""
+        return struct.unpack_from('<I', self.shm.buf, self.peer_closed_offset)[0] == 1
+
+    def send(self, payload: bytes, timeout: float = 0.0) -> bool:
+        """
+        Envía un registro; si el buffer está lleno espera espacio hasta `timeout` segundos.
+
+        Returns:
+            False si no hubo espacio (el registro se descarta, como un datagrama perdido)
+        """
+        deadline = time.monotonic() + timeout
+        with self.send_lock:
+            while not self.outgoing.write(payload):
+                if self.closed or time.monotonic() >= deadline:
+                    return False
+                time.sleep(POLL_INTERVAL)
+        return True
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Recibe el próximo registro (None si no llega nada en `timeout` segundos o se cerró)."""
+        with self.recv_lock:
+            if self.closed:
+                return None
+            return self.incoming.wait(timeout, lambda: self.closed)
+
+    def close(self):
+        """Marca el extremo como cerrado y libera el segmento."""
+        if self.closed:
+            return
+        self.closed = True
+        struct.pack_into('<I', self.shm.buf, self.own_closed, 1)
+        # Despertar al par y a un hilo propio que esté esperando en recv
+        for ring in (self.outgoing, self.incoming):
+            if ring.futex is not None:
+                ring.futex.wake()
+        with self.send_lock, self.recv_lock:
+            for ring in (self.outgoing, self.incoming):
+                ring.release()
+        self.shm.close()
+
+
+def create_channel(capacity: int = 1 << 20) -> ShmChannel:
+    """
+    Crea un segmento nuevo y devuelve su extremo de cliente.
+
+    Raises:
+        OSError: Si la arquitectura no garantiza el orden que necesitan los buffers
+    """
+    check_supported()
+    capacity = (capacity + 7) & ~7
+    shm = shared_memory.SharedMemory(name=f"{SEGMENT_PREFIX}{uuid.uuid4().hex[:16]}", create=True,
+                                     size=ShmChannel.segment_size(capacity))
+    SEGMENT_HEADER.pack_into(shm.buf, 0, MAGIC, capacity, 0, 0)
+    _created.add(shm.name)
+    return ShmChannel(shm, is_client=True)
+
+
+def attach_channel(name: str) -> ShmChannel:
+    """
+    Se adjunta a un segmento creado por un cliente y devuelve el extremo del servidor.
+
+    Raises:
+        ValueError: Si el nombre o el contenido no corresponden a un canal de Lamport
+        OSError: Si la arquitectura no garantiza el orden que necesitan los buffers
+    """
+    check_supported()
+    if not name.startswith(SEGMENT_PREFIX) or '/' in name:
+        raise ValueError(f"Nombre de segmento inválido: {name}")
+    shm = shared_memory.SharedMemory(name=name)
+    # El segmento es del cliente: que el resource_tracker de este proceso no lo borre al salir
+    # (salvo que cliente y servidor compartan proceso y por lo tanto tracker)
+    if name not in _created:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    try:
+        return ShmChannel(shm, is_client=False)
+    except ValueError:
+        shm.close()
+        raise
+
+
+class ShmSocket:
+    """
+    Extremo de cliente con la interfaz de socket que usa LamportClient.
+
+    `sendto` ignora la dirección (siempre va al servidor del segmento) y
+    `recvfrom` no trunca los mensajes al tamaño pedido.
+    """
+
+    def __init__(self, server_host: str = 'localhost', server_port: int = 5000,
+                 capacity: int = 1 << 20, send_timeout: float = 1.0):
+        """
+        Crea el segmento; el servidor se adjunta con el primer envío.
+
+        Args:
+            server_host, server_port: Servidor UDP al que se pide adjuntarse
+            capacity: Bytes de cada buffer
+            send_timeout: Espera máxima de espacio en el buffer al enviar
+        """
+        self.server = (server_host, server_port)
+        self.channel = create_channel(capacity)
+        self.name = self.channel.shm.name
+        self.send_timeout = send_timeout
+        self.timeout: Optional[float] = None
+        self.attached = False
+        self.attach_lock = threading.Lock()
+
+    def attach(self, timeout: float = 2.0):
+        """
+        Pide al servidor (por UDP) que se adjunte al segmento.
+
+        Raises:
+            ConnectionError: Si el servidor no acepta
+        """
+        request = json.dumps({'type': 'shm_attach', 'segment': self.name}).encode()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as control:
+            control.settimeout(timeout)
+            try:
+                control.sendto(request, self.server)
+                response = json.loads(control.recvfrom(1024)[0])
+            except (socket.timeout, OSError, ValueError) as e:
+                raise ConnectionError(f"El servidor no respondió al pedido de memoria compartida: {e}")
+        if response.get('status') != 'success':
+            raise ConnectionError(f"Memoria compartida rechazada: {response.get('message')}")
+        self.attached = True
+
+    def sendto(self, data: bytes, address=None) -> int:
+        """Envía un mensaje al servidor (adjuntándose en el primer envío)."""
+        if not self.attached:
+            with self.attach_lock:
+                if not self.attached:
+                    self.attach()
+        if self.channel.peer_closed:
+            raise ConnectionError("El servidor cerró la memoria compartida")
+        if not self.channel.send(data, self.send_timeout):
+            raise BlockingIOError("Buffer hacia el servidor lleno")
+        return len(data)
+
+    def recvfrom(self, bufsize: int = 0) -> tuple:
+        """Recibe el próximo mensaje del servidor respetando el timeout del socket."""
+        payload = self.channel.recv(1e9 if self.timeout is None else self.timeout)
+        if payload is None:
+            if self.channel.closed:
+                raise OSError("Canal de memoria compartida cerrado")
+            raise socket.timeout("timed out")
+        return payload, self.server
+
+    def settimeout(self, timeout: Optional[float]):
+        self.timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self.timeout
+
+    def getsockname(self) -> tuple:
+        return (f"shm:{self.name}", 0)
+
+    def close(self):
+        """Cierra el canal y borra el segmento."""
+        if self.channel.closed:
+            return
+        shm = self.channel.shm
+        self.channel.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        _created.discard(self.name)
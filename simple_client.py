@@ -2,219 +2,29 @@
 Cliente UDP simple para probar el sistema de Lamport sin interfaz gráfica.
 """
 
-import socket
-import threading
-import json
 import time
-import random
-from lamport_clock import LamportClock
+from lamport_client import LamportClient
 
-class SimpleUDPClient:
-    """Cliente UDP simple para pruebas."""
+class SimpleUDPClient(LamportClient):
+    """Cliente UDP simple para pruebas (interfaz de consola sobre LamportClient)."""
     
-    def __init__(self, client_id: int, client_name: str, server_host='localhost', server_port=5000):
-        self.client_id = client_id
-        self.client_name = client_name
-        self.server_host = server_host
-        self.server_port = server_port
-        
-        # Socket UDP
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.settimeout(5.0)
-        
-        # Reloj lógico de Lamport
-        self.lamport_clock = LamportClock(client_id, client_name)
-        
-        # Estado
-        self.connected = False
-        self.running = False
-        self.message_counter = 0
-        
     def log(self, message):
         """Imprime un mensaje con timestamp."""
         timestamp = time.strftime('%H:%M:%S')
         print(f"[{timestamp}] [{self.client_name}] {message}")
     
-    def connect_to_server(self):
-        """Conecta al servidor UDP."""
-        try:
-            self.log("Intentando conectar al servidor...")
-            
-            # Enviar registro
-            timestamp = self.lamport_clock.send_event()
-            register_data = {
-                'type': 'register',
-                'client_id': self.client_id,
-                'client_name': self.client_name,
-                'timestamp': timestamp
-            }
-            
-            message = json.dumps(register_data).encode()
-            self.socket.sendto(message, (self.server_host, self.server_port))
-            self.log(f"Registro enviado con timestamp: {timestamp}")
-            
-            # Esperar respuesta
-            try:
-                data, _ = self.socket.recvfrom(1024)
-                response = json.loads(data.decode())
-                
-                if response.get('type') == 'register_response' and response.get('status') == 'success':
-                    self.connected = True
-                    self.running = True
-                    
-                    # Actualizar reloj con respuesta del servidor
-                    server_timestamp = response.get('server_timestamp', 0)
-                    new_time = self.lamport_clock.receive_event(server_timestamp)
-                    
-                    self.log(f"✅ Conectado al servidor - Reloj actualizado: {new_time}")
-                    return True
-                else:
-                    self.log("❌ Error en registro con servidor")
-                    return False
-                    
-            except socket.timeout:
-                self.log("❌ Timeout conectando al servidor")
-                return False
-                
-        except Exception as e:
-            self.log(f"❌ Error conectando: {e}")
-            return False
-    
-    def send_message(self, content):
-        """Envía un mensaje al servidor."""
-        if not self.connected:
-            self.log("❌ No conectado al servidor")
-            return False
-        
-        try:
-            # Incrementar reloj antes de enviar
-            timestamp = self.lamport_clock.send_event()
-            self.message_counter += 1
-            
-            message_data = {
-                'type': 'message',
-                'sender_id': self.client_id,
-                'sender_name': self.client_name,
-                'content': content,
-                'timestamp': timestamp,
-                'message_id': self.message_counter
-            }
-            
-            message = json.dumps(message_data).encode()
-            self.socket.sendto(message, (self.server_host, self.server_port))
-            
-            self.log(f"📤 Mensaje enviado [T:{timestamp}]: {content}")
-            return True
-            
-        except Exception as e:
-            self.log(f"❌ Error enviando mensaje: {e}")
-            return False
-    
-    def internal_event(self):
-        """Realiza un evento interno."""
-        new_time = self.lamport_clock.increment()
-        self.log(f"🔄 Evento interno - Nuevo reloj: {new_time}")
-        
-        # Notificar al servidor del evento interno
-        if self.connected:
-            try:
-                event_data = {
-                    'type': 'internal_event',
-                    'client_id': self.client_id,
-                    'timestamp': new_time
-                }
-                message = json.dumps(event_data).encode()
-                self.socket.sendto(message, (self.server_host, self.server_port))
-            except Exception as e:
-                self.log(f"❌ Error notificando evento interno: {e}")
-        
-        return new_time
-    
-    def start_background_threads(self):
-        """Inicia hilos en segundo plano."""
-        # Hilo para recibir mensajes
-        receive_thread = threading.Thread(target=self.receive_messages, daemon=True)
-        receive_thread.start()
-        
-        # Hilo para heartbeat
-        heartbeat_thread = threading.Thread(target=self.heartbeat, daemon=True)
-        heartbeat_thread.start()
-        
-        # Hilo para eventos internos automáticos
-        auto_events_thread = threading.Thread(target=self.auto_internal_events, daemon=True)
-        auto_events_thread.start()
-    
-    def receive_messages(self):
-        """Recibe mensajes del servidor."""
-        while self.running:
-            try:
-                data, _ = self.socket.recvfrom(1024)
-                message_data = json.loads(data.decode())
-                
-                msg_type = message_data.get('type')
-                
-                if msg_type == 'broadcast':
-                    self.handle_broadcast(message_data)
-                elif msg_type == 'message_ack':
-                    self.handle_message_ack(message_data)
-                elif msg_type == 'heartbeat_ack':
-                    pass  # Solo para mantener conexión
-                    
-            except socket.timeout:
-                continue
-            except Exception as e:
-                if self.running:
-                    self.log(f"❌ Error recibiendo mensajes: {e}")
-    
-    def handle_broadcast(self, data: dict):
-        """Maneja un mensaje broadcast del servidor."""
-        sender_id = data.get('sender_id')
-        content = data.get('content')
-        original_timestamp = data.get('original_timestamp')
-        server_timestamp = data.get('server_timestamp')
-        
-        # Actualizar reloj con timestamp del servidor
-        new_time = self.lamport_clock.receive_event(server_timestamp)
+    def print_trace_report(self):
+        """Muestra los percentiles de latencia por etapa de los mensajes trazados."""
+        report = self.tracer.percentiles()
+        if not report:
+            self.log("⏱️  Sin trazas registradas")
+            return
         
-        self.log(f"📨 Mensaje de Cliente-{sender_id} [T:{original_timestamp}]: {content}")
-        self.log(f"🕐 Reloj actualizado a: {new_time}")
-    
-    def handle_message_ack(self, data: dict):
-        """Maneja confirmación de mensaje."""
-        server_timestamp = data.get('server_timestamp')
-        new_time = self.lamport_clock.receive_event(server_timestamp)
-        self.log(f"✅ Mensaje confirmado por servidor - Reloj: {new_time}")
-    
-    def heartbeat(self):
-        """Envía heartbeat al servidor."""
-        while self.running:
-            try:
-                time.sleep(10)  # Heartbeat cada 10 segundos
-                if self.connected:
-                    heartbeat_data = {
-                        'type': 'heartbeat',
-                        'client_id': self.client_id,
-                        'timestamp': self.lamport_clock.get_time()
-                    }
-                    message = json.dumps(heartbeat_data).encode()
-                    self.socket.sendto(message, (self.server_host, self.server_port))
-            except Exception as e:
-                if self.running:
-                    self.log(f"❌ Error en heartbeat: {e}")
-    
-    def auto_internal_events(self):
-        """Genera eventos internos automáticamente."""
-        while self.running:
-            time.sleep(random.randint(5, 10))  # Evento cada 5-10 segundos
-            if self.connected:
-                self.internal_event()
-    
-    def disconnect(self):
-        """Desconecta del servidor."""
-        self.running = False
-        self.connected = False
-        self.socket.close()
-        self.log("🔌 Desconectado del servidor")
+        self.log("⏱️  Latencia por etapa (ms):")
+        for stage, values in report.items():
+            formatted = "  ".join(f"{name}={value * 1000:.2f}" for name, value in values.items()
+                                  if value is not None)
+            print(f"    {stage:<16} {formatted}")
     
     def run_interactive(self):
         """Ejecuta el cliente en modo interactivo."""
@@ -222,6 +32,7 @@ class SimpleUDPClient:
         self.log(f"Reloj lógico inicial: {self.lamport_clock.get_time()}")
         
         if not self.connect_to_server():
+            self.close()
             return
         
         self.start_background_threads()
@@ -230,6 +41,8 @@ class SimpleUDPClient:
         print("COMANDOS DISPONIBLES:")
         print("  m <mensaje>  - Enviar mensaje")
         print("  i            - Evento interno")
+        print("  c [T]        - Solicitar historial desde T")
+        print("  t            - Ver latencias de mensajes trazados")
         print("  s            - Ver estado")
         print("  q            - Salir")
         print("="*50)
@@ -242,6 +55,15 @@ class SimpleUDPClient:
                     break
                 elif command.lower() == 'i':
                     self.internal_event()
+                elif command.lower() == 'c' or command.startswith('c '):
+                    try:
+                        since = int(command[2:].strip() or "0")
+                    except ValueError:
+                        print("Uso: c [timestamp]")
+                        continue
+                    self.request_catch_up(since)
+                elif command.lower() == 't':
+                    self.print_trace_report()
                 elif command.lower() == 's':
                     self.log(f"Estado: Reloj={self.lamport_clock.get_time()}, Conectado={self.connected}")
                 elif command.startswith('m '):
@@ -258,7 +80,7 @@ class SimpleUDPClient:
         except KeyboardInterrupt:
             pass
         
-        self.disconnect()
+        self.close()
 
 def main():
     """Función principal."""
@@ -267,10 +89,15 @@ def main():
     print("🚀 Cliente UDP Simple - Algoritmo de Lamport")
     print("=" * 50)
     
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--transport=')]
+    
+    # Transporte: --transport=udp|unix|tcp|shm (ver transports.py)
+    transport = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--transport=')), 'udp')
+    
     # Obtener parámetros
-    if len(sys.argv) >= 3:
-        client_id = int(sys.argv[1])
-        client_name = sys.argv[2]
+    if len(args) >= 2:
+        client_id = int(args[0])
+        client_name = args[1]
     else:
         try:
             client_id = int(input("Ingrese ID del cliente (1-99): "))
@@ -287,11 +114,15 @@ def main():
     
     print(f"\nConfiguracion:")
     print(f"  Cliente: {client_name} (ID: {client_id})")
-    print(f"  Servidor: {server_host}:{server_port}")
+    print(f"  Servidor: {server_host}:{server_port} ({transport})")
     print()
     
     # Crear y ejecutar cliente
-    client = SimpleUDPClient(client_id, client_name, server_host, server_port)
+    try:
+        client = SimpleUDPClient(client_id, client_name, server_host, server_port, transport=transport)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
     client.run_interactive()
 
 if __name__ == '__main__':
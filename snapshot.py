@@ -0,0 +1,86 @@
+"""
+Instantáneas de estado publicadas por época para los servidores de Lamport.
+
+El camino de datos publica una instantánea inmutable y consistente (reloj,
+clientes, mensajes pendientes, eventos) cada vez que cambia el estado. Los
+lectores (get_status, páginas de monitoreo) solo leen la referencia actual:
+nunca toman los locks del camino de datos ni bloquean a los escritores.
+"""
+
+import threading
+from typing import List, NamedTuple, Tuple
+from event_log import EventRing, LogEntry
+
+
+class StatusSnapshot(NamedTuple):
+    """Vista consistente del estado de un servidor."""
+    epoch: int             # Se incrementa con cada publicación
+    logical_time: int      # Reloj lógico al publicar
+    clients: Tuple         # Copias de la información visible de cada cliente (no se modifican)
+    pending_messages: int  # Mensajes en la cola de ordenamiento
+    event_seq: int         # Forman parte de la instantánea los eventos con secuencia < event_seq
+
+
+class SnapshotPublisher:
+    """
+    Publicador de instantáneas de estado por época.
+
+    Cada publicación crea una nueva StatusSnapshot a partir de la anterior y
+    reemplaza la referencia `current`; como la asignación de un atributo es
+    atómica, los lectores obtienen siempre una instantánea completa sin tomar
+    ningún lock. Los escritores se serializan entre sí con un lock propio, que
+    solo se toma al publicar.
+
+    Para que la instantánea no retroceda, cada escritor debe publicar mientras
+    aún sostiene el lock que protege el dato publicado (clientes o cola).
+    Los cambios que solo afectan al reloj y a los eventos se publican con
+    `publish()` sin campos, después de registrar los eventos y fuera de los
+    locks del camino de datos.
+    """
+
+    def __init__(self, clock=None, events: EventRing = None):
+        """
+        Inicializa el publicador con una instantánea vacía.
+
+        Args:
+            clock: Reloj de Lamport leído en cada publicación
+            events: Buffer de eventos cuya secuencia se fija en cada publicación
+        """
+        self.clock = clock
+        self.events = events
+        self.lock = threading.Lock()
+        self.current = StatusSnapshot(0, self._clock_time(), (), 0, self._event_seq())
+
+    def _clock_time(self) -> int:
+        return self.clock.logical_time if self.clock is not None else 0
+
+    def _event_seq(self) -> int:
+        return self.events.next_seq if self.events is not None else 0
+
+    def publish(self, **fields) -> StatusSnapshot:
+        """
+        Publica una nueva instantánea con los campos que cambiaron.
+
+        El reloj lógico y la secuencia de eventos se leen al publicar.
+
+        Args:
+            **fields: Campos de StatusSnapshot a reemplazar (p. ej. clients, pending_messages)
+
+        Returns:
+            Instantánea publicada
+        """
+        with self.lock:
+            snapshot = self.current._replace(
+                epoch=self.current.epoch + 1,
+                logical_time=self._clock_time(),
+                event_seq=self._event_seq(),
+                **fields
+            )
+            self.current = snapshot
+        return snapshot
+
+    def recent_events(self, snapshot: StatusSnapshot, count: int) -> List[LogEntry]:
+        """Obtiene los últimos `count` eventos incluidos en una instantánea."""
+        if self.events is None:
+            return []
+        return self.events.before(snapshot.event_seq, count)
@@ -0,0 +1,65 @@
+"""
+Pruebas del cliente asyncio (async_client.py) contra el servidor en proceso
+de lamport_harness.py.
+"""
+
+import asyncio
+from async_client import AsyncLamportMux
+from lamport_harness import LamportHarness
+
+async def next_items(iterator, count: int, timeout: float = 5.0) -> list:
+    """Toma los próximos `count` elementos de un iterador asíncrono."""
+    return [await asyncio.wait_for(iterator.__anext__(), timeout) for _ in range(count)]
+
+async def run_mux(harness: LamportHarness):
+    """Dos identidades sobre un socket, y una tercera que se une tarde y pide el historial."""
+    mux = await AsyncLamportMux.open('localhost', harness.server.port)
+    try:
+        first, second = mux.client(1, "Cliente-1"), mux.client(2, "Cliente-2")
+        for client in (first, second):
+            assert await client.connect() > 1
+
+        timestamps = [await first.send(f"Mensaje {i}", wait_ack=True) for i in range(3)]
+        assert timestamps == sorted(timestamps) and first.lamport_clock.get_time() == timestamps[-1]
+        await asyncio.to_thread(harness.deliver_all)
+
+        received = await next_items(second.broadcasts(), 3)
+        assert [m['content'] for m in received] == [f"Mensaje {i}" for i in range(3)]
+        assert all(m['recipient_id'] == 2 for m in received) and first.incoming.empty()
+
+        # Sin conectar no se pide historial
+        late = mux.client(3, "Cliente-3")
+        try:
+            await late.request_catch_up()
+            assert False, "Se esperaba ConnectionError"
+        except ConnectionError:
+            pass
+
+        # El historial llega por history(), no mezclado con los broadcasts en vivo
+        await late.connect()
+        await late.request_catch_up()
+        history = await next_items(late.history(), 3)
+        assert [m['content'] for m in history] == [f"Mensaje {i}" for i in range(3)]
+        assert late.incoming.empty()
+        assert mux.stats['unknown'] == 0 and mux.stats['errors'] == 0
+    finally:
+        await mux.close()
+
+def test_async_mux():
+    """Prueba varias identidades multiplexadas sobre un solo socket."""
+    print("🔀 Probando cliente asyncio multiplexado...")
+
+    with LamportHarness() as harness:
+        asyncio.run(run_mux(harness))
+    print("✅ Identidades, broadcasts e historial correctos")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL CLIENTE ASYNCIO")
+    print("=" * 40)
+    test_async_mux()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Pruebas del registro de eventos en memoria (buffer circular con cursores)
+y del pipeline de eventos estructurados.
+"""
+
+import os
+import json
+import tempfile
+import threading
+from event_log import EventRing, EventPipeline, DEBUG, WARNING
+from trace_format import TraceFile, TraceWriter
+
+def test_ring_cursors():
+    """Prueba la lectura incremental por secuencia tras dar la vuelta al buffer."""
+    print("🔁 Probando cursores del buffer circular...")
+
+    ring = EventRing(capacity=5)
+    for i in range(12):
+        ring.append(i, f"Evento {i}")
+
+    # Solo se retienen los últimos 5 eventos
+    assert ring.first_seq == 7
+    assert len(ring) == 5
+    assert [entry.item for entry in ring.latest(2)] == ["Evento 10", "Evento 11"]
+
+    # Un cursor sobrescrito empieza por el más antiguo disponible
+    page = ring.after(2, limit=3)
+    assert [entry.seq for entry in page] == [7, 8, 9]
+
+    page = ring.after(page[-1].seq, limit=10)
+    assert [entry.seq for entry in page] == [10, 11]
+    assert ring.after(11, limit=10) == []
+    print("✅ Cursores por secuencia correctos")
+
+def test_lamport_seek():
+    """Prueba la búsqueda por tiempo lógico con marcas repetidas."""
+    print("🔍 Probando búsqueda por tiempo lógico...")
+
+    ring = EventRing(capacity=100)
+    ring.extend(3, ["a", "b"])
+    ring.append(5, "c")
+    ring.append(4, "d")  # Marca menor: se registra como 5 (no decreciente)
+    ring.append(9, "e")
+
+    assert ring.latest(2)[0].lamport == 5
+    assert [entry.item for entry in ring.after_lamport(3, limit=10)] == ["c", "d", "e"]
+    assert [entry.item for entry in ring.after_lamport(5, limit=10)] == ["e"]
+    assert ring.after_lamport(9, limit=10) == []
+    print("✅ Búsqueda por tiempo lógico correcta")
+
+def test_pipeline_jsonl():
+    """Prueba el filtrado por nivel y la escritura diferida en JSON Lines."""
+    print("📝 Probando pipeline de eventos estructurados...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'events.jsonl')
+    pipeline = EventPipeline(7, "Proceso-7", log_path=path)
+    pipeline.emit('message_received', "Mensaje de {} [T:{}]", 3, 12, lamport=13, peer=3, msg_ts=12, msg_id=1)
+    assert pipeline.emit('debug', "No se registra", level=DEBUG) is None
+    pipeline.emit('event', "Aviso", level=WARNING)
+    pipeline.close()
+
+    assert pipeline.recent(10)[0].endswith("Mensaje de 3 [T:12]")
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['type'] for line in lines] == ['message_received', 'event']
+    assert lines[0]['lamport'] == 13 and lines[0]['peer'] == 3 and lines[0]['msg_ts'] == 12
+    assert lines[0]['text'] == "Mensaje de 3 [T:12]" and lines[1]['level'] == 'WARNING'
+    print("✅ Pipeline de eventos correcto")
+
+def test_pipeline_columnar():
+    """Prueba la traza columnar binaria: escritura, reapertura, lectura por rango y final incompleto."""
+    print("🗜️ Probando traza columnar binaria...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'events.ltrc')
+    pipeline = EventPipeline(7, "Proceso-7", log_path=path)
+    pipeline.emit('message_received', "Mensaje de {}", 3, lamport=13, peer=3, msg_ts=12, msg_id=1)
+    pipeline.emit('event', "Local", lamport=14)
+    pipeline.close()
+
+    # Reabrir anexa lotes nuevos reutilizando la tabla de cadenas
+    writer = TraceWriter(path, chunk_rows=2)
+    for lamport in range(20, 25):
+        writer.append(lamport * 1000, 100.0, lamport, 7, "Proceso-7", 'event')
+    writer.close()
+    with open(path, 'ab') as f:
+        f.write(b'CHNK\x05\x00')  # Bloque interrumpido al escribir
+
+    with TraceFile(path) as trace:
+        assert trace.strings == ['Proceso-7', 'message_received', 'event']
+        assert trace.processes == {7: "Proceso-7"} and len(trace) == 7
+        first = trace.chunks[0]
+        assert list(trace.column(first, 'lamport')) == [13, 14]
+        assert list(trace.column(first, 'peer')) == [3, -1] and list(trace.column(first, 'type')) == [1, 2]
+
+        # Solo los lotes que pueden contener Lamport 21..22
+        chunks = trace.chunks_in(21, 22)
+        assert [(chunk.min_lamport, chunk.max_lamport) for chunk in chunks] == [(20, 21), (22, 23)]
+        assert chunks[1].wall_offset == 100.0 - 22e-6
+        del first, chunks
+    print("✅ Traza columnar correcta")
+
+def test_columnar_invalid_rows():
+    """Prueba que una fila con valores no enteros entra completa o no entra."""
+    print("🧱 Probando filas inválidas en la traza columnar...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'events.ltrc')
+    writer = TraceWriter(path)
+    writer.append(1000, 100.0, 5, 7, "Proceso-7", 'event', peer="abc", msg_ts=2 ** 70, msg_id=3.0)
+    try:
+        writer.append(2000, 100.0, "6", 7, "Proceso-7", 'event', peer=2)
+        assert False, "Se esperaba ValueError"
+    except ValueError:
+        pass
+    writer.append(3000, 100.0, 7, 7, "Proceso-7", 'event', peer=2 ** 40, msg_ts=4)
+    writer.close()
+
+    with TraceFile(path) as trace:
+        chunk = trace.chunks[0]
+        assert chunk.rows == 2
+        assert list(trace.column(chunk, 'lamport')) == [5, 7]
+        assert list(trace.column(chunk, 'peer')) == [-1, -1]
+        assert list(trace.column(chunk, 'msg_ts')) == [-1, 4] and list(trace.column(chunk, 'msg_id')) == [3, -1]
+        del chunk
+    print("✅ Filas inválidas descartadas sin desalinear columnas")
+
+class BlockingSink:
+    """Destino que retiene cada escritura hasta que se le permite terminar."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.writing = threading.Event()
+        self.written = []
+        self.closed = False
+
+    def write(self, records, process):
+        self.writing.set()
+        self.release.wait(5.0)
+        assert not self.closed, "Escritura sobre un destino cerrado"
+        self.written.extend(record.text() for record in records)
+
+    def tick(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def test_pipeline_backpressure():
+    """Prueba la cola acotada, que flush espere a los destinos y que close no cierre bajo una escritura."""
+    print("🚰 Probando destinos lentos en el pipeline...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'events.jsonl')
+    pipeline = EventPipeline(7, "Proceso-7", log_path=path, max_pending=3)
+    pipeline.sinks[0].close()
+    sink = BlockingSink()
+    pipeline.sinks = [sink]
+
+    # El escritor queda dentro de write con el primer evento; la cola admite 3 más
+    pipeline.emit('event', "Evento 0")
+    pipeline.wakeup.set()
+    assert sink.writing.wait(2.0)
+    for i in range(1, 6):
+        pipeline.emit('event', "Evento {}", i)
+    assert pipeline.dropped == 2 and len(pipeline.pending) == 3
+    assert len(pipeline.recent(10)) == 6  # La vista en memoria no descarta
+
+    # flush no vuelve mientras el destino sigue escribiendo
+    assert not pipeline.flush(timeout=0.05)
+    sink.release.set()
+    assert pipeline.flush(timeout=2.0)
+    assert sink.written == ["Evento 0", "Evento 1", "Evento 2", "Evento 3"]
+
+    # close con el escritor bloqueado no cierra el destino hasta que termine
+    sink.release.clear()
+    sink.writing.clear()
+    pipeline.emit('event', "Evento final")
+    pipeline.wakeup.set()
+    assert sink.writing.wait(2.0)
+    pipeline.close(timeout=0.05)
+    assert not sink.closed and pipeline.writer.is_alive()
+    sink.release.set()
+    pipeline.writer.join(2.0)
+    assert sink.closed and sink.written[-1] == "Evento final"
+    assert pipeline.emit('event', "Tras cerrar") is not None and not pipeline.pending
+    print("✅ Cola acotada, flush completo y cierre seguro")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL REGISTRO DE EVENTOS")
+    print("=" * 40)
+    test_ring_cursors()
+    print("-" * 40)
+    test_lamport_seek()
+    print("-" * 40)
+    test_pipeline_jsonl()
+    print("-" * 40)
+    test_pipeline_columnar()
+    print("-" * 40)
+    test_columnar_invalid_rows()
+    print("-" * 40)
+    test_pipeline_backpressure()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Pruebas de la cola de retención de broadcasts.
+"""
+
+from holdback import HoldBackQueue
+
+def test_delivery_seq_order():
+    """Prueba la liberación inmediata de secuencias consecutivas y el salto de huecos."""
+    print("📬 Probando cola de retención por secuencia de entrega...")
+
+    queue = HoldBackQueue(max_wait=0.1)
+    assert queue.push({'delivery_seq': 2}, now=0.0) == []
+    assert [m['delivery_seq'] for m in queue.push({'delivery_seq': 1}, now=0.01)] == [1, 2]
+
+    # La secuencia 3 se pierde: la 4 se libera al vencer la espera
+    assert queue.push({'delivery_seq': 4}, now=0.02) == []
+    assert abs(queue.next_deadline() - 0.12) < 1e-9
+    assert queue.release_expired(now=0.05) == []
+    assert [m['delivery_seq'] for m in queue.release_expired(now=0.13)] == [4]
+    assert queue.skipped == 1
+
+    # Si la 3 llega tarde se muestra de inmediato
+    assert [m['delivery_seq'] for m in queue.push({'delivery_seq': 3}, now=0.2)] == [3]
+    assert queue.late == 1 and len(queue) == 0
+    print("✅ Orden por secuencia correcto")
+
+def test_duplicate_seq():
+    """Prueba que un broadcast duplicado por la red se muestra una sola vez."""
+    print("👯 Probando broadcasts duplicados...")
+
+    queue = HoldBackQueue(max_wait=0.1)
+    assert [m['delivery_seq'] for m in queue.push({'delivery_seq': 1}, now=0.0)] == [1]
+    assert queue.push({'delivery_seq': 1}, now=0.01) == []
+
+    # Duplicado de uno retenido
+    assert queue.push({'delivery_seq': 3}, now=0.02) == []
+    assert queue.push({'delivery_seq': 3}, now=0.03) == []
+    assert [m['delivery_seq'] for m in queue.release_expired(now=0.13)] == [3]
+
+    # La 2 perdida se acepta una vez si llega tarde; su duplicado no
+    assert [m['delivery_seq'] for m in queue.push({'delivery_seq': 2}, now=0.2)] == [2]
+    assert queue.push({'delivery_seq': 2}, now=0.21) == []
+    assert queue.push({'delivery_seq': 3}, now=0.22) == []
+    assert queue.duplicates == 4 and queue.late == 1 and queue.released == 3
+    print("✅ Duplicados descartados")
+
+def test_lamport_key_order():
+    """Prueba el orden por (timestamp original, emisor) sin secuencia del servidor."""
+    print("🕐 Probando cola de retención por timestamp de Lamport...")
+
+    queue = HoldBackQueue(max_wait=0.1)
+    queue.push({'original_timestamp': 7, 'sender_id': 2}, now=0.0)
+    queue.push({'original_timestamp': 7, 'sender_id': 1}, now=0.02)
+    queue.push({'original_timestamp': 5, 'sender_id': 3}, now=0.05)
+    queue.push({'original_timestamp': 9, 'sender_id': 1}, now=0.06)
+
+    # Al vencer el primero se liberan él y los de clave menor
+    released = queue.release_expired(now=0.1)
+    assert [(m['original_timestamp'], m['sender_id']) for m in released] == [(5, 3), (7, 1), (7, 2)]
+    assert [m['original_timestamp'] for m in queue.release_expired(now=0.16)] == [9]
+    assert queue.next_deadline() is None
+    print("✅ Orden por timestamp correcto")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DE LA COLA DE RETENCIÓN")
+    print("=" * 40)
+    test_delivery_seq_order()
+    print("-" * 40)
+    test_duplicate_seq()
+    print("-" * 40)
+    test_lamport_key_order()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Pruebas del proxy de impedimentos de red.
+"""
+
+import random
+from impairment_proxy import ImpairmentProxy, Link, LinkProfile, UPSTREAM, DOWNSTREAM
+from lamport_harness import LamportHarness
+from lamport_sim import ConstantDelay, BernoulliLoss
+
+def new_stats():
+    return {'lost': 0, 'duplicated': 0, 'reordered': 0, 'queue_dropped': 0}
+
+def test_link_schedule():
+    """Prueba retardo, ancho de banda, pérdida, duplicación y reordenamiento de un enlace."""
+    print("⏳ Probando la planificación de un enlace...")
+
+    # 1000 bytes/s: cada datagrama de 400 bytes ocupa el enlace 0.4 s; la cola admite 0.5 s
+    stats = new_stats()
+    link = Link(LinkProfile(delay=ConstantDelay(0.01), bandwidth=1000, queue_limit=0.5), random.Random(1))
+    departures = [link.schedule(0.0, 400, stats) for _ in range(3)]
+    assert [round(d[0], 6) for d in departures[:2]] == [0.41, 0.81]
+    assert departures[2] == [] and stats['queue_dropped'] == 1
+
+    stats = new_stats()
+    assert Link(LinkProfile(loss=BernoulliLoss(1.0)), random.Random(1)).schedule(0.0, 10, stats) == []
+    assert Link(LinkProfile(duplicate=1.0), random.Random(1)).schedule(1.0, 10, stats) == [1.0, 1.0]
+    assert Link(LinkProfile(reorder=1.0, reorder_delay=0.03), random.Random(1)).schedule(1.0, 10, stats) == [1.03]
+    assert stats == {'lost': 1, 'duplicated': 1, 'reordered': 1, 'queue_dropped': 0}
+    print("✅ Enlace correcto")
+
+def test_proxy_between_clients_and_server():
+    """Prueba clientes sin cambios conectados al servidor a través del proxy."""
+    print("🌐 Probando clientes detrás del proxy...")
+
+    with LamportHarness() as harness:
+        proxy = ImpairmentProxy('localhost', harness.server.port, seed=1,
+                                upstream=LinkProfile(delay=ConstantDelay(0.002), duplicate=1.0),
+                                downstream=LinkProfile(delay=ConstantDelay(0.002)))
+        proxy.start()
+        try:
+            sender = harness.client(server_port=proxy.port)
+            receiver = harness.client(server_port=proxy.port)
+            sender.send_message("Hola")
+            harness.wait_for(lambda: sender.acked, "confirmación")
+            harness.deliver_all()
+            harness.wait_for(lambda: receiver.delivered, "broadcast")
+
+            # El servidor ve una dirección del proxy por cliente
+            addresses = {info['address'] for info in harness.server.connected_clients.values()}
+            assert len(addresses) == 2 and all(address[1] != sender.socket.getsockname()[1]
+                                               for address in addresses)
+            assert proxy.stats[UPSTREAM]['duplicated'] == proxy.stats[UPSTREAM]['received'] >= 3
+            assert proxy.stats[DOWNSTREAM]['forwarded'] == proxy.stats[DOWNSTREAM]['received'] > 0
+            harness.assert_lamport_invariants()
+        finally:
+            proxy.stop()
+    print("✅ Proxy transparente para los clientes")
+
+def main():
+    """Función principal."""
+    print("🌐 PRUEBAS DEL PROXY DE IMPEDIMENTOS")
+    print("=" * 50)
+    test_link_schedule()
+    test_proxy_between_clients_and_server()
+    print("=" * 50)
+    print("🎉 Pruebas completadas")
+
+if __name__ == "__main__":
+    main()
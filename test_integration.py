@@ -0,0 +1,334 @@
+"""
+Pruebas de integración del protocolo completo con tiempo virtual.
+
+Usan lamport_harness.py: servidor y clientes en este proceso sobre puertos
+efímeros, sin necesidad de un servidor en el puerto 5000 ni de esperas reales.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import tempfile
+import subprocess
+from lamport_harness import LamportHarness
+from replay_udp import replay
+from trace_format import NONE, TraceFile
+from transports import TRANSPORTS
+from udp_capture import read_capture
+
+def test_register_and_ack():
+    """Prueba el registro y la confirmación de un mensaje."""
+    print("🔌 Probando registro y confirmación...")
+
+    with LamportHarness() as harness:
+        client = harness.client()
+        assert client.connected and client.lamport_clock.get_time() > 1
+
+        client.send_message("Hola")
+        harness.wait_for(lambda: client.acked, "confirmación")
+        assert client.acked == client.sent
+        harness.assert_lamport_invariants()
+    print("✅ Registro y confirmación correctos")
+
+def test_ordered_broadcast():
+    """Prueba la entrega en orden de Lamport a todos los demás clientes."""
+    print("📨 Probando entrega ordenada de broadcasts...")
+
+    with LamportHarness() as harness:
+        clients = [harness.client() for _ in range(3)]
+
+        # Relojes desparejos: el orden de envío no coincide con el de Lamport
+        for _ in range(5):
+            clients[0].internal_event()
+        for client in clients:
+            client.send_message(f"Primero de {client.client_name}")
+        clients[1].send_message("Segundo de Cliente-2")
+        harness.wait_for(lambda: all(len(c.acked) == len(c.sent) for c in clients), "confirmaciones")
+
+        harness.deliver_all()
+        harness.wait_for(lambda: all(len(c.delivered) == 4 - len(c.sent) for c in clients), "broadcasts")
+        assert [m['sender_id'] for m in clients[2].delivered] == [2, 2, 1]
+        harness.assert_lamport_invariants()
+    print("✅ Broadcasts entregados en orden")
+
+def test_catch_up():
+    """Prueba que un cliente que se une tarde recibe el historial en lotes."""
+    print("📚 Probando historial para clientes tardíos...")
+
+    with LamportHarness(catch_up_batch_size=2) as harness:
+        sender = harness.client()
+        for i in range(5):
+            sender.send_message(f"Mensaje {i}")
+        harness.wait_for(lambda: len(sender.acked) == 5, "confirmaciones")
+        harness.deliver_all()
+
+        late = harness.client()
+        late.request_catch_up()
+        for batch in range(1, 3):
+            harness.wait_for(lambda: len(late.history) >= 2 * batch, f"lote {batch}")
+            harness.advance(harness.server.catch_up_interval)
+        harness.wait_for(lambda: len(late.history) == 5, "historial completo")
+        assert [m['original_timestamp'] for m in late.history] == sender.sent
+        harness.assert_lamport_invariants()
+    print("✅ Historial completo y ordenado")
+
+def test_catch_up_oversized():
+    """Prueba que un mensaje del historial mayor que un datagrama llega recortado y marcado a un cliente UDP."""
+    print("✂️ Probando historial con mensajes mayores que un datagrama...")
+
+    with LamportHarness(transports=('tcp',)) as harness:
+        sender = harness.client(transport='tcp')
+        sender.send_message("ñ" * 3000)
+        sender.send_message("Corto")
+        harness.wait_for(lambda: len(sender.acked) == 2, "confirmaciones")
+        harness.deliver_all()
+
+        late = harness.client()
+        sleeping = harness.timebase.sleeping()
+        late.request_catch_up()
+        # El recortado ocupa su propio lote: el segundo sale tras la pausa entre lotes
+        harness.wait_for(lambda: late.history and harness.timebase.sleeping() > sleeping, "primer lote")
+        harness.advance(harness.server.catch_up_interval)
+        harness.wait_for(lambda: len(late.history) == 2, "historial completo")
+        long, short = late.history
+        assert long['truncated'] == 3000 and 0 < len(long['content']) < 3000
+        assert set(long['content']) == {"ñ"} and short['content'] == "Corto" and 'truncated' not in short
+        assert len(json.dumps({'messages': [long]}).encode()) < 1024
+
+        # Por TCP no hay límite de datagrama: llega completo
+        sleeping = harness.timebase.sleeping()
+        sender.request_catch_up()
+        harness.wait_for(lambda: sender.history and harness.timebase.sleeping() > sleeping, "primer lote por TCP")
+        harness.advance(harness.server.catch_up_interval)
+        harness.wait_for(lambda: len(sender.history) == 2, "historial por TCP")
+        assert sender.history[0]['content'] == "ñ" * 3000
+    print("✅ Historial recortado solo donde no cabe")
+
+def test_catch_up_rejected():
+    """Prueba que los cursores inválidos y un segundo catch-up en curso reciben un lote de error."""
+    print("🚦 Probando solicitudes de historial rechazadas...")
+
+    with LamportHarness(catch_up_batch_size=1) as harness:
+        sender = harness.client()
+        for i in range(3):
+            sender.send_message(f"Mensaje {i}")
+        harness.wait_for(lambda: len(sender.acked) == 3, "confirmaciones")
+        harness.deliver_all()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(2.0)
+
+        def catch_up(**fields) -> dict:
+            sock.sendto(json.dumps({'type': 'catch_up', 'client_id': 99, 'timestamp': 1, **fields}).encode(),
+                        ('localhost', harness.server.port))
+            return json.loads(sock.recvfrom(1024)[0])
+
+        try:
+            for fields in ({'since': "5"}, {'since': True}, {'since': 0, 'since_sender': 1.5}):
+                response = catch_up(**fields)
+                assert response['status'] == 'error' and response['complete'] and response['messages'] == []
+
+            # El primer lote sale y el envío queda en pausa: un segundo pedido se rechaza
+            sleeping = harness.timebase.sleeping()
+            first = catch_up(since=0)
+            assert first['status'] == 'success' and len(first['messages']) == 1 and not first['complete']
+            harness.wait_for(lambda: harness.timebase.sleeping() > sleeping, "pausa entre lotes")
+            busy = catch_up(since=0)
+            assert busy['status'] == 'error' and "en curso" in busy['message']
+
+            # advance espera a que el envío vuelva a dormir antes de seguir
+            batches = []
+            for _ in range(2):
+                harness.advance(harness.server.catch_up_interval)
+                batches.append(json.loads(sock.recvfrom(1024)[0]))
+            assert [batch['complete'] for batch in batches] == [False, True]
+            assert all(batch['status'] == 'success' for batch in batches)
+
+            # Terminado el envío, se acepta uno nuevo
+            harness.wait_for(lambda: not harness.server.catch_ups_active, "fin del envío")
+            again = catch_up(since=sender.sent[1])
+            assert again['status'] == 'success' and again['complete'] and len(again['messages']) == 1
+        finally:
+            sock.close()
+        harness.assert_lamport_invariants()
+    print("✅ Cursores inválidos y envíos simultáneos rechazados")
+
+def test_timers():
+    """Prueba heartbeats, eventos internos del servidor y limpieza de inactivos en tiempo virtual."""
+    print("⏱️ Probando temporizadores...")
+
+    with LamportHarness() as harness:
+        active = harness.client()
+        idle = harness.client()
+        server_time = harness.server.lamport_clock.get_time()
+
+        # El cliente inactivo deja de enviar heartbeats; el activo sigue cada 10 s
+        idle.disconnect(close_socket=False)
+        for _ in range(10):
+            harness.advance(10)
+            harness.wait_for(lambda: harness.server.connected_clients[active.client_id]['last_seen']
+                             == harness.timebase.time(), "heartbeat")
+
+        # 100 s virtuales: 20 eventos internos del servidor y limpieza a los 90 s
+        assert harness.server.lamport_clock.get_time() >= server_time + 20
+        assert list(harness.server.connected_clients) == [active.client_id]
+        assert harness.server.status.current.clients == ((active.client_id, active.client_name),)
+    print("✅ Temporizadores correctos")
+
+def test_capture_replay():
+    """Prueba que una captura del servidor se reproduce completa contra un servidor nuevo."""
+    print("🔁 Probando captura y reproducción de tráfico...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'trafico.lcap')
+    with LamportHarness(capture_path=path) as harness:
+        clients = [harness.client() for _ in range(3)]
+        for i in range(4):
+            for client in clients:
+                client.send_message(f"Mensaje {i}")
+        harness.wait_for(lambda: all(len(c.acked) == 4 for c in clients), "confirmaciones")
+
+    datagrams, sources = read_capture(path)
+    assert len(sources) == 3
+    assert [json.loads(d.data)['type'] for d in datagrams].count('message') == 12
+
+    with LamportHarness(process_interval=0) as harness:
+        result = replay(datagrams, 'localhost', harness.server.port, speed=0, grace=2.0)
+    order = result['order']
+    assert order['expected'] == order['delivered'] == 12
+    assert order['missing'] == order['duplicates'] == order['unknown'] == 0
+    assert result['throughput']['acks'] == 12 and result['capture']['sources'] == 3
+    print("✅ Captura reproducida completa")
+
+def test_transports():
+    """Prueba clientes UDP, AF_UNIX, TCP y de memoria compartida en el mismo servidor."""
+    print("🔀 Probando transportes intercambiables...")
+
+    with LamportHarness(transports=('unix', 'tcp')) as harness:
+        clients = {transport: harness.client(transport=transport) for transport in TRANSPORTS}
+        assert all(client.connected for client in clients.values())
+        assert sorted(address[2] for address in harness.server.connections) == ['shm', 'tcp', 'unix']
+
+        for transport, client in clients.items():
+            client.send_message(f"Por {transport}")
+        harness.wait_for(lambda: all(c.acked for c in clients.values()), "confirmaciones")
+        harness.deliver_all()
+        harness.wait_for(lambda: all(len(c.delivered) == 3 for c in clients.values()), "broadcasts")
+        for transport, client in clients.items():
+            assert sorted(m['content'] for m in client.delivered) == sorted(
+                f"Por {other}" for other in TRANSPORTS if other != transport)
+
+        # Sin UDP de por medio, los mensajes pueden superar un datagrama
+        clients['udp'].close()
+        clients['tcp'].send_message("x" * 5000)
+        harness.wait_for(lambda: len(clients['tcp'].acked) == 2, "confirmación del mensaje grande")
+        harness.deliver_all()
+        harness.wait_for(lambda: all(len(clients[t].delivered) == 4 for t in ('unix', 'shm')), "mensaje grande")
+        assert clients['shm'].delivered[-1]['content'] == "x" * 5000
+        harness.assert_lamport_invariants()
+
+        clients['shm'].close()
+        clients['tcp'].close()
+        harness.wait_for(lambda: [a[2] for a in harness.server.connections] == ['unix'], "cierre de conexiones")
+    print("✅ Los cuatro transportes conviven en el mismo servidor")
+
+def test_tcp_port_and_large_capture():
+    """Prueba el puerto TCP expuesto y la captura de un mensaje TCP de más de 64 KB."""
+    print("📼 Probando captura de mensajes TCP grandes...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'trafico.lcap')
+    with LamportHarness(transports=('tcp',), capture_path=path) as harness:
+        assert harness.server.tcp_port == harness.server.port
+        client = harness.client(transport='tcp')
+        client.send_message("x" * 70000)
+        harness.wait_for(lambda: client.acked, "confirmación del mensaje grande")
+
+    datagrams, sources = read_capture(path)
+    messages = [json.loads(d.data) for d in datagrams if json.loads(d.data)['type'] == 'message']
+    assert [len(m['content']) for m in messages] == [70000] and sources[0][2] == 'tcp'
+    print("✅ Mensaje grande capturado completo")
+
+def test_headless_cli():
+    """Prueba que `udp_client.py --headless` toma servidor y puerto de la línea de comandos sin leer stdin."""
+    print("🖥️ Probando cliente sin interfaz desde la línea de comandos...")
+
+    with LamportHarness() as harness:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_client.py')
+        child = subprocess.Popen([sys.executable, script, '--headless', '7', 'Sin-Interfaz', 'localhost',
+                                  str(harness.server.port)],
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            harness.wait_for(lambda: 7 in harness.server.connected_clients or child.poll() is not None,
+                             "registro del cliente")
+            assert child.poll() is None, child.stderr.read().decode()
+            assert harness.server.connected_clients[7]['name'] == 'Sin-Interfaz'
+        finally:
+            child.send_signal(signal.SIGINT)
+            child.wait(5)
+    print("✅ Cliente sin interfaz registrado sin preguntas")
+
+def test_malformed_trace():
+    """Prueba que un datagrama con campos no enteros no desalinea la traza .ltrc y que se escribe en reposo."""
+    print("🗜️ Probando traza columnar con datagramas malformados...")
+
+    path = os.path.join(tempfile.mkdtemp(), 'eventos.ltrc')
+    with LamportHarness(log_path=path) as harness:
+        client = harness.client()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(2.0)
+        try:
+            # client_id llega tal cual del JSON del cliente
+            sock.sendto(json.dumps({'type': 'register', 'client_id': "abc", 'client_name': "Malo",
+                                    'timestamp': 1}).encode(), ('localhost', harness.server.port))
+            assert json.loads(sock.recvfrom(1024)[0])['type'] == 'register_response'
+            sock.sendto(json.dumps({'type': 'internal_event', 'client_id': 2 ** 40,
+                                    'timestamp': 2}).encode(), ('localhost', harness.server.port))
+        finally:
+            sock.close()
+        client.send_message("Después del malformado")
+        harness.wait_for(lambda: client.acked, "confirmación")
+
+        # Sin eventos nuevos, el lote pendiente igual llega al archivo
+        def written():
+            with TraceFile(path) as trace:
+                return len(trace) >= 7
+
+        assert os.path.getsize(path) > 0  # La cabecera se escribe al abrir
+        harness.wait_for(written, "lote escrito en reposo", timeout=3.0)
+
+        with TraceFile(path) as trace:
+            types = [trace.strings[index] for chunk in trace.chunks for index in trace.column(chunk, 'type')]
+            peers = [peer for chunk in trace.chunks for peer in trace.column(chunk, 'peer')]
+            assert all(len(trace.column(chunk, name)) == chunk.rows
+                       for chunk in trace.chunks for name in ('mono_ns', 'lamport', 'peer', 'msg_id', 'type'))
+            registered = [peer for event_type, peer in zip(types, peers) if event_type == 'client_registered']
+            assert registered == [1, NONE]
+            assert peers[types.index('client_internal_event')] == NONE
+            assert peers[types.index('message_received')] == 1
+    print("✅ Traza alineada y escrita sin esperar más eventos")
+
+def main():
+    """Función principal."""
+    print("🧪 PRUEBAS DE INTEGRACIÓN CON TIEMPO VIRTUAL")
+    print("=" * 50)
+    started = time.monotonic()
+
+    test_register_and_ack()
+    test_ordered_broadcast()
+    test_catch_up()
+    test_catch_up_oversized()
+    test_catch_up_rejected()
+    test_timers()
+    test_capture_replay()
+    test_transports()
+    test_tcp_port_and_large_capture()
+    test_headless_cli()
+    test_malformed_trace()
+
+    print("=" * 50)
+    print(f"🎉 Pruebas completadas en {time.monotonic() - started:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@
 Script de prueba para verificar el funcionamiento del algoritmo de Lamport.
 """
 
+import os
 import threading
 import time
 import json
 import socket
+import tempfile
 from lamport_clock import LamportClock
 
 def test_lamport_ordering():
@@ -124,6 +126,44 @@ def test_message_ordering():
         print(f"  [T:{msg['timestamp']}] Sender-{msg['sender']}: {msg['content']}")
     print()
 
+def test_persistent_clock():
+    """Prueba que el reloj persistente nunca retroceda tras un reinicio."""
+    print("💾 Probando marca de agua alta persistente...")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "clock.json")
+        
+        clock = LamportClock(1, "Proceso-1", persist_path=path, lease_size=10)
+        for _ in range(25):
+            clock.increment()
+        last_time = clock.receive_event(40)
+        print(f"  Reloj antes de la caída: {last_time}")
+        
+        # Simular caída: un nuevo reloj sobre el mismo archivo
+        restarted = LamportClock(1, "Proceso-1", persist_path=path, lease_size=10)
+        resumed_time = restarted.increment()
+        print(f"  Reloj tras reiniciar: {resumed_time}")
+        
+        assert resumed_time > last_time
+        assert restarted.lease_limit >= resumed_time
+    print()
+
+def test_batch_receive():
+    """Prueba que recibir un lote equivale a recibir mensaje por mensaje."""
+    print("📦 Probando recepción de lotes...")
+    
+    timestamps = [5, 2, 9, 9, 1]
+    sequential = LamportClock(1, "Secuencial")
+    batched = LamportClock(2, "Lote")
+    
+    expected = [sequential.receive_event(t) for t in timestamps]
+    result = batched.receive_events(timestamps)
+    print(f"  Relojes asignados: {result}")
+    
+    assert result == expected
+    assert batched.get_time() == sequential.get_time()
+    print()
+
 def main():
     """Función principal de pruebas."""
     print("🧪 PRUEBAS DEL SISTEMA DE LAMPORT")
@@ -135,6 +175,10 @@ def main():
     print("-" * 40)
     test_message_ordering()
     print("-" * 40)
+    test_persistent_clock()
+    print("-" * 40)
+    test_batch_receive()
+    print("-" * 40)
     test_server_connection()
     
     print()
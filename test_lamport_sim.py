@@ -0,0 +1,99 @@
+"""
+Pruebas del simulador de eventos discretos.
+"""
+
+import random
+from lamport_sim import Simulation, PoissonWorkload, PeriodicWorkload, ConstantDelay, ExponentialDelay, BernoulliLoss
+
+def without_wall_time(result):
+    """Quita del resultado lo que depende del tiempo real."""
+    return {key: value for key, value in result.items() if key not in ('wall_seconds', 'events_per_second')}
+
+def test_reproducible():
+    """Prueba que la misma semilla produce el mismo resultado y otra semilla no."""
+    print("🎲 Probando reproducibilidad del simulador...")
+
+    def run(seed):
+        simulation = Simulation(500, workload=PoissonWorkload(2.0, 1.0), delay=ExponentialDelay(0.0005, 0.002),
+                                fanout=5, seed=seed)
+        return without_wall_time(simulation.run(2.0))
+
+    first = run(7)
+    assert first == run(7)
+    assert first != run(8)
+
+    messages = first['messages']
+    assert 0 < messages['delivered'] <= messages['sent'] and messages['internal_events'] > 0
+    assert messages['acks'] <= messages['sent']
+    assert messages['broadcast_receipts'] <= 5 * messages['delivered']
+    print("✅ Resultado reproducible")
+
+def test_ordered_delivery_and_loss():
+    """Prueba la cola ordenada del servidor y la contabilidad de pérdidas."""
+    print("📦 Probando entrega ordenada y pérdidas simuladas...")
+
+    # Con una pausa larga entre entregas la cola ordena: menos entregas fuera de orden
+    immediate = Simulation(200, delay=ExponentialDelay(0.0005, 0.002), fanout=3, seed=1).run(3.0)
+    queued = Simulation(200, delay=ExponentialDelay(0.0005, 0.002), fanout=3, seed=1,
+                        process_interval=0.01).run(3.0)
+    assert queued['ordering']['server_out_of_order'] < immediate['ordering']['server_out_of_order']
+    assert queued['messages']['pending'] > 0
+    assert queued['clocks']['server'] >= queued['messages']['delivered']
+
+    # Todo se pierde: nada llega al servidor ni a los clientes
+    lossy = Simulation(50, delay=ConstantDelay(0.001), loss=BernoulliLoss(1.0), seed=1).run(1.0)
+    assert lossy['messages']['delivered'] == 0 and lossy['messages']['broadcast_receipts'] == 0
+    assert lossy['messages']['datagrams_lost'] == lossy['messages']['sent'] > 0
+
+    # Sin recepciones, cada reloj solo avanza con los envíos propios
+    assert lossy['clocks']['client_mean'] * 50 == lossy['messages']['sent']
+    print("✅ Orden y pérdidas correctos")
+
+def test_in_flight_accounting():
+    """Prueba que al horizonte cada envío está entregado, pendiente o en vuelo."""
+    print("✈️ Probando mensajes en vuelo al terminar...")
+
+    # Retardos largos frente a la duración: muchos envíos no llegan al servidor a tiempo
+    for interval in (0.0, 0.01):
+        result = Simulation(300, workload=PoissonWorkload(20.0), delay=ExponentialDelay(0.01, 0.05),
+                            fanout=3, seed=2, process_interval=interval).run(1.0)
+        messages = result['messages']
+        assert messages['datagrams_lost'] == 0 and messages['in_flight'] > 0
+        assert messages['sent'] == messages['delivered'] + messages['pending'] + messages['in_flight']
+        # Sin pérdidas, cada mensaje que llegó al servidor tiene su confirmación recibida o en vuelo
+        assert messages['acks'] <= messages['delivered'] + messages['pending']
+        assert messages['receipts_in_flight'] > 0
+    print("✅ Envíos contabilizados al horizonte")
+
+def test_invalid_workload():
+    """Prueba que las cargas sin acciones o con tasas negativas se rechazan."""
+    print("🚫 Probando cargas inválidas...")
+
+    for args in ((0, 0), (-1.0, 2.0), (1.0, -0.5)):
+        try:
+            PoissonWorkload(*args)
+            assert False, f"Se esperaba ValueError para {args}"
+        except ValueError:
+            pass
+    for args in ((0,), (1.0, 1.0)):
+        try:
+            PeriodicWorkload(*args)
+            assert False, f"Se esperaba ValueError para {args}"
+        except ValueError:
+            pass
+    assert PoissonWorkload(0, 1.0)(random.Random(0))[1] is False
+    print("✅ Cargas inválidas rechazadas")
+
+def main():
+    """Función principal."""
+    print("🧮 PRUEBAS DEL SIMULADOR DE LAMPORT")
+    print("=" * 50)
+    test_reproducible()
+    test_ordered_delivery_and_loss()
+    test_in_flight_accounting()
+    test_invalid_workload()
+    print("=" * 50)
+    print("🎉 Pruebas completadas")
+
+if __name__ == "__main__":
+    main()
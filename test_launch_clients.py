@@ -0,0 +1,43 @@
+"""
+Pruebas de los argumentos del modo flota de launch_clients.py.
+"""
+
+import contextlib
+import io
+from launch_clients import parse_args
+
+def rejected(argv: list) -> str:
+    """Devuelve el mensaje de error de argparse para `argv` (falla si se acepta)."""
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(stderr):
+            parse_args(argv)
+    except SystemExit as e:
+        assert e.code == 2
+        return stderr.getvalue()
+    assert False, f"Se esperaba un error para {argv}"
+
+def test_fleet_arguments():
+    """Prueba que los valores imposibles se rechazan con un error de uso en lugar de fallar más tarde."""
+    print("🚀 Probando validación de argumentos de la flota...")
+
+    args = parse_args(['--fleet', '--clients', '5', '--workers', '2', '--ramp-rate', '0'])
+    assert (args.clients, args.workers, args.ramp_rate) == (5, 2, 0.0)
+
+    assert "--fleet" in rejected(['--clients', '5'])
+    assert "--clients" in rejected(['--fleet', '--clients', '0'])
+    assert "--workers" in rejected(['--fleet', '--workers', '0'])
+    for option in ('--ramp-rate', '--duration', '--send-buffer'):
+        assert option in rejected(['--fleet', option, '-1'])
+    print("✅ Argumentos inválidos rechazados")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL LAUNCHER DE CLIENTES")
+    print("=" * 40)
+    test_fleet_arguments()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Pruebas del registro de métricas (metrics.py) y de su exposición en el
+servidor UDP (datagrama 'metrics') y en el servidor Flask (/metrics).
+"""
+
+import json
+import socket
+import threading
+from metrics import MetricsRegistry
+from lamport_harness import LamportHarness
+
+def test_registry_threads():
+    """Prueba que los fragmentos por hilo se suman al recolectar."""
+    print("🧮 Probando contadores e histogramas desde varios hilos...")
+
+    registry = MetricsRegistry()
+    registry.describe('ops_total', 'counter', 'Operaciones')
+    registry.describe('op_seconds', 'histogram', 'Duración', buckets=(0.001, 0.01, 0.1))
+
+    def work(index):
+        for _ in range(1000):
+            registry.inc('ops_total', (('worker', str(index % 2)),))
+        registry.observe('op_seconds', 0.005)
+        registry.observe('op_seconds', 5.0)  # Cae en el bucket +Inf
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    collected = registry.collect()
+    assert collected['counters'] == {('ops_total', (('worker', '0'),)): 2000,
+                                     ('ops_total', (('worker', '1'),)): 2000}
+    counts, total = collected['histograms'][('op_seconds', ())]
+    assert counts == [0, 4, 0, 4] and abs(total - 20.02) < 1e-9
+
+    # Percentiles interpolados dentro del bucket; el bucket +Inf devuelve el último límite
+    assert abs(registry.quantile('op_seconds', 0.25) - 0.0055) < 1e-9
+    assert registry.quantile('op_seconds', 0.99) == 0.1
+    assert registry.quantile('missing_seconds', 0.5) is None
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters']['ops_total{worker=0}'] == 2000
+    assert snapshot['histograms']['op_seconds']['count'] == 8
+    print("✅ Métricas agregadas correctamente")
+
+def test_prometheus_format():
+    """Prueba el formato de texto de Prometheus: tipos, buckets acumulados, gauges y escapes."""
+    print("📝 Probando exportación en formato Prometheus...")
+
+    registry = MetricsRegistry()
+    registry.describe('requests_total', 'counter', 'Peticiones')
+    registry.describe('latency_seconds', 'histogram', 'Latencia', buckets=(0.1, 1.0))
+    registry.describe('depth', 'gauge', 'Profundidad')
+    registry.inc('requests_total', (('path', 'a"b\\c\nd'),), amount=3)
+    for value in (0.05, 0.5, 0.7, 2.0):
+        registry.observe('latency_seconds', value)
+    depth = [7]
+    registry.set_gauge('depth', lambda: depth[0])
+
+    lines = registry.render_prometheus().splitlines()
+    assert "# HELP requests_total Peticiones" in lines and "# TYPE requests_total counter" in lines
+    assert 'requests_total{path="a\\"b\\\\c\\nd"} 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert 'latency_seconds_count 4' in lines
+    assert "depth 7" in lines
+
+    # Los gauges con función se evalúan en cada recolección
+    depth[0] = 9
+    assert "depth 9" in registry.render_prometheus().splitlines()
+    print("✅ Formato Prometheus correcto")
+
+def test_udp_metrics_request():
+    """Prueba la consulta de métricas por datagrama sin modificar el reloj del servidor."""
+    print("📡 Probando métricas del servidor UDP...")
+
+    with LamportHarness() as harness:
+        client = harness.client()
+        client.send_message("Hola")
+        harness.wait_for(lambda: client.acked, "confirmación")
+        harness.deliver_all()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(2.0)
+        try:
+            before = harness.server.lamport_clock.get_time()
+            sock.sendto(json.dumps({'type': 'metrics'}).encode(), ('localhost', harness.server.port))
+            response = json.loads(sock.recvfrom(65536)[0])
+            assert response['type'] == 'metrics_response' and response['server_timestamp'] == before
+            counters = response['metrics']['counters']
+            assert counters['lamport_datagrams_received_total{type=register}'] == 1
+            assert counters['lamport_datagrams_received_total{type=message}'] == 1
+            assert response['metrics']['gauges']['lamport_connected_clients'] == 1
+            assert response['metrics']['histograms']['lamport_delivery_lag_seconds']['count'] == 1
+
+            sock.sendto(json.dumps({'type': 'metrics', 'format': 'prometheus'}).encode(),
+                        ('localhost', harness.server.port))
+            text = json.loads(sock.recvfrom(65536)[0])['text']
+            assert "# TYPE lamport_datagrams_received_total counter" in text
+            assert 'lamport_datagrams_received_total{type="metrics"} 2' in text.splitlines()
+            assert harness.server.lamport_clock.get_time() == before
+        finally:
+            sock.close()
+    print("✅ Métricas UDP consultadas sin avanzar el reloj")
+
+def test_flask_metrics():
+    """Prueba el endpoint /metrics del servidor Flask."""
+    print("🌐 Probando /metrics del servidor Flask...")
+
+    from server import app
+    client = app.test_client()
+    assert client.get('/status').status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    lines = response.get_data(as_text=True).splitlines()
+    assert "# TYPE lamport_http_requests_total counter" in lines
+    assert any(line.startswith('lamport_http_requests_total{endpoint="get_status",status="200"}')
+               for line in lines)
+    assert any(line.startswith('lamport_logical_time ') for line in lines)
+    print("✅ /metrics expone peticiones y reloj")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DE MÉTRICAS")
+    print("=" * 40)
+    test_registry_threads()
+    print("-" * 40)
+    test_prometheus_format()
+    print("-" * 40)
+    test_udp_metrics_request()
+    print("-" * 40)
+    test_flask_metrics()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Pruebas del perfilador de spans (profiler.py) y de su control por datagrama
+en el servidor UDP.
+"""
+
+import os
+import json
+import socket
+import tempfile
+import threading
+import time
+from profiler import SpanProfiler
+from lamport_harness import LamportHarness
+
+def test_spans_and_locks():
+    """Prueba que solo se registran spans con el perfilador activo, incluidas las esperas de locks."""
+    print("⏱️ Probando spans y esperas de locks...")
+
+    profiler = SpanProfiler('prueba', max_spans=3)
+    lock = profiler.wrap_lock(threading.Lock(), 'lock')
+    with profiler.span('apagado'):
+        with lock:
+            pass
+    assert len(profiler.spans) == 0 and profiler.stop() is None
+
+    profiler.start()
+    with profiler.span('handler', 'handler'):
+        time.sleep(0.01)
+
+    # Otro hilo retiene el lock: la espera queda registrada
+    lock.lock.acquire()
+    threading.Timer(0.02, lock.lock.release).start()
+    with lock:
+        pass
+    assert not lock.locked()
+
+    names = [span[0] for span in profiler.spans]
+    assert names == ['handler', 'wait lock']
+    handler, wait = profiler.spans
+    assert handler[1] == 'handler' and handler[3] >= 10_000_000
+    assert wait[1] == 'lock' and wait[3] >= 10_000_000
+
+    # Buffer acotado: se descartan los más antiguos
+    for i in range(3):
+        profiler.record(f"extra {i}", 'test', 0, 1)
+    assert [span[0] for span in profiler.spans] == ['extra 0', 'extra 1', 'extra 2']
+
+    # Reiniciar descarta lo anterior
+    profiler.start()
+    assert len(profiler.spans) == 0
+    profiler.enabled = False
+    print("✅ Spans registrados solo con el perfilador activo")
+
+def test_chrome_trace_export():
+    """Prueba el formato Chrome trace-event del archivo exportado."""
+    print("📤 Probando exportación Chrome trace-event...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = SpanProfiler('prueba', output_dir=directory)
+        assert profiler.toggle() is None and profiler.enabled
+        profiler.record('handler', 'handler', 5_000_000, 2_500)
+        path = profiler.toggle()
+        assert not profiler.enabled and os.path.dirname(path) == directory
+        assert os.path.basename(path).startswith(f"prueba-{os.getpid()}-")
+
+        with open(path) as f:
+            trace = json.load(f)
+        events = trace['traceEvents']
+        assert events[0] == {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': 'prueba'}}
+        assert events[1]['name'] == 'thread_name' and events[1]['args']['name'] == threading.current_thread().name
+        span = events[2]
+        assert (span['name'], span['cat'], span['ph'], span['ts'], span['dur']) == \
+            ('handler', 'handler', 'X', 5000.0, 2.5)
+        assert span['tid'] == threading.get_ident()
+    print("✅ Traza exportada en microsegundos con nombres de proceso e hilo")
+
+def test_server_profiler_command():
+    """Prueba activar y detener el perfilador del servidor por datagrama."""
+    print("🛰️ Probando el comando 'profiler' del servidor...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with LamportHarness(profile_dir=directory) as harness:
+            client = harness.client()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.settimeout(2.0)
+
+            def command(action: str) -> dict:
+                sock.sendto(json.dumps({'type': 'profiler', 'action': action}).encode(),
+                            ('localhost', harness.server.port))
+                return json.loads(sock.recvfrom(1024)[0])
+
+            try:
+                assert command('status') == {'type': 'profiler_response', 'enabled': False,
+                                             'spans': 0, 'path': None}
+                assert command('start')['enabled']
+
+                client.send_message("Perfilado")
+                harness.wait_for(lambda: client.acked, "confirmación")
+                harness.deliver_all()
+
+                response = command('stop')
+                assert not response['enabled'] and response['spans'] > 0
+                assert os.path.dirname(response['path']) == directory
+            finally:
+                sock.close()
+
+        with open(response['path']) as f:
+            names = {event['name'] for event in json.load(f)['traceEvents'] if event['ph'] == 'X'}
+        assert {'handle_client_message', 'process_ordered_messages', 'broadcast_message',
+                'wait queue_lock', 'wait LamportClock.lock'} <= names
+    print("✅ Perfilador del servidor controlado por datagrama")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL PERFILADOR")
+    print("=" * 40)
+    test_spans_and_locks()
+    print("-" * 40)
+    test_chrome_trace_export()
+    print("-" * 40)
+    test_server_profiler_command()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Pruebas del servidor Flask (server.py) con el cliente de pruebas de Flask,
+sin levantar un servidor HTTP real.
+"""
+
+import queue
+import server
+from server import app, lamport_clock, publish
+
+def post_batch(client, logical_times: list) -> list:
+    """Envía un lote con un mensaje por reloj y devuelve los relojes asignados."""
+    response = client.post('/messages/batch', json={'messages': [
+        {'sender_id': 'lote', 'sender_name': 'Lote', 'message': f"M{i}", 'logical_time': logical_time}
+        for i, logical_time in enumerate(logical_times)]})
+    assert response.status_code == 200
+    return response.get_json()['server_clocks']
+
+def test_batch_lamports():
+    """Prueba que cada evento de un lote queda registrado con su propio reloj."""
+    print("📦 Probando relojes por mensaje en lotes...")
+
+    client = app.test_client()
+    base = lamport_clock.get_time()
+    clocks = post_batch(client, [base + 5, base + 50])
+    assert clocks == [base + 6, base + 51]
+
+    entries = server.events.latest(2)
+    assert [entry.lamport for entry in entries] == clocks
+    assert [entry.item.lamport for entry in entries] == clocks
+    assert entries[0].item.text().endswith(f"Reloj actualizado: {base + 6}")
+
+    # Los booleanos de JSON no son relojes
+    for logical_time in (True, False, "7", 7.5):
+        response = client.post('/messages/batch', json={'messages': [
+            {'sender_id': 'lote', 'sender_name': 'Lote', 'message': "Malo", 'logical_time': logical_time}]})
+        assert response.status_code == 400
+    assert lamport_clock.get_time() == clocks[-1] and server.events.latest(1)[0].lamport == clocks[-1]
+    print("✅ Cada mensaje del lote conserva su reloj")
+
+def test_events_lamport_paging():
+    """Prueba la paginación de /events desde un tiempo lógico sobre un lote con varios relojes."""
+    print("📄 Probando cursores de Lamport en /events...")
+
+    client = app.test_client()
+    base = lamport_clock.get_time()
+    clocks = post_batch(client, [base + 5, base + 10, base + 20, base + 50])
+    assert clocks == [base + 6, base + 11, base + 21, base + 51]
+
+    page = client.get(f'/events?after_lamport={base + 10}&limit=2').get_json()
+    assert [event['lamport'] for event in page['events']] == [base + 11, base + 21]
+    assert page['has_more']
+
+    # La página siguiente sigue por secuencia desde el cursor devuelto
+    page = client.get(f"/events?after={page['next_cursor']}&limit=2").get_json()
+    assert [event['lamport'] for event in page['events']] == [base + 51]
+    assert page['events'][0]['description'].endswith(f"Reloj actualizado: {base + 51}")
+    assert not page['has_more']
+
+    page = client.get(f'/events?after_lamport={base + 50}').get_json()
+    assert [event['lamport'] for event in page['events']] == [base + 51]
+    page = client.get(f'/events?after_lamport={base + 51}').get_json()
+    assert page['events'] == [] and not page['has_more']
+    print("✅ Páginas por tiempo lógico correctas")
+
+def test_index_etag():
+    """Prueba la caché de la página principal y las peticiones condicionales (ETag/304)."""
+    print("🏷️ Probando caché y ETag de la página principal...")
+
+    client = app.test_client()
+    post_batch(client, [lamport_clock.get_time() + 1])
+    first = client.get('/')
+    etag = first.headers['ETag'].strip('"')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    assert f'id="clock-time" style="color: #e74c3c;">{lamport_clock.get_time()}<'.encode() in first.data
+
+    # Sin cambios de estado: misma versión y la página no se vuelve a renderizar
+    cached = server.index_cache['entry']
+    second = client.get('/')
+    assert second.headers['ETag'] == first.headers['ETag'] and second.data == first.data
+    assert server.index_cache['entry'] is cached
+
+    not_modified = client.get('/', headers={'If-None-Match': f'"{etag}"'})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+    assert not_modified.headers['ETag'] == first.headers['ETag']
+
+    # Un mensaje nuevo cambia la versión: la etiqueta anterior ya no vale
+    clocks = post_batch(client, [lamport_clock.get_time() + 5])
+    updated = client.get('/', headers={'If-None-Match': f'"{etag}"'})
+    assert updated.status_code == 200 and updated.headers['ETag'] != first.headers['ETag']
+    assert f'id="clock-time" style="color: #e74c3c;">{clocks[-1]}<'.encode() in updated.data and server.index_cache['entry'] is not cached
+    print("✅ Página reutilizada y 304 mientras el estado no cambia")
+
+class RacingQueue(queue.Queue):
+    """Cola de suscriptor que otro publicador vuelve a llenar mientras se vacía."""
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        if self.empty():
+            super().put_nowait("event: log\ndata: {}\n\n")
+            self.raced = True
+            raise queue.Empty
+        return item
+
+def test_publish_full_race():
+    """Prueba que un suscriptor lleno por otro publicador no lanza queue.Full y queda marcado para 'resync'."""
+    print("📡 Probando suscriptores SSE saturados...")
+
+    subscriber = RacingQueue(maxsize=1)
+    subscriber.raced = False
+    subscriber.put_nowait("event: log\ndata: {}\n\n")
+    with server.sse_lock:
+        server.sse_subscribers.append(subscriber)
+    try:
+        publish('clock', {'logical_time': 1})
+        assert subscriber.raced and subscriber in server.sse_resync
+    finally:
+        with server.sse_lock:
+            server.sse_subscribers.remove(subscriber)
+            server.sse_resync.discard(subscriber)
+    print("✅ Suscriptor marcado para recargar sin error")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL SERVIDOR FLASK")
+    print("=" * 40)
+    test_batch_lamports()
+    print("-" * 40)
+    test_events_lamport_paging()
+    print("-" * 40)
+    test_index_etag()
+    print("-" * 40)
+    test_publish_full_race()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Pruebas directas de los buffers circulares en memoria compartida (shm_transport.py).
+"""
+
+import struct
+import hashlib
+import threading
+import multiprocessing
+import shm_transport
+from shm_transport import ShmRing, attach_channel, create_channel, record_size, HEAD, TAIL, WAITING, WRAP
+
+def make_ring(capacity: int) -> ShmRing:
+    """Buffer sobre memoria local del proceso (mismo código que sobre el segmento)."""
+    return ShmRing(memoryview(bytearray(ShmRing.size(capacity))), 0, capacity)
+
+def test_ring_wrap_and_full():
+    """Prueba el orden FIFO, el salto al principio, el buffer lleno y el tamaño máximo."""
+    print("🔁 Probando buffer circular: vuelta, lleno y tamaño máximo...")
+
+    ring = make_ring(256)
+    assert ring.read() is None
+    for fill in b'abc':
+        assert ring.write(bytes([fill]) * 60)  # Registros de 64 bytes
+    assert ring.read() == b'a' * 60
+
+    # El cuarto llega hasta la posición 248; el quinto no cabe en los 8 bytes finales y salta al principio
+    assert ring.write(b'd' * 52)
+    assert ring.write(b'e' * 20)
+    assert struct.unpack_from('<I', ring.data, 248)[0] == WRAP
+    assert not ring.write(b'f' * 60)  # Lleno
+    assert [ring.read() for _ in range(4)] == [b'b' * 60, b'c' * 60, b'd' * 52, b'e' * 20]
+    assert ring.read() is None and ring.counters[HEAD] == ring.counters[TAIL] == 280
+
+    try:
+        ring.write(b'x' * (ring.max_record + 1))
+        assert False, "Se esperaba ValueError"
+    except ValueError:
+        pass
+    assert record_size(ring.max_record) <= ring.capacity
+    ring.release()
+    print("✅ Vuelta y límites correctos")
+
+def test_ring_wait_wakeup():
+    """Prueba la espera con tiempo límite y el despertar por una escritura de otro hilo."""
+    print("⏰ Probando espera y despertar del consumidor...")
+
+    ring = make_ring(1024)
+    assert ring.wait(0.01) is None
+    assert ring.wait(5.0, cancelled=lambda: True) is None
+
+    writer = threading.Timer(0.02, ring.write, args=(b'hola',))
+    writer.start()
+    assert ring.wait(5.0) == b'hola'
+    writer.join()
+    assert ring.words[WAITING] == 0
+    ring.release()
+    print("✅ Espera y despertar correctos")
+
+def produce(name: str, count: int):
+    """Proceso hijo: escribe `count` registros numerados de tamaño variable y uno vacío al final."""
+    channel = attach_channel(name)
+    try:
+        for i in range(count):
+            body = bytes([i % 251]) * (i % 300)
+            payload = struct.pack('<I', i) + hashlib.md5(body).digest() + body
+            assert channel.send(payload, 5.0)
+        channel.send(b'', 5.0)
+    finally:
+        channel.close()
+
+def test_ring_between_processes():
+    """Prueba que otro proceso publica los registros completos y en orden, dando varias vueltas al buffer."""
+    print("🧵 Probando buffer compartido entre procesos...")
+
+    count = 20000
+    channel = create_channel(4096)
+    shm = channel.shm
+    child = multiprocessing.get_context('fork').Process(target=produce, args=(shm.name, count))
+    child.start()
+    try:
+        received = 0
+        while True:
+            payload = channel.recv(5.0)
+            assert payload is not None, "Tiempo agotado esperando al productor"
+            if not payload:
+                break
+            (index,) = struct.unpack_from('<I', payload)
+            body = payload[20:]
+            assert index == received and hashlib.md5(body).digest() == payload[4:20]
+            assert body == bytes([index % 251]) * (index % 300)
+            received += 1
+        assert received == count
+    finally:
+        child.join(5)
+        channel.close()
+        shm.unlink()
+    assert child.exitcode == 0
+    print(f"✅ {count} registros recibidos completos y en orden")
+
+def test_unordered_architecture():
+    """Prueba que el transporte se rechaza donde el procesador puede reordenar las escrituras."""
+    print("🚫 Probando rechazo en arquitecturas sin orden de escrituras...")
+
+    ordered = shm_transport.ORDERED_MEMORY
+    shm_transport.ORDERED_MEMORY = False
+    try:
+        create_channel(4096)
+        assert False, "Se esperaba OSError"
+    except OSError as e:
+        assert 'unix' in str(e)
+    finally:
+        shm_transport.ORDERED_MEMORY = ordered
+    print("✅ Transporte rechazado con sugerencia de 'unix'")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL TRANSPORTE POR MEMORIA COMPARTIDA")
+    print("=" * 40)
+    test_ring_wrap_and_full()
+    print("-" * 40)
+    test_ring_wait_wakeup()
+    print("-" * 40)
+    test_ring_between_processes()
+    print("-" * 40)
+    test_unordered_architecture()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Pruebas de las instantáneas de estado publicadas por época (snapshot.py) y
+de su uso en los servidores UDP y Flask.
+"""
+
+import threading
+import server
+from event_log import EventRing
+from lamport_clock import LamportClock
+from snapshot import SnapshotPublisher
+from lamport_harness import LamportHarness
+
+def call_in_thread(function, timeout: float = 2.0):
+    """Ejecuta `function` en otro hilo y devuelve su resultado (falla si no termina a tiempo)."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "La lectura quedó bloqueada"
+    return result[0]
+
+def test_publisher():
+    """Prueba las épocas, los campos publicados y los eventos fijados por cada instantánea."""
+    print("📸 Probando publicación de instantáneas...")
+
+    clock = LamportClock(0, "Prueba")
+    ring = EventRing(100)
+    publisher = SnapshotPublisher(clock, ring)
+    assert publisher.current == (0, 0, (), 0, 0)
+
+    for i in range(3):
+        ring.append(clock.increment(), f"evento {i}")
+    first = publisher.publish(clients=(('a', 1),))
+    assert publisher.current is first
+    assert (first.epoch, first.logical_time, first.clients, first.event_seq) == (1, 3, (('a', 1),), 3)
+
+    # Lo que cambia después no altera la instantánea ya publicada
+    ring.append(clock.increment(), "evento 3")
+    second = publisher.publish(pending_messages=2)
+    assert (second.epoch, second.logical_time, second.clients, second.pending_messages) == (2, 4, (('a', 1),), 2)
+    assert (first.epoch, first.logical_time, first.pending_messages) == (1, 3, 0)
+    assert [entry.item for entry in publisher.recent_events(first, 10)] == ["evento 0", "evento 1", "evento 2"]
+    assert [entry.item for entry in publisher.recent_events(second, 2)] == ["evento 2", "evento 3"]
+    assert SnapshotPublisher().recent_events(second, 10) == []
+    print("✅ Instantáneas inmutables con épocas crecientes")
+
+def test_concurrent_publish():
+    """Prueba que los lectores ven épocas crecientes mientras varios hilos publican."""
+    print("🧵 Probando publicaciones concurrentes...")
+
+    publisher = SnapshotPublisher()
+    seen = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            seen.append(publisher.current.epoch)
+
+    def write(index):
+        for i in range(500):
+            publisher.publish(pending_messages=index * 1000 + i)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writers = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    stop.set()
+    reader.join()
+
+    assert publisher.current.epoch == 2000
+    assert all(a <= b for a, b in zip(seen, seen[1:]))
+    print("✅ Épocas sin retrocesos ni publicaciones perdidas")
+
+def test_udp_status_snapshot():
+    """Prueba que get_status del servidor UDP refleja el estado sin tomar los locks del camino de datos."""
+    print("🛰️ Probando estado del servidor UDP desde instantáneas...")
+
+    with LamportHarness() as harness:
+        udp_server = harness.server
+        sender, _ = harness.client(), harness.client()
+        sender.send_message("Pendiente")
+        harness.wait_for(lambda: sender.acked, "confirmación")
+        harness.wait_for(lambda: udp_server.get_status()['pending_messages'] == 1, "mensaje en cola")
+
+        # Con los locks tomados por el camino de datos, la consulta no espera
+        with udp_server.clients_lock, udp_server.queue_lock:
+            status = call_in_thread(udp_server.get_status)
+        assert status['connected_clients'] == 2 and status['pending_messages'] == 1
+        assert status['logical_time'] == udp_server.lamport_clock.get_time()
+        assert status['events'][-1].endswith(f"Reloj del servidor actualizado a: {status['logical_time']}")
+        assert any("Cliente-2 (ID: 2) registrado" in event for event in status['events'])
+
+        # Tras la entrega, sin más actividad, la instantánea coincide con el estado vivo
+        harness.deliver_all()
+        harness.wait_for(lambda: udp_server.get_status()['pending_messages'] == 0, "entrega")
+        harness.wait_for(lambda: udp_server.get_status()['logical_time'] == udp_server.lamport_clock.get_time(),
+                         "publicación tras el broadcast")
+        delivered = udp_server.get_status()
+        assert delivered['epoch'] > status['epoch'] and delivered['events_dropped'] == 0
+        assert any("PROCESANDO ORDENADAMENTE" in event for event in delivered['events'])
+        assert delivered['events'] == udp_server.event_log.recent(10)
+    print("✅ Estado leído sin bloquear al servidor")
+
+def test_flask_snapshot():
+    """Prueba que /clients y / del servidor Flask se sirven desde la instantánea."""
+    print("🌐 Probando instantáneas del servidor Flask...")
+
+    client = server.app.test_client()
+    response = client.post('/register', json={'process_id': 'snap', 'process_name': 'Snap', 'logical_time': 1})
+    assert response.status_code == 200
+    before = server.status.current
+    record = next(c for c in before.clients if c['id'] == 'snap')
+
+    # Con el lock de clientes tomado, las lecturas no esperan
+    with server.client_lock:
+        clients = call_in_thread(lambda: client.get('/clients?limit=1000').get_json())
+        assert call_in_thread(lambda: client.get('/').status_code) == 200
+    assert {'id': 'snap', 'name': 'Snap', 'clock': 1} in clients['clients']
+
+    # Actualizar el reloj de un cliente reemplaza su registro: la instantánea anterior no cambia
+    client.post('/message', json={'sender_id': 'snap', 'sender_name': 'Snap', 'message': "Hola",
+                                  'logical_time': 7})
+    assert record == {'id': 'snap', 'name': 'Snap', 'clock': 1}
+    assert server.status.current.epoch > before.epoch
+    assert next(c for c in server.status.current.clients if c['id'] == 'snap')['clock'] == 7
+    print("✅ Páginas servidas desde instantáneas inmutables")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DE INSTANTÁNEAS DE ESTADO")
+    print("=" * 40)
+    test_publisher()
+    print("-" * 40)
+    test_concurrent_publish()
+    print("-" * 40)
+    test_udp_status_snapshot()
+    print("-" * 40)
+    test_flask_snapshot()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
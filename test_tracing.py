@@ -0,0 +1,97 @@
+"""
+Pruebas del trazado de latencia de extremo a extremo (tracing.py).
+"""
+
+import time
+import socket
+from tracing import TRACE_HOPS, Tracer, enable_kernel_timestamps, recv_with_timestamp
+from lamport_harness import LamportHarness
+
+def test_sampling_and_stages():
+    """Prueba el muestreo y el cálculo de etapas a partir de los saltos."""
+    print("🔬 Probando muestreo y etapas de una traza...")
+
+    assert all(Tracer(0.0).start_trace() is None for _ in range(100))
+    trace = Tracer(1.0).start_trace()
+    assert set(trace) == {'id', 'client_send'} and len(trace['id']) == 16
+
+    tracer = Tracer()
+    trace = {'id': 'x', **{hop: 100.0 + 0.001 * index for index, hop in enumerate(TRACE_HOPS)}}
+    stages = tracer.record(trace)
+    assert set(stages) == {'network_in', 'server_handling', 'ordering_queue', 'dispatch', 'network_out',
+                           'end_to_end'}
+    assert all(abs(stages[stage] - 0.001) < 1e-9 for stage in stages if stage != 'end_to_end')
+    assert abs(stages['end_to_end'] - 0.005) < 1e-9
+
+    # Trazas parciales solo registran lo que conocen; relojes desfasados no dan duraciones negativas
+    partial = {'client_send': 10.0, 'server_receive': 9.5, 'enqueue': 9.6}
+    assert tracer.record(partial) == {'network_in': 0.0, 'server_handling': partial['enqueue'] - 9.5}
+
+    report = tracer.percentiles()
+    assert set(report) == set(stages) and set(report['end_to_end']) == {'p50', 'p90', 'p99'}
+    assert 0.0025 <= report['end_to_end']['p99'] <= 0.005
+    print("✅ Muestreo y etapas correctos")
+
+def test_kernel_timestamps():
+    """Prueba que la marca de llegada del kernel precede a la lectura del datagrama."""
+    print("🕰️ Probando marcas de tiempo del kernel...")
+
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        receiver.bind(('localhost', 0))
+        receiver.settimeout(2.0)
+        kernel = enable_kernel_timestamps(receiver)
+
+        before = time.time()
+        sender.sendto(b'hola', receiver.getsockname())
+        time.sleep(0.05)  # El datagrama espera en el buffer
+        data, address, received_at = recv_with_timestamp(receiver, 1024, kernel)
+        assert data == b'hola' and address[1] == sender.getsockname()[1]
+        if kernel:
+            assert before - 0.01 <= received_at < time.time() - 0.04
+        else:
+            assert received_at >= before + 0.05
+    finally:
+        receiver.close()
+        sender.close()
+    print(f"✅ Marca de llegada correcta ({'kernel' if kernel else 'time.time()'})")
+
+def test_traced_broadcast():
+    """Prueba que un mensaje trazado llega al receptor con todos los saltos y etapas."""
+    print("🧭 Probando traza completa de un broadcast...")
+
+    with LamportHarness(kernel_timestamps=True) as harness:
+        sender = harness.client(trace_sample_rate=1.0)
+        receiver = harness.client()
+        sender.send_message("Trazado")
+        harness.wait_for(lambda: sender.acked, "confirmación")
+        harness.deliver_all()
+        harness.wait_for(lambda: receiver.delivered, "broadcast")
+
+        trace = receiver.delivered[0]['trace']
+        assert list(hop for hop in TRACE_HOPS if hop in trace) == list(TRACE_HOPS)
+        assert all(trace[a] <= trace[b] for a, b in zip(TRACE_HOPS[1:4], TRACE_HOPS[2:5]))
+
+        # El receptor registra todas las etapas; el servidor, las que conoce hasta el fanout
+        assert set(receiver.tracer.percentiles()) == {'network_in', 'server_handling', 'ordering_queue',
+                                                      'dispatch', 'network_out', 'end_to_end'}
+        assert set(harness.server.tracer.percentiles()) == {'network_in', 'server_handling',
+                                                            'ordering_queue', 'dispatch'}
+        assert sender.tracer.percentiles() == {}
+    print("✅ Traza completa de envío a recepción")
+
+def main():
+    """Función principal de pruebas."""
+    print("🧪 PRUEBAS DEL TRAZADO DE LATENCIA")
+    print("=" * 40)
+    test_sampling_and_stages()
+    print("-" * 40)
+    test_kernel_timestamps()
+    print("-" * 40)
+    test_traced_broadcast()
+    print()
+    print("✅ Pruebas completadas")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Base de tiempo inyectable para los temporizadores del servidor y los clientes.
+
+El servidor y los clientes no llaman a `time.sleep`/`time.time` directamente
+en sus temporizadores (entrega ordenada, eventos internos, heartbeats,
+limpieza de inactivos, historial) sino a una base de tiempo:
+
+- SYSTEM (SystemTimebase): el reloj real; es la que se usa por defecto.
+- VirtualTimebase: el tiempo solo avanza con `advance(segundos)`, que
+  despierta en orden a los hilos dormidos y espera a que vuelvan a dormir,
+  de modo que una prueba puede recorrer minutos de temporizadores en
+  milisegundos y de forma determinista (ver lamport_harness.py).
+
+Las mediciones de rendimiento (perf_counter en métricas y trazas) siguen
+usando el reloj real.
+"""
+
+import time
+import threading
+from typing import Dict
+
+
+class SystemTimebase:
+    """Tiempo real del sistema."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Espera un evento a lo sumo `timeout` segundos (como Event.wait)."""
+        return event.wait(timeout)
+
+
+SYSTEM = SystemTimebase()
+
+
+class VirtualTimebase:
+    """Tiempo controlado por la prueba: solo avanza con `advance`."""
+
+    def __init__(self, start: float = 1_000_000.0, settle_timeout: float = 2.0, poll_interval: float = 0.001):
+        """
+        Inicializa el tiempo virtual.
+
+        Args:
+            start: Valor inicial de `time()` y `monotonic()`
+            settle_timeout: Espera real máxima para que un hilo despertado vuelva a dormir
+            poll_interval: Intervalo real con que `wait` revisa su evento
+        """
+        self.now = start
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self.condition = threading.Condition()
+        self.sleepers: Dict[threading.Thread, float] = {}   # hilo -> instante de despertar
+        self.closed = False
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        """Duerme hasta que el tiempo virtual avance `seconds` (o se cierre la base)."""
+        if seconds <= 0:
+            return
+        me = threading.current_thread()
+        with self.condition:
+            deadline = self.now + seconds
+            self.sleepers[me] = deadline
+            self.condition.notify_all()
+            try:
+                while self.now < deadline and not self.closed:
+                    self.condition.wait()
+            finally:
+                del self.sleepers[me]
+                self.condition.notify_all()
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """
+        Espera un evento a lo sumo `timeout` segundos virtuales.
+
+        Mientras espera cuenta como dormido; el evento se revisa cada
+        `poll_interval` segundos reales.
+        """
+        if event.is_set():
+            return True
+        me = threading.current_thread()
+        with self.condition:
+            deadline = self.now + timeout
+            self.sleepers[me] = deadline
+            self.condition.notify_all()
+            try:
+                while not event.is_set():
+                    if self.now >= deadline or self.closed:
+                        return False
+                    self.condition.wait(self.poll_interval)
+                return True
+            finally:
+                del self.sleepers[me]
+                self.condition.notify_all()
+
+    def sleeping(self) -> int:
+        """Cantidad de hilos dormidos en esta base de tiempo."""
+        with self.condition:
+            return len(self.sleepers)
+
+    def next_deadline(self):
+        """Próximo instante en que despierta algún hilo (None si no hay ninguno)."""
+        with self.condition:
+            return min(self.sleepers.values(), default=None)
+
+    def advance(self, seconds: float):
+        """
+        Avanza el tiempo virtual `seconds` segundos.
+
+        Recorre uno a uno los instantes de despertar dentro del intervalo y,
+        en cada uno, espera a que los hilos despertados vuelvan a dormir o
+        terminen antes de seguir.
+
+        Raises:
+            RuntimeError: Si un hilo despertado no vuelve a dormir en `settle_timeout`
+        """
+        target = self.now + seconds
+        with self.condition:
+            while True:
+                due = [deadline for deadline in self.sleepers.values() if deadline <= target]
+                if not due:
+                    self.now = target
+                    self.condition.notify_all()
+                    return
+
+                self.now = max(self.now, min(due))
+                woken = [thread for thread, deadline in self.sleepers.items() if deadline <= self.now]
+                self.condition.notify_all()
+
+                limit = time.monotonic() + self.settle_timeout
+                while not all(self._settled(thread) for thread in woken):
+                    remaining = limit - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError(f"Hilos sin volver a dormir tras t={self.now}: "
+                                           f"{[t.name for t in woken if not self._settled(t)]}")
+                    self.condition.wait(min(remaining, 0.01))
+
+    def _settled(self, thread: threading.Thread) -> bool:
+        """Un hilo despertado se asentó si terminó o volvió a dormir más adelante."""
+        deadline = self.sleepers.get(thread)
+        if deadline is None:
+            return not thread.is_alive()
+        return deadline > self.now
+
+    def close(self):
+        """Despierta a todos los hilos dormidos; desde ahora `sleep` retorna de inmediato."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -0,0 +1,492 @@
+"""
+Análisis fuera de línea de los registros de eventos de Lamport.
+
+Carga los archivos JSONL que escribe EventPipeline (servidor y clientes,
+incluidos los rotados) en columnas de NumPy y calcula, sin bucles de Python
+por evento:
+
+- Crecimiento del reloj por proceso (ticks por segundo).
+- Distribución de saltos al recibir: cuánto adelanta `max(L, t) + 1` al
+  reloj por encima del +1 de un evento local.
+- Violaciones de happens-before: recepciones cuyo reloj no supera el
+  timestamp del mensaje recibido, o cuyo envío no aparece en la traza.
+- Inversiones de orden en los broadcasts mostrados por cada cliente y en
+  las entregas del servidor.
+- Tiempo de residencia en la cola del servidor (recibido -> entregado).
+
+Leer JSON es lo lento; `--save traza.npz` guarda las columnas para que los
+análisis siguientes carguen cientos de millones de eventos en segundos. Las
+trazas columnares .ltrc (EventPipeline con `log_path='x.ltrc'`, ver
+trace_format.py) se leen directamente desde un mmap, y con `--lamport` solo
+se leen los lotes del rango pedido.
+
+Uso:
+
+    python trace_analyzer.py server.jsonl clients/*.jsonl --save traza.npz
+    python trace_analyzer.py traza.npz --json
+    python trace_analyzer.py 'trazas/*.ltrc' --lamport 1000:2000
+"""
+
+import sys
+import json
+import glob
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+from trace_format import EXTENSION as BINARY_EXTENSION, COLUMNS as BINARY_COLUMNS, TraceFile
+
+# Eventos que registran el reloj recién actualizado por una recepción
+RECEIVE_TYPES = ('client_registered', 'message_received', 'client_internal_event',
+                 'connected', 'clock_update', 'ack_received')
+
+# Eventos de recepción que identifican el mensaje recibido (peer, msg_ts)
+MESSAGE_RECEIVE_TYPES = ('message_received', 'client_internal_event', 'broadcast_received')
+
+# Marca de valor ausente en las columnas enteras
+NONE = -1
+
+COLUMNS = {
+    'mono_ns': np.int64,
+    'time': np.float64,
+    'lamport': np.int64,
+    'process': np.int64,
+    'type': np.int32,
+    'peer': np.int64,
+    'msg_ts': np.int64,
+    'msg_id': np.int64
+}
+
+# Límites de Lamport cuando no se pide un rango
+NO_LIMIT = np.iinfo(np.int64)
+
+# Clave JSON del texto libre: siempre es la última y no hace falta para el análisis
+TEXT_KEY = ', "text": '
+
+
+class Trace:
+    """Eventos en columnas: un arreglo de NumPy por campo y un vocabulario de tipos."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], types: List[str]):
+        self.columns = columns
+        self.types = list(types)
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self._process_order = None
+
+    def __len__(self) -> int:
+        return len(self.lamport)
+
+    @classmethod
+    def from_jsonl(cls, paths: List[str], chunk_lines: int = 1_000_000) -> 'Trace':
+        """
+        Lee archivos JSONL de EventPipeline.
+
+        Args:
+            paths: Archivos a leer (el orden de los eventos dentro de cada archivo se conserva)
+            chunk_lines: Líneas convertidas a arreglos por bloque
+        """
+        type_codes: Dict[str, int] = {}
+        chunks = {name: [] for name in COLUMNS}
+        rows = []
+        decode = json.loads
+
+        def flush():
+            if not rows:
+                return
+            for name, values in zip(COLUMNS, zip(*rows)):
+                chunks[name].append(np.array(values, dtype=COLUMNS[name]))
+            rows.clear()
+
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    cut = line.find(TEXT_KEY)
+                    record = decode(line[:cut] + '}' if cut >= 0 else line)
+                    event_type = record['type']
+                    code = type_codes.get(event_type)
+                    if code is None:
+                        code = type_codes[event_type] = len(type_codes)
+                    peer, msg_ts, msg_id = record['peer'], record['msg_ts'], record['msg_id']
+                    rows.append((
+                        record['mono_ns'], record['time'], record['lamport'], record['process'], code,
+                        NONE if peer is None else peer,
+                        NONE if msg_ts is None else msg_ts,
+                        NONE if msg_id is None else msg_id
+                    ))
+                    if len(rows) >= chunk_lines:
+                        flush()
+        flush()
+
+        columns = {name: np.concatenate(parts) if parts else np.empty(0, dtype=COLUMNS[name])
+                   for name, parts in chunks.items()}
+        return cls(columns, sorted(type_codes, key=type_codes.get))
+
+    @classmethod
+    def from_binary(cls, paths: List[str], min_lamport: Optional[int] = None,
+                    max_lamport: Optional[int] = None) -> 'Trace':
+        """
+        Lee trazas columnares .ltrc (trace_format.py) directamente desde el mmap.
+
+        Args:
+            paths: Archivos a leer
+            min_lamport, max_lamport: Leer solo los eventos con Lamport en este
+                rango; los lotes fuera del rango no se tocan
+        """
+        type_codes: Dict[str, int] = {}
+        chunks = {name: [] for name in COLUMNS}
+        ranged = min_lamport is not None or max_lamport is not None
+        low = NO_LIMIT.min if min_lamport is None else min_lamport
+        high = NO_LIMIT.max if max_lamport is None else max_lamport
+
+        for path in paths:
+            with TraceFile(path) as trace_file:
+                # Tabla de cadenas del archivo -> vocabulario común de tipos
+                codes = np.array([type_codes.setdefault(string, len(type_codes)) for string in trace_file.strings],
+                                 dtype=np.int32)
+                for chunk in trace_file.chunks_in(min_lamport, max_lamport):
+                    view = {name: np.frombuffer(trace_file.buffer, dtype=typecode, count=chunk.rows,
+                                                offset=chunk.column_offset(name))
+                            for name, typecode in BINARY_COLUMNS}
+                    keep = (view['lamport'] >= low) & (view['lamport'] <= high) if ranged else slice(None)
+
+                    # Copiar lo leído: el mmap se cierra al terminar el archivo
+                    for name, values in view.items():
+                        values = values[keep]
+                        chunks[name].append(codes[values] if name == 'type' else values.astype(COLUMNS[name]))
+                    chunks['time'].append(chunk.wall_offset + view['mono_ns'][keep] / 1e9)
+                    del view, values
+
+        columns = {name: np.concatenate(parts) if parts else np.empty(0, dtype=COLUMNS[name])
+                   for name, parts in chunks.items()}
+        return cls(columns, sorted(type_codes, key=type_codes.get))
+
+    @classmethod
+    def concatenate(cls, traces: List['Trace']) -> 'Trace':
+        """Une varias trazas en una, con un vocabulario de tipos común."""
+        types = sorted({name for trace in traces for name in trace.types})
+        columns = {}
+        for name in COLUMNS:
+            if name == 'type':
+                parts = [np.array([types.index(t) for t in trace.types], dtype=np.int32)[trace.type]
+                         if trace.types else trace.type for trace in traces]
+            else:
+                parts = [trace.columns[name] for trace in traces]
+            columns[name] = np.concatenate(parts)
+        return cls(columns, types)
+
+    @classmethod
+    def load(cls, path: str) -> 'Trace':
+        """Carga una traza guardada con `save`."""
+        with np.load(path) as data:
+            columns = {name: data[name] for name in COLUMNS}
+            types = [str(name) for name in data['types']]
+        return cls(columns, types)
+
+    def save(self, path: str):
+        """Guarda las columnas en un archivo .npz."""
+        np.savez(path, types=np.array(self.types), **self.columns)
+
+    def select(self, mask: np.ndarray) -> 'Trace':
+        """Traza con solo los eventos de la máscara."""
+        return Trace({name: values[mask] for name, values in self.columns.items()}, self.types)
+
+    def type_mask(self, *names: str) -> np.ndarray:
+        """Máscara de los eventos cuyo tipo está en `names`."""
+        table = np.zeros(max(len(self.types), 1), dtype=bool)
+        table[[self.types.index(name) for name in names if name in self.types]] = True
+        return table[self.type]
+
+    def process_order(self) -> np.ndarray:
+        """Índices que ordenan los eventos por proceso y luego por tiempo monótono (estable, se calcula una vez)."""
+        if self._process_order is None:
+            # Lo habitual (un archivo por proceso, leídos en orden) ya está ordenado
+            same = self.process[1:] == self.process[:-1]
+            if np.all(self.process[1:] >= self.process[:-1]) and np.all(
+                    ~same | (self.mono_ns[1:] >= self.mono_ns[:-1])):
+                self._process_order = np.arange(len(self))
+            else:
+                self._process_order = np.lexsort((self.mono_ns, self.process))
+        return self._process_order
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """Máscara de inicio de grupo en un arreglo ordenado por `keys`."""
+    starts = np.ones(len(keys), dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    return starts
+
+
+def clock_growth(trace: Trace) -> Dict[str, np.ndarray]:
+    """
+    Crecimiento del reloj lógico de cada proceso.
+
+    Returns:
+        Columnas 'process', 'events', 'ticks', 'seconds' y 'rate' (ticks/s)
+    """
+    if not len(trace):
+        return {name: np.empty(0) for name in ('process', 'events', 'ticks', 'seconds', 'rate')}
+    order = trace.process_order()
+    process = trace.process[order]
+    starts = np.flatnonzero(group_starts(process))
+    ends = np.append(starts[1:], len(order)) - 1
+
+    lamport = trace.lamport[order]
+    mono = trace.mono_ns[order]
+    ticks = np.maximum.reduceat(lamport, starts) - np.minimum.reduceat(lamport, starts)
+    seconds = (mono[ends] - mono[starts]) / 1e9
+    rate = np.divide(ticks, seconds, out=np.zeros(len(starts)), where=seconds > 0)
+    return {
+        'process': process[starts],
+        'events': ends - starts + 1,
+        'ticks': ticks,
+        'seconds': seconds,
+        'rate': rate
+    }
+
+
+def receive_jumps(trace: Trace) -> np.ndarray:
+    """
+    Salto de cada recepción: reloj tras recibir - reloj del evento anterior - 1.
+
+    Es 0 cuando el reloj local ya superaba el timestamp recibido y t - L
+    cuando lo adelanta. Un 'clock_update' que repite el reloj del evento de
+    recepción anterior (el servidor registra ambos) no se cuenta de nuevo.
+    Los valores negativos indican eventos de hilos concurrentes registrados
+    con el reloj ya avanzado.
+    """
+    order = trace.process_order()
+    process = trace.process[order]
+    lamport = trace.lamport[order]
+    receive = trace.type_mask(*RECEIVE_TYPES)[order]
+
+    delta = np.empty(len(order), dtype=np.int64)
+    delta[:1] = 0
+    delta[1:] = lamport[1:] - lamport[:-1] - 1
+    first = group_starts(process)
+
+    duplicate = np.zeros(len(order), dtype=bool)
+    clock_update = trace.type_mask('clock_update')[order]
+    duplicate[1:] = clock_update[1:] & receive[:-1] & (lamport[1:] == lamport[:-1])
+    return delta[receive & ~first & ~duplicate]
+
+
+def lookup(sorted_keys: np.ndarray, queries: np.ndarray):
+    """
+    Busca cada consulta en `sorted_keys`.
+
+    Las consultas se buscan ordenadas: la búsqueda binaria recorre la memoria
+    en orden y es varias veces más rápida que con consultas al azar.
+
+    Returns:
+        (posición de cada consulta, si la clave existe)
+    """
+    order = np.argsort(queries)
+    position = np.empty(len(queries), dtype=np.int64)
+    position[order] = np.searchsorted(sorted_keys, queries[order])
+    np.minimum(position, len(sorted_keys) - 1, out=position)
+    return position, sorted_keys[position] == queries
+
+
+def encode_keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Combina dos columnas enteras no negativas en una clave ordenable (a, b)."""
+    return a * (int(b.max(initial=0)) + 1) + b
+
+
+def happens_before(trace: Trace) -> dict:
+    """
+    Verifica la condición de reloj en cada recepción de un mensaje identificado.
+
+    Returns:
+        'checked', 'violations' (reloj al recibir <= timestamp del mensaje) y
+        'unmatched' (recepciones de mensajes cuyo envío no está en la traza)
+    """
+    receives = np.flatnonzero(trace.type_mask(*MESSAGE_RECEIVE_TYPES) & (trace.msg_ts >= 0) & (trace.peer >= 0))
+    violations = int(np.count_nonzero(trace.lamport[receives] <= trace.msg_ts[receives]))
+
+    sends = np.flatnonzero(trace.type_mask('message_sent') & (trace.msg_ts >= 0))
+    # Las recepciones de eventos internos no tienen un envío con msg_ts en el cliente
+    messages = receives[~trace.type_mask('client_internal_event')[receives]]
+    if not len(sends) or not len(messages):
+        return {'checked': len(receives), 'violations': violations, 'unmatched': len(messages)}
+
+    max_ts = max(int(trace.msg_ts[sends].max()), int(trace.msg_ts[messages].max()))
+    send_keys = trace.process[sends] * (max_ts + 1) + trace.msg_ts[sends]
+    receive_keys = trace.peer[messages] * (max_ts + 1) + trace.msg_ts[messages]
+
+    _, matched = lookup(np.sort(send_keys), receive_keys)
+    return {
+        'checked': len(receives),
+        'violations': violations,
+        'unmatched': int(np.count_nonzero(~matched))
+    }
+
+
+def ordering_inversions(trace: Trace, event_type: str = 'broadcast_received') -> dict:
+    """
+    Cuenta, por proceso, los eventos `event_type` cuya clave (msg_ts, peer) es
+    menor que la de alguno registrado antes por el mismo proceso.
+
+    Returns:
+        'events', 'inversions' y 'by_process' {proceso: inversiones}
+    """
+    mask = trace.type_mask(event_type) & (trace.msg_ts >= 0)
+    index = np.flatnonzero(mask)
+    if not len(index):
+        return {'events': 0, 'inversions': 0, 'by_process': {}}
+    index = index[np.lexsort((index, trace.mono_ns[index], trace.process[index]))]
+
+    process = trace.process[index]
+    keys = encode_keys(trace.msg_ts[index], np.maximum(trace.peer[index], 0))
+
+    # Desplazar cada proceso por encima del anterior: un solo máximo acumulado sirve para todos
+    group = np.cumsum(group_starts(process)) - 1
+    shifted = keys + group * (int(keys.max()) + 1)
+    running = np.maximum.accumulate(shifted)
+    inverted = np.zeros(len(index), dtype=bool)
+    inverted[1:] = (shifted[1:] < running[:-1]) & (group[1:] == group[:-1])
+
+    processes, counts = np.unique(process[inverted], return_counts=True)
+    return {
+        'events': len(index),
+        'inversions': int(inverted.sum()),
+        'by_process': {int(p): int(c) for p, c in zip(processes, counts)}
+    }
+
+
+def queue_residence(trace: Trace) -> np.ndarray:
+    """
+    Segundos entre 'message_received' y 'message_delivered' de cada mensaje en el servidor.
+
+    Se emparejan por (proceso del servidor, emisor, timestamp).
+    """
+    received = np.flatnonzero(trace.type_mask('message_received') & (trace.msg_ts >= 0))
+    delivered = np.flatnonzero(trace.type_mask('message_delivered') & (trace.msg_ts >= 0))
+    if not len(received) or not len(delivered):
+        return np.empty(0)
+
+    max_ts = max(int(trace.msg_ts[received].max()), int(trace.msg_ts[delivered].max())) + 1
+    max_peer = max(int(trace.peer[received].max()), int(trace.peer[delivered].max())) + 1
+
+    def keys(index):
+        return (trace.process[index] * max_peer + trace.peer[index]) * max_ts + trace.msg_ts[index]
+
+    received_keys = keys(received)
+    order = np.argsort(received_keys, kind='stable')
+    sorted_keys = received_keys[order]
+    position, matched = lookup(sorted_keys, keys(delivered))
+    start = trace.mono_ns[received[order[position[matched]]]]
+    return (trace.mono_ns[delivered[matched]] - start) / 1e9
+
+
+def summarize(values: np.ndarray, scale: float = 1.0) -> dict:
+    """Percentiles de una distribución."""
+    if not len(values):
+        return {'count': 0}
+    p50, p99, p999 = np.percentile(values, [50, 99, 99.9]) * scale
+    return {'count': int(len(values)), 'mean': float(values.mean() * scale), 'p50': float(p50),
+            'p99': float(p99), 'p999': float(p999), 'max': float(values.max() * scale)}
+
+
+def analyze(trace: Trace) -> dict:
+    """Ejecuta todos los análisis sobre una traza."""
+    growth = clock_growth(trace)
+    jumps = receive_jumps(trace)
+    positive = jumps[jumps >= 0]
+    return {
+        'events': len(trace),
+        'processes': int(len(growth['process'])),
+        'clock_growth': {
+            int(p): {'events': int(e), 'ticks': int(t), 'seconds': float(s), 'rate': float(r)}
+            for p, e, t, s, r in zip(growth['process'], growth['events'], growth['ticks'],
+                                     growth['seconds'], growth['rate'])
+        },
+        'receive_jumps': dict(summarize(positive), concurrent=int(np.count_nonzero(jumps < 0)),
+                              zero=int(np.count_nonzero(positive == 0))),
+        'happens_before': happens_before(trace),
+        'broadcast_inversions': ordering_inversions(trace, 'broadcast_received'),
+        'delivery_inversions': ordering_inversions(trace, 'message_delivered'),
+        'queue_residence_ms': summarize(queue_residence(trace), 1000)
+    }
+
+
+def load_trace(paths: List[str], min_lamport: Optional[int] = None, max_lamport: Optional[int] = None) -> Trace:
+    """
+    Carga un .npz guardado, trazas columnares .ltrc o archivos JSONL (se admiten comodines).
+
+    Args:
+        paths: Archivos a leer
+        min_lamport, max_lamport: Conservar solo los eventos con Lamport en este rango
+    """
+    if len(paths) == 1 and paths[0].endswith('.npz'):
+        trace = Trace.load(paths[0])
+    else:
+        files = []
+        for path in paths:
+            files.extend(sorted(glob.glob(path)) or [path])
+        binary = [path for path in files if path.endswith(BINARY_EXTENSION)]
+        text = [path for path in files if not path.endswith(BINARY_EXTENSION)]
+        if not text:
+            return Trace.from_binary(binary, min_lamport, max_lamport)
+        trace = Trace.from_jsonl(text)
+        if binary:
+            trace = Trace.concatenate([trace, Trace.from_binary(binary, min_lamport, max_lamport)])
+
+    if min_lamport is None and max_lamport is None:
+        return trace
+    low = NO_LIMIT.min if min_lamport is None else min_lamport
+    high = NO_LIMIT.max if max_lamport is None else max_lamport
+    return trace.select((trace.lamport >= low) & (trace.lamport <= high))
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Análisis de trazas de eventos de Lamport")
+    parser.add_argument('paths', nargs='+', help="Archivos JSONL o .ltrc de EventPipeline, o una traza .npz")
+    parser.add_argument('--lamport', metavar='MIN:MAX',
+                        help="Analizar solo los eventos con Lamport en este rango (MIN o MAX pueden omitirse)")
+    parser.add_argument('--save', help="Guardar las columnas en este archivo .npz")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado en JSON")
+    args = parser.parse_args()
+
+    low, _, high = (args.lamport or ':').partition(':')
+    trace = load_trace(args.paths, int(low) if low else None, int(high) if high else None)
+    if args.save:
+        trace.save(args.save)
+    report = analyze(trace)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"🔎 Traza: {report['events']} eventos de {report['processes']} procesos")
+    print("=" * 64)
+    print(f"  {'Proceso':>8}{'eventos':>10}{'ticks':>10}{'segundos':>10}{'ticks/s':>10}")
+    for process, growth in sorted(report['clock_growth'].items())[:20]:
+        print(f"  {process:>8}{growth['events']:>10}{growth['ticks']:>10}"
+              f"{growth['seconds']:>10.1f}{growth['rate']:>10.2f}")
+    if report['processes'] > 20:
+        print(f"  ... y {report['processes'] - 20} procesos más")
+    print("-" * 64)
+    jumps = report['receive_jumps']
+    if jumps['count']:
+        print(f"  Saltos al recibir: {jumps['count']} (sin salto: {jumps['zero']}), "
+              f"p50 {jumps['p50']:.0f}, p99 {jumps['p99']:.0f}, máx {jumps['max']:.0f}")
+    hb = report['happens_before']
+    print(f"  Happens-before: {hb['checked']} recepciones, {hb['violations']} violaciones, "
+          f"{hb['unmatched']} sin envío en la traza")
+    print(f"  Broadcasts fuera de orden: {report['broadcast_inversions']['inversions']} de "
+          f"{report['broadcast_inversions']['events']}")
+    print(f"  Entregas fuera de orden en el servidor: {report['delivery_inversions']['inversions']} de "
+          f"{report['delivery_inversions']['events']}")
+    residence = report['queue_residence_ms']
+    if residence['count']:
+        print(f"  Residencia en cola: p50 {residence['p50']:.1f} ms, p99 {residence['p99']:.1f} ms, "
+              f"máx {residence['max']:.1f} ms")
+    print("=" * 64)
+    if args.save:
+        print(f"💾 Columnas guardadas en {args.save}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Trazado opcional de latencia de extremo a extremo para mensajes de Lamport.
+
+Un mensaje muestreado lleva un contexto de traza en el campo 'trace' con la
+marca de tiempo (time.time()) de cada salto:
+
+    client_send -> server_receive -> enqueue -> dequeue -> fanout -> client_receive
+
+Cada proceso registra en histogramas la duración de las etapas que conoce, y
+el cliente receptor del broadcast obtiene el desglose completo.
+"""
+
+import sys
+import time
+import uuid
+import struct
+import random
+import socket
+from typing import Dict, Optional, Tuple
+from metrics import MetricsRegistry
+
+# Saltos en el orden en que los recorre un mensaje
+TRACE_HOPS = ('client_send', 'server_receive', 'enqueue', 'dequeue', 'fanout', 'client_receive')
+
+# Etapa medida entre cada par de saltos consecutivos
+TRACE_STAGES = {
+    ('client_send', 'server_receive'): 'network_in',
+    ('server_receive', 'enqueue'): 'server_handling',
+    ('enqueue', 'dequeue'): 'ordering_queue',
+    ('dequeue', 'fanout'): 'dispatch',
+    ('fanout', 'client_receive'): 'network_out',
+}
+
+# SO_TIMESTAMPNS no está expuesto en el módulo socket; en Linux vale 35
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35 if sys.platform.startswith('linux') else None)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def enable_kernel_timestamps(sock: socket.socket) -> bool:
+    """
+    Activa las marcas de tiempo de recepción del kernel (SO_TIMESTAMPNS).
+
+    Returns:
+        True si el sistema las soporta
+    """
+    if SO_TIMESTAMPNS is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+        return True
+    except OSError:
+        return False
+
+
+def recv_with_timestamp(sock: socket.socket, bufsize: int, kernel_timestamps: bool) -> Tuple[bytes, tuple, float]:
+    """
+    Recibe un datagrama junto con su marca de tiempo de llegada.
+
+    Con marcas del kernel se usa el instante en que el datagrama llegó al
+    socket (sin el tiempo de espera en el buffer); si no, time.time().
+
+    Returns:
+        Tupla (datos, dirección, marca de tiempo en segundos)
+    """
+    if not kernel_timestamps:
+        data, address = sock.recvfrom(bufsize)
+        return data, address, time.time()
+
+    data, ancdata, _, address = sock.recvmsg(bufsize, socket.CMSG_SPACE(16))
+    for level, cmsg_type, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and cmsg_type == SO_TIMESTAMPNS:
+            seconds, nanoseconds = struct.unpack('qq', cmsg_data[:16])
+            return data, address, seconds + nanoseconds / 1e9
+    return data, address, time.time()
+
+
+class Tracer:
+    """Muestreo de trazas y registro de latencias por etapa."""
+
+    def __init__(self, sample_rate: float = 0.0, metrics: MetricsRegistry = None):
+        """
+        Inicializa el trazador.
+
+        Args:
+            sample_rate: Fracción de mensajes a trazar (0.0 a 1.0)
+            metrics: Registro donde guardar los histogramas (se crea uno si no se indica)
+        """
+        self.sample_rate = sample_rate
+        self.random = random.Random()
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.describe('lamport_trace_stage_seconds', 'histogram',
+                              'Latencia por etapa de mensajes trazados')
+
+    def start_trace(self) -> Optional[dict]:
+        """
+        Decide si trazar un mensaje nuevo.
+
+        Returns:
+            Contexto de traza con el salto 'client_send', o None si no se muestrea
+        """
+        if self.sample_rate <= 0 or self.random.random() >= self.sample_rate:
+            return None
+        return {'id': uuid.uuid4().hex[:16], 'client_send': time.time()}
+
+    @staticmethod
+    def mark(trace: Optional[dict], hop: str, timestamp: float = None):
+        """Registra un salto en el contexto de traza (si el mensaje está trazado)."""
+        if trace is not None:
+            trace[hop] = time.time() if timestamp is None else timestamp
+
+    def record(self, trace: dict) -> Dict[str, float]:
+        """
+        Registra las etapas completas de una traza en los histogramas.
+
+        Returns:
+            Duración de cada etapa registrada, incluida 'end_to_end'
+        """
+        stages = {}
+        for (start, end), stage in TRACE_STAGES.items():
+            if start in trace and end in trace:
+                stages[stage] = max(0.0, trace[end] - trace[start])
+
+        if 'client_send' in trace and 'client_receive' in trace:
+            stages['end_to_end'] = max(0.0, trace['client_receive'] - trace['client_send'])
+
+        for stage, duration in stages.items():
+            self.metrics.observe('lamport_trace_stage_seconds', duration, (('stage', stage),))
+        return stages
+
+    def percentiles(self, quantiles: Tuple[float, ...] = DEFAULT_QUANTILES) -> Dict[str, Dict[str, float]]:
+        """
+        Obtiene los percentiles de latencia por etapa.
+
+        Returns:
+            {etapa: {'p50': segundos, ...}} para las etapas con observaciones
+        """
+        report = {}
+        for stage in list(TRACE_STAGES.values()) + ['end_to_end']:
+            labels = (('stage', stage),)
+            values = {f"p{q * 100:g}": self.metrics.quantile('lamport_trace_stage_seconds', q, labels)
+                      for q in quantiles}
+            if any(value is not None for value in values.values()):
+                report[stage] = values
+        return report
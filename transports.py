@@ -0,0 +1,313 @@
+"""
+Transportes intercambiables entre clientes y servidor.
+
+El protocolo (JSON, ver udp_server.py) es el mismo en todos; cambia cómo
+viaja cada mensaje:
+
+- 'udp': datagramas UDP (el transporte original, también para máquinas remotas).
+- 'unix': datagramas AF_UNIX para procesos locales; no pasan por la pila IP
+  y admiten mensajes de hasta 64 KB. El servidor escucha en
+  `default_unix_path(puerto)`.
+- 'tcp': TCP con mensajes prefijados por su longitud (4 bytes, big-endian),
+  para productores masivos: mensajes grandes, control de flujo del kernel
+  y varias solicitudes en vuelo por conexión (el servidor procesa cada
+  mensaje en cuanto lo lee, sin esperar a responder el anterior). El
+  servidor escucha por defecto en el mismo número de puerto que UDP
+  (`UDPServer.tcp_port`).
+- 'shm': memoria compartida para procesos locales (shm_transport.py).
+
+Del lado del cliente, `open_client_socket` devuelve un objeto con la
+interfaz de socket UDP que usa LamportClient (sendto/recvfrom/settimeout/
+close): `sendto` ignora la dirección y `recvfrom` nunca trunca. Del lado
+del servidor, cada conexión es un objeto con `send(datos) -> bool` y
+`close()`, identificado por una pseudo-dirección (par, puerto, transporte).
+"""
+
+import os
+import socket
+import select
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+from shm_transport import ShmSocket
+
+TRANSPORTS = ('udp', 'unix', 'tcp', 'shm')
+
+# Transportes que solo llegan desde la máquina local
+LOCAL_TRANSPORTS = ('unix', 'shm')
+
+# Prefijo de longitud de los mensajes TCP y tamaño máximo aceptado
+FRAME = struct.Struct('!I')
+MAX_FRAME = 16 * 1024 * 1024
+
+# Tamaño de lectura de los datagramas AF_UNIX (el límite práctico del kernel es similar)
+MAX_UNIX_DATAGRAM = 65536
+
+
+def default_unix_path(port: int) -> str:
+    """Ruta del socket AF_UNIX del servidor que escucha en `port`."""
+    return os.path.join(tempfile.gettempdir(), f"lamport-{port}.sock")
+
+
+def frame(data: bytes) -> bytes:
+    """Antepone la longitud a un mensaje TCP."""
+    if len(data) > MAX_FRAME:
+        raise ValueError(f"Mensaje de {len(data)} bytes mayor que el máximo de {MAX_FRAME}")
+    return FRAME.pack(len(data)) + data
+
+
+class FrameReader:
+    """Separa en mensajes los bytes recibidos por TCP (conserva los incompletos)."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes):
+        self.buffer += data
+
+    def next(self) -> Optional[bytes]:
+        """
+        Próximo mensaje completo, o None si todavía falta recibir.
+
+        Raises:
+            ValueError: Si la longitud anunciada supera MAX_FRAME
+        """
+        buffer = self.buffer
+        if len(buffer) < FRAME.size:
+            return None
+        (length,) = FRAME.unpack_from(buffer)
+        if length > MAX_FRAME:
+            raise ValueError(f"Mensaje de {length} bytes mayor que el máximo de {MAX_FRAME}")
+        end = FRAME.size + length
+        if len(buffer) < end:
+            return None
+        data = bytes(buffer[FRAME.size:end])
+        del buffer[:end]
+        return data
+
+
+class FramedSocket:
+    """Extremo de cliente TCP con la interfaz de socket UDP de LamportClient."""
+
+    def __init__(self, server_host: str = 'localhost', server_port: int = 5000):
+        """Se conecta con el primer envío."""
+        self.server = (server_host, server_port)
+        self.sock: Optional[socket.socket] = None
+        self.timeout: Optional[float] = None
+        self.reader = FrameReader()
+        self.send_lock = threading.Lock()
+
+    def connect(self):
+        """Abre la conexión con el servidor."""
+        sock = socket.create_connection(self.server, timeout=5.0)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        self.sock = sock
+
+    def sendto(self, data: bytes, address=None) -> int:
+        """Envía un mensaje sin esperar la respuesta de los anteriores."""
+        with self.send_lock:
+            if self.sock is None:
+                self.connect()
+            self.sock.sendall(frame(data))
+        return len(data)
+
+    def recvfrom(self, bufsize: int = 0) -> tuple:
+        """
+        Recibe el próximo mensaje completo respetando el timeout del socket.
+
+        Sin conexión se comporta como UDP sin servidor: espera el timeout y
+        el próximo envío vuelve a conectar.
+
+        Raises:
+            socket.timeout: Si no se completa un mensaje a tiempo (lo leído se conserva)
+            ConnectionError: Si el servidor acaba de cerrar la conexión
+        """
+        while True:
+            data = self.reader.next()
+            if data is not None:
+                return data, self.server
+            sock = self.sock
+            if sock is None:
+                time.sleep(1.0 if self.timeout is None else self.timeout)
+                raise socket.timeout("timed out")
+            chunk = sock.recv(65536)
+            if not chunk:
+                with self.send_lock:
+                    sock.close()
+                    self.sock = None
+                    self.reader = FrameReader()
+                raise ConnectionError("El servidor cerró la conexión")
+            self.reader.feed(chunk)
+
+    def settimeout(self, timeout: Optional[float]):
+        self.timeout = timeout
+        if self.sock is not None:
+            self.sock.settimeout(timeout)
+
+    def gettimeout(self) -> Optional[float]:
+        return self.timeout
+
+    def close(self):
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # Despierta al hilo que esté en recv
+            except OSError:
+                pass
+            sock.close()
+
+
+class UnixDatagramSocket:
+    """Extremo de cliente AF_UNIX con la interfaz de socket UDP de LamportClient."""
+
+    def __init__(self, server_path: str):
+        """
+        Se conecta al servidor con el primer envío.
+
+        Args:
+            server_path: Socket del servidor (ver default_unix_path)
+        """
+        self.server_path = server_path
+        # El cliente necesita una ruta propia para recibir las respuestas
+        self.path = os.path.join(tempfile.gettempdir(), f"lamport-client-{uuid.uuid4().hex[:16]}.sock")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.connected = False
+
+    def sendto(self, data: bytes, address=None) -> int:
+        if not self.connected:
+            # Conectado al servidor, sus respuestas no quedan limitadas por net.unix.max_dgram_qlen
+            self.sock.connect(self.server_path)
+            self.connected = True
+        return self.sock.send(data)
+
+    def recvfrom(self, bufsize: int = 0) -> tuple:
+        data, _ = self.sock.recvfrom(MAX_UNIX_DATAGRAM)
+        return data, self.server_path
+
+    def settimeout(self, timeout: Optional[float]):
+        self.sock.settimeout(timeout)
+
+    def gettimeout(self) -> Optional[float]:
+        return self.sock.gettimeout()
+
+    def close(self):
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def open_client_socket(transport: str, server_host: str = 'localhost', server_port: int = 5000):
+    """
+    Abre el extremo de cliente de un transporte.
+
+    Raises:
+        ValueError: Si el transporte no existe
+    """
+    if transport == 'udp':
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if transport == 'unix':
+        return UnixDatagramSocket(default_unix_path(server_port))
+    if transport == 'tcp':
+        return FramedSocket(server_host, server_port)
+    if transport == 'shm':
+        return ShmSocket(server_host, server_port)
+    raise ValueError(f"Transporte desconocido: {transport} (opciones: {', '.join(TRANSPORTS)})")
+
+
+class UnixPeer:
+    """Cliente AF_UNIX visto desde el servidor: responde por el socket del servidor."""
+
+    def __init__(self, sock: socket.socket, path: str):
+        self.sock = sock
+        self.path = path
+
+    def send(self, data: bytes) -> bool:
+        """Envía sin bloquear; False si el buffer de envío está lleno o el cliente ya no existe."""
+        try:
+            self.sock.sendto(data, socket.MSG_DONTWAIT, self.path)
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        pass
+
+
+class FramedConnection:
+    """Conexión TCP aceptada por el servidor."""
+
+    def __init__(self, sock: socket.socket, send_timeout: float = 1.0):
+        """
+        Args:
+            sock: Socket aceptado
+            send_timeout: Espera máxima por un cliente que no lee; pasada, se cierra la conexión
+        """
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(send_timeout)
+        self.sock = sock
+        self.reader = FrameReader()
+        self.pending = deque()
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self.peer_closed = False
+
+    def send(self, data: bytes) -> bool:
+        """Envía un mensaje; False si la conexión está cerrada o el cliente no lee."""
+        with self.send_lock:
+            if self.closed:
+                return False
+            try:
+                self.sock.sendall(frame(data))
+                return True
+            except OSError:
+                # Un envío a medias desincroniza el flujo: no queda más que cerrar
+                self.close()
+                return False
+
+    def recv(self, timeout: float) -> Optional[bytes]:
+        """Próximo mensaje del cliente (None si no llega en `timeout` o se cerró)."""
+        if self.pending:
+            return self.pending.popleft()
+        if self.closed or self.peer_closed:
+            return None
+        try:
+            readable, _, _ = select.select([self.sock], [], [], timeout)
+            if not readable:
+                return None
+            chunk = self.sock.recv(65536)
+        except (OSError, ValueError):
+            self.peer_closed = True
+            return None
+        if not chunk:
+            self.peer_closed = True
+            return None
+
+        # Un mismo recv puede traer varios mensajes en vuelo
+        self.reader.feed(chunk)
+        try:
+            while True:
+                data = self.reader.next()
+                if data is None:
+                    break
+                self.pending.append(data)
+        except ValueError:
+            self.peer_closed = True
+        return self.pending.popleft() if self.pending else None
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,116 @@
+"""
+Captura de datagramas UDP entrantes del servidor (formato .lcap).
+
+`UDPServer(capture_path=...)` guarda cada datagrama tal como llegó, con su
+instante de llegada y la dirección de origen, para reproducirlo después con
+replay_udp.py contra un servidor nuevo.
+
+Formato: cabecera b'LAMUDPCP' + versión, y luego registros de 20 bytes
+(tipo, longitud, origen, instante en ns) seguidos de su contenido. Las
+direcciones se guardan una sola vez (registro de tipo dirección) y los
+datagramas las referencian por índice. Un registro incompleto al final
+(servidor interrumpido) se ignora al leer.
+
+La versión 2 guarda la longitud en 4 bytes: los mensajes TCP (transports.py)
+pueden superar los 64 KB. Las capturas de la versión 1 se siguen leyendo.
+"""
+
+import json
+import struct
+from typing import List, NamedTuple, Tuple
+
+EXTENSION = '.lcap'
+MAGIC = b'LAMUDPCP'
+VERSION = 2
+
+HEADER = struct.Struct('<8sI4x')
+RECORD = struct.Struct('<B3xIIq')
+
+# Registros por versión del archivo (la 1 tenía la longitud de 2 bytes)
+RECORDS = {1: struct.Struct('<BxHIq'), 2: RECORD}
+
+# Tipos de registro
+DATAGRAM = 0
+ADDRESS = 1
+
+
+class CapturedDatagram(NamedTuple):
+    """Datagrama capturado."""
+    time_ns: int      # Instante de llegada (reloj de pared o del kernel, en ns)
+    source: int       # Índice de la dirección de origen
+    data: bytes
+
+
+class CaptureWriter:
+    """
+    Escritor de capturas con buffer.
+
+    Solo lo usa el hilo receptor del servidor; lo pendiente se escribe al cerrar.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1024 * 1024):
+        """
+        Args:
+            path: Archivo de destino (se sobrescribe)
+            buffer_size: Tamaño del buffer de escritura
+        """
+        self.path = path
+        self.file = open(path, 'wb', buffering=buffer_size)
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.sources = {}
+        self.count = 0
+
+    def record(self, data: bytes, address: tuple, received_at: float):
+        """
+        Guarda un datagrama.
+
+        Args:
+            data: Contenido crudo
+            address: Dirección de origen
+            received_at: Instante de llegada en segundos
+        """
+        source = self.sources.get(address)
+        if source is None:
+            source = self.sources[address] = len(self.sources)
+            encoded = json.dumps(list(address)).encode()
+            self.file.write(RECORD.pack(ADDRESS, len(encoded), source, 0) + encoded)
+        self.file.write(RECORD.pack(DATAGRAM, len(data), source, int(received_at * 1e9)) + data)
+        self.count += 1
+
+    def close(self):
+        """Escribe lo pendiente y cierra el archivo."""
+        self.file.close()
+
+
+def read_capture(path: str) -> Tuple[List[CapturedDatagram], List[tuple]]:
+    """
+    Lee una captura completa.
+
+    Returns:
+        (datagramas en orden de llegada, direcciones de origen por índice)
+
+    Raises:
+        ValueError: Si el archivo no es una captura de este formato
+    """
+    with open(path, 'rb') as f:
+        buffer = f.read()
+    magic, version = HEADER.unpack_from(buffer, 0) if len(buffer) >= HEADER.size else (None, None)
+    if magic != MAGIC or version not in RECORDS:
+        raise ValueError(f"No es una captura {EXTENSION} (versiones {', '.join(map(str, RECORDS))})")
+    record = RECORDS[version]
+
+    datagrams: List[CapturedDatagram] = []
+    sources: List[tuple] = []
+    position = HEADER.size
+    while position + record.size <= len(buffer):
+        kind, length, source, time_ns = record.unpack_from(buffer, position)
+        start = position + record.size
+        if start + length > len(buffer):
+            break
+        data = buffer[start:start + length]
+        if kind == DATAGRAM:
+            datagrams.append(CapturedDatagram(time_ns, source, data))
+        elif kind == ADDRESS:
+            sources.append(tuple(json.loads(data)))
+        position = start + length
+    return datagrams, sources
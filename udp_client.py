@@ -1,66 +1,59 @@
 """
 Cliente UDP con interfaz gráfica que implementa el algoritmo de Lamport.
 Se conecta al servidor UDP y permite enviar mensajes y eventos internos.
+
+El protocolo vive en lamport_client.py; este módulo solo agrega la ventana y
+no importa tkinter hasta crearla. Con --headless (o sin tkinter disponible)
+el cliente se ejecuta sin interfaz.
 """
 
-import socket
-import threading
-import json
-import time
-import random
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-from lamport_clock import LamportClock
-from typing import Optional
+from lamport_client import LamportClient
+
+# tkinter se importa bajo demanda en load_tkinter()
+tk = None
+scrolledtext = None
+messagebox = None
+
+# Repintado de la GUI: a lo sumo un cuadro cada EVENT_FRAME_MS (~30 Hz)
+EVENT_FRAME_MS = 33
+MAX_EVENT_LINES = 500
 
-class UDPClient:
+def load_tkinter():
+    """Importa tkinter solo cuando se crea la interfaz."""
+    global tk, scrolledtext, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import scrolledtext as tk_scrolledtext, messagebox as tk_messagebox
+        tk, scrolledtext, messagebox = tkinter, tk_scrolledtext, tk_messagebox
+
+def tkinter_available() -> bool:
+    """Indica si tkinter puede importarse en este entorno."""
+    try:
+        load_tkinter()
+        return True
+    except ImportError:
+        return False
+
+class UDPClient(LamportClient):
     """Cliente UDP con interfaz gráfica que implementa algoritmo de Lamport."""
     
-    def __init__(self, client_id: int, client_name: str, server_host='localhost', server_port=5000):
-        self.client_id = client_id
-        self.client_name = client_name
-        self.server_host = server_host
-        self.server_port = server_port
-        
-        # Socket UDP
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.settimeout(5.0)
-        
-        # Reloj lógico de Lamport
-        self.lamport_clock = LamportClock(client_id, client_name)
-        
-        # Estado de conexión
-        self.connected = False
-        self.running = False
-        
-        # Lista de eventos
-        self.events = []
-        self.events_lock = threading.Lock()
-        
-        # Contador de mensajes
-        self.message_counter = 0
+    def __init__(self, client_id: int, client_name: str, server_host='localhost', server_port=5000,
+                 trace_sample_rate: float = 0.0, transport: str = 'udp'):
+        # Se retienen más eventos que líneas visibles para no perder ninguno entre cuadros
+        super().__init__(client_id, client_name, server_host, server_port,
+                         trace_sample_rate=trace_sample_rate, auto_event_interval=(8, 15),
+                         event_capacity=4 * MAX_EVENT_LINES, transport=transport)
         
         # Interfaz gráfica
         self.root = None
+        self.events_text = None
+        self.last_event_seq = -1  # Último evento agregado al widget
+        self.displayed_clock = None
         self.setup_gui()
         
-    def add_event(self, description: str):
-        """Agrega un evento al log."""
-        with self.events_lock:
-            timestamp = time.strftime('%H:%M:%S')
-            event = f"[{timestamp}] {description}"
-            self.events.append(event)
-            if len(self.events) > 100:
-                self.events.pop(0)
-            
-            # Actualizar GUI si existe
-            if self.root:
-                self.root.after(0, lambda: self.update_events_display())
-            
-            print(f"[{self.client_name}] {description}")
-    
     def setup_gui(self):
-        """Configura la interfaz gráfica."""
+        """Configura la interfaz gráfica (importa tkinter en este momento)."""
+        load_tkinter()
         self.root = tk.Tk()
         self.root.title(f"{self.client_name} - Algoritmo de Lamport")
         self.root.geometry("800x600")
@@ -101,15 +94,18 @@ class UDPClient:
         action_frame.pack(fill="x", padx=10, pady=10)
         
         # Botones de control
-        tk.Button(action_frame, text="Conectar", command=self.connect_to_server,
+        tk.Button(action_frame, text="Conectar", command=self.on_connect,
                  bg="#28a745", fg="white", font=("Arial", 10)).pack(side="left", padx=5)
         
-        tk.Button(action_frame, text="Desconectar", command=self.disconnect,
+        tk.Button(action_frame, text="Desconectar", command=self.on_disconnect,
                  bg="#dc3545", fg="white", font=("Arial", 10)).pack(side="left", padx=5)
         
         tk.Button(action_frame, text="Evento Interno", command=self.internal_event,
                  bg="#007bff", fg="white", font=("Arial", 10)).pack(side="left", padx=5)
         
+        tk.Button(action_frame, text="Historial", command=self.on_catch_up,
+                 bg="#6c757d", fg="white", font=("Arial", 10)).pack(side="left", padx=5)
+        
         # Frame para envío de mensajes
         message_frame = tk.Frame(self.root, bg="#f0f0f0")
         message_frame.pack(fill="x", padx=10, pady=5)
@@ -118,9 +114,9 @@ class UDPClient:
         
         self.message_entry = tk.Entry(message_frame, font=("Arial", 10), width=50)
         self.message_entry.pack(side="left", padx=5, fill="x", expand=True)
-        self.message_entry.bind("<Return>", lambda e: self.send_message())
+        self.message_entry.bind("<Return>", lambda e: self.on_send())
         
-        tk.Button(message_frame, text="Enviar", command=self.send_message,
+        tk.Button(message_frame, text="Enviar", command=self.on_send,
                  bg="#28a745", fg="white", font=("Arial", 10)).pack(side="right", padx=5)
         
         # Área de eventos
@@ -134,69 +130,31 @@ class UDPClient:
                                                     font=("Courier", 9), bg="#fff3cd")
         self.events_text.pack(fill="both", expand=True, pady=5)
         
-        # Iniciar actualizador de reloj
-        self.update_clock_display()
+        # Iniciar el repintado periódico (reloj y eventos nuevos)
+        self.render_frame()
         
         # Al cerrar ventana
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
-    def connect_to_server(self):
-        """Conecta al servidor UDP."""
+    def on_connect(self):
+        """Botón Conectar."""
         if self.connected:
             messagebox.showwarning("Advertencia", "Ya está conectado al servidor")
             return
         
-        try:
-            # Enviar registro
-            timestamp = self.lamport_clock.send_event()
-            register_data = {
-                'type': 'register',
-                'client_id': self.client_id,
-                'client_name': self.client_name,
-                'timestamp': timestamp
-            }
-            
-            message = json.dumps(register_data).encode()
-            self.socket.sendto(message, (self.server_host, self.server_port))
+        if self.connect_to_server():
+            self.status_label.config(text="Conectado", fg="#28a745")
             
-            # Esperar respuesta
-            try:
-                data, _ = self.socket.recvfrom(1024)
-                response = json.loads(data.decode())
-                
-                if response.get('type') == 'register_response' and response.get('status') == 'success':
-                    self.connected = True
-                    self.running = True
-                    
-                    # Actualizar reloj con respuesta del servidor
-                    server_timestamp = response.get('server_timestamp', 0)
-                    new_time = self.lamport_clock.receive_event(server_timestamp)
-                    
-                    self.add_event(f"Conectado al servidor - Reloj: {new_time}")
-                    self.status_label.config(text="Conectado", fg="#28a745")
-                    
-                    # Iniciar hilos
-                    self.start_background_threads()
-                    
-                else:
-                    self.add_event("Error en registro con servidor")
-                    
-            except socket.timeout:
-                self.add_event("Timeout conectando al servidor")
-                
-        except Exception as e:
-            self.add_event(f"Error conectando: {e}")
-            messagebox.showerror("Error", f"No se pudo conectar al servidor: {e}")
+            # Iniciar hilos
+            self.start_background_threads()
     
-    def disconnect(self):
-        """Desconecta del servidor."""
-        self.running = False
-        self.connected = False
+    def on_disconnect(self):
+        """Botón Desconectar (conserva el socket para poder reconectar)."""
+        self.disconnect(close_socket=False)
         self.status_label.config(text="Desconectado", fg="#dc3545")
-        self.add_event("Desconectado del servidor")
     
-    def send_message(self):
-        """Envía un mensaje al servidor."""
+    def on_send(self):
+        """Botón Enviar: envía el contenido del campo de mensaje."""
         if not self.connected:
             messagebox.showwarning("Advertencia", "No está conectado al servidor")
             return
@@ -205,148 +163,62 @@ class UDPClient:
         if not message_content:
             return
         
-        try:
-            # Incrementar reloj antes de enviar
-            timestamp = self.lamport_clock.send_event()
-            self.message_counter += 1
-            
-            message_data = {
-                'type': 'message',
-                'sender_id': self.client_id,
-                'sender_name': self.client_name,
-                'content': message_content,
-                'timestamp': timestamp,
-                'message_id': self.message_counter
-            }
-            
-            message = json.dumps(message_data).encode()
-            self.socket.sendto(message, (self.server_host, self.server_port))
-            
-            self.add_event(f"Mensaje enviado [T:{timestamp}]: {message_content}")
+        if self.send_message(message_content):
             self.message_entry.delete(0, tk.END)
-            
-        except Exception as e:
-            self.add_event(f"Error enviando mensaje: {e}")
     
-    def internal_event(self):
-        """Realiza un evento interno."""
-        new_time = self.lamport_clock.increment()
-        self.add_event(f"Evento interno - Nuevo reloj: {new_time}")
+    def on_catch_up(self):
+        """Botón Historial: solicita todos los mensajes entregados."""
+        if not self.connected:
+            messagebox.showwarning("Advertencia", "No está conectado al servidor")
+            return
         
-        # Notificar al servidor del evento interno
-        if self.connected:
-            try:
-                event_data = {
-                    'type': 'internal_event',
-                    'client_id': self.client_id,
-                    'timestamp': new_time
-                }
-                message = json.dumps(event_data).encode()
-                self.socket.sendto(message, (self.server_host, self.server_port))
-            except Exception as e:
-                self.add_event(f"Error notificando evento interno: {e}")
-    
-    def start_background_threads(self):
-        """Inicia hilos en segundo plano."""
-        # Hilo para recibir mensajes
-        receive_thread = threading.Thread(target=self.receive_messages, daemon=True)
-        receive_thread.start()
-        
-        # Hilo para heartbeat
-        heartbeat_thread = threading.Thread(target=self.heartbeat, daemon=True)
-        heartbeat_thread.start()
-        
-        # Hilo para eventos internos automáticos
-        auto_events_thread = threading.Thread(target=self.auto_internal_events, daemon=True)
-        auto_events_thread.start()
-    
-    def receive_messages(self):
-        """Recibe mensajes del servidor."""
-        while self.running:
-            try:
-                data, _ = self.socket.recvfrom(1024)
-                message_data = json.loads(data.decode())
-                
-                msg_type = message_data.get('type')
-                
-                if msg_type == 'broadcast':
-                    self.handle_broadcast(message_data)
-                elif msg_type == 'message_ack':
-                    self.handle_message_ack(message_data)
-                elif msg_type == 'heartbeat_ack':
-                    pass  # Solo para mantener conexión
-                    
-            except socket.timeout:
-                continue
-            except Exception as e:
-                if self.running:
-                    self.add_event(f"Error recibiendo mensajes: {e}")
-    
-    def handle_broadcast(self, data: dict):
-        """Maneja un mensaje broadcast del servidor."""
-        sender_id = data.get('sender_id')
-        content = data.get('content')
-        original_timestamp = data.get('original_timestamp')
-        server_timestamp = data.get('server_timestamp')
-        
-        # Actualizar reloj con timestamp del servidor
-        new_time = self.lamport_clock.receive_event(server_timestamp)
-        
-        self.add_event(f"Mensaje de Cliente-{sender_id} [T:{original_timestamp}]: {content}")
-        self.add_event(f"Reloj actualizado a: {new_time}")
-    
-    def handle_message_ack(self, data: dict):
-        """Maneja confirmación de mensaje."""
-        server_timestamp = data.get('server_timestamp')
-        new_time = self.lamport_clock.receive_event(server_timestamp)
-        self.add_event(f"Mensaje confirmado por servidor - Reloj: {new_time}")
+        self.request_catch_up()
     
-    def heartbeat(self):
-        """Envía heartbeat al servidor."""
-        while self.running:
-            try:
-                time.sleep(10)  # Heartbeat cada 10 segundos
-                if self.connected:
-                    heartbeat_data = {
-                        'type': 'heartbeat',
-                        'client_id': self.client_id,
-                        'timestamp': self.lamport_clock.get_time()
-                    }
-                    message = json.dumps(heartbeat_data).encode()
-                    self.socket.sendto(message, (self.server_host, self.server_port))
-            except Exception as e:
-                if self.running:
-                    self.add_event(f"Error en heartbeat: {e}")
-    
-    def auto_internal_events(self):
-        """Genera eventos internos automáticamente."""
-        while self.running:
-            time.sleep(random.randint(8, 15))  # Evento cada 8-15 segundos
-            if self.connected:
-                self.internal_event()
-    
-    def update_clock_display(self):
-        """Actualiza la visualización del reloj."""
-        if self.root:
-            self.clock_label.config(text=str(self.lamport_clock.get_time()))
-            self.root.after(1000, self.update_clock_display)  # Actualizar cada segundo
+    def render_frame(self):
+        """
+        Repinta la GUI una vez por cuadro.
+        
+        Los hilos de red solo registran eventos; este tick del hilo de la GUI
+        agrega de una vez los eventos nuevos, por lo que una ráfaga de miles de
+        eventos cuesta a lo sumo un repintado por cuadro.
+        """
+        if not self.root:
+            return
+        
+        clock_time = self.lamport_clock.get_time()
+        if clock_time != self.displayed_clock:
+            self.clock_label.config(text=str(clock_time))
+            self.displayed_clock = clock_time
+        
+        self.update_events_display()
+        self.root.after(EVENT_FRAME_MS, self.render_frame)
     
     def update_events_display(self):
-        """Actualiza la visualización de eventos."""
-        if self.events_text:
-            self.events_text.delete(1.0, tk.END)
-            with self.events_lock:
-                recent_events = self.events[-50:] if len(self.events) > 50 else self.events
-                for event in recent_events:
-                    self.events_text.insert(tk.END, event + "\n")
-            
-            # Scroll al final
-            self.events_text.see(tk.END)
+        """Agrega al widget solo los eventos nuevos, conservando las últimas MAX_EVENT_LINES líneas."""
+        ring = self.event_log.ring
+        if not self.events_text or ring.next_seq - 1 == self.last_event_seq:
+            return
+        
+        # Si llegaron más eventos de los que caben, mostrar solo los últimos
+        start = max(self.last_event_seq, ring.next_seq - MAX_EVENT_LINES - 1)
+        entries = ring.after(start, MAX_EVENT_LINES)
+        if not entries:
+            return
+        self.last_event_seq = entries[-1].seq
+        
+        self.events_text.insert(tk.END, ''.join(entry.item.line() + "\n" for entry in entries))
+        
+        # Recortar las líneas más antiguas
+        line_count = int(self.events_text.index('end-1c').split('.')[0]) - 1
+        if line_count > MAX_EVENT_LINES:
+            self.events_text.delete('1.0', f"{line_count - MAX_EVENT_LINES + 1}.0")
+        
+        # Scroll al final
+        self.events_text.see(tk.END)
     
     def on_closing(self):
         """Maneja el cierre de la ventana."""
-        self.disconnect()
-        self.socket.close()
+        self.close()
         self.root.destroy()
     
     def run(self):
@@ -359,20 +231,38 @@ def main():
     """Función principal para crear y ejecutar un cliente."""
     import sys
     
-    # Obtener parámetros desde línea de comandos o usar valores por defecto
-    if len(sys.argv) >= 3:
-        client_id = int(sys.argv[1])
-        client_name = sys.argv[2]
+    args = [arg for arg in sys.argv[1:] if arg != '--headless' and not arg.startswith('--transport=')]
+    headless = '--headless' in sys.argv[1:]
+    
+    # Transporte: --transport=udp|unix|tcp|shm (ver transports.py)
+    transport = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--transport=')), 'udp')
+    
+    # Obtener parámetros desde línea de comandos: ID NOMBRE [SERVIDOR [PUERTO]]
+    if len(args) >= 2:
+        client_id = int(args[0])
+        client_name = args[1]
+    elif headless:
+        print("Uso: python udp_client.py --headless ID NOMBRE [SERVIDOR [PUERTO]]")
+        sys.exit(2)
     else:
         client_id = int(input("Ingrese ID del cliente (1-99): "))
         client_name = input("Ingrese nombre del cliente: ") or f"Cliente-{client_id}"
     
-    server_host = input("Servidor (localhost): ").strip() or "localhost"
-    server_port = int(input("Puerto del servidor (5000): ") or "5000")
+    # Sin interfaz no se pregunta nada: lo que falte toma el valor por defecto
+    if len(args) >= 3 or headless:
+        server_host = args[2] if len(args) >= 3 else "localhost"
+        server_port = int(args[3]) if len(args) >= 4 else 5000
+    else:
+        server_host = input("Servidor (localhost): ").strip() or "localhost"
+        server_port = int(input("Puerto del servidor (5000): ") or "5000")
     
-    # Crear y ejecutar cliente
-    client = UDPClient(client_id, client_name, server_host, server_port)
-    client.run()
+    # Crear y ejecutar cliente (sin interfaz si se pide o si no hay tkinter)
+    if headless or not tkinter_available():
+        LamportClient(client_id, client_name, server_host, server_port,
+                      auto_event_interval=(8, 15), transport=transport).run_headless()
+    else:
+        client = UDPClient(client_id, client_name, server_host, server_port, transport=transport)
+        client.run()
 
 if __name__ == '__main__':
     main()
@@ -3,23 +3,66 @@ Servidor UDP con algoritmo de Lamport para sincronización de procesos distribui
 Mantiene el orden de mensajes usando relojes lógicos.
 """
 
+import os
+import signal
 import socket
 import threading
 import json
 import time
 from typing import Dict, List, Tuple
 from lamport_clock import LamportClock
+from metrics import MetricsRegistry
+from event_log import EventPipeline, INFO, WARNING, ERROR
+from profiler import SpanProfiler
+from snapshot import SnapshotPublisher
+from timebase import SYSTEM
+from tracing import Tracer, enable_kernel_timestamps, recv_with_timestamp
+from udp_capture import CaptureWriter
+from shm_transport import attach_channel
+from transports import (LOCAL_TRANSPORTS, MAX_UNIX_DATAGRAM, FramedConnection, UnixPeer,
+                        default_unix_path)
 import heapq
+import bisect
 from collections import defaultdict
 
+# Tamaño máximo de datagrama que leen los clientes (recvfrom(1024))
+MAX_DATAGRAM_SIZE = 1024
+
+# Nombre del span del perfilador para cada tipo de mensaje
+HANDLER_SPANS = {
+    'register': 'handle_registration',
+    'message': 'handle_client_message',
+    'heartbeat': 'handle_heartbeat',
+    'internal_event': 'handle_internal_event',
+    'catch_up': 'handle_catch_up',
+    'metrics': 'handle_metrics_request',
+    'profiler': 'handle_profiler_command',
+    'shm_attach': 'handle_shm_attach'
+}
+
+# Direcciones de origen consideradas locales (comandos de perfilador, memoria compartida)
+LOCAL_ADDRESSES = ('127.0.0.1', '::1', 'localhost')
+
+# Intentos de encontrar un puerto efímero libre a la vez en UDP y TCP
+BIND_ATTEMPTS = 20
+
+def is_int(value) -> bool:
+    """Indica si un valor JSON es un entero (los booleanos de JSON no cuentan)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_local(address: tuple) -> bool:
+    """Indica si una dirección (UDP o pseudo-dirección de otro transporte) es de la máquina local."""
+    return address[0] in LOCAL_ADDRESSES or (len(address) > 2 and address[2] in LOCAL_TRANSPORTS)
+
 class Message:
     """Clase para representar un mensaje con timestamp de Lamport."""
-    def __init__(self, sender_id: int, content: str, timestamp: int, message_id: int):
+    def __init__(self, sender_id: int, content: str, timestamp: int, message_id: int, trace: dict = None):
         self.sender_id = sender_id
         self.content = content
         self.timestamp = timestamp
         self.message_id = message_id
         self.received_time = time.time()
+        self.trace = trace  # Contexto de traza opcional (ver tracing.py)
     
     def __lt__(self, other):
         """Comparación para ordenar mensajes según algoritmo de Lamport."""
@@ -33,48 +76,130 @@ class Message:
 class UDPServer:
     """Servidor UDP que implementa el algoritmo de Lamport."""
     
-    def __init__(self, host='localhost', port=5000):
+    def __init__(self, host='localhost', port=5000, clock_state_path=None,
+                 history_limit=1000, catch_up_batch_size=10, catch_up_interval=0.05,
+                 kernel_timestamps=False, profile_dir='profiles',
+                 log_stdout=True, log_path=None, log_level=INFO, log_sample_rates=None,
+                 process_interval=0.5, timebase=None, capture_path=None, transports=(), tcp_port=None):
         self.host = host
         self.port = port
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         
-        # Reloj lógico del servidor
-        self.lamport_clock = LamportClock(0, "Servidor-UDP")
+        # Perfilador activable en tiempo de ejecución (datagrama 'profiler' o SIGUSR1)
+        self.profiler = SpanProfiler('udp_server', output_dir=profile_dir)
+        
+        # Reloj lógico del servidor (con marca de agua alta persistente opcional)
+        self.lamport_clock = LamportClock(0, "Servidor-UDP", persist_path=clock_state_path)
+        self.lamport_clock.lock = self.profiler.wrap_lock(self.lamport_clock.lock, 'LamportClock.lock')
         
         # Clientes conectados: {client_id: (address, last_seen)}
         self.connected_clients = {}
-        self.clients_lock = threading.Lock()
+        self.clients_lock = self.profiler.wrap_lock(threading.Lock(), 'clients_lock')
         
         # Cola de mensajes ordenada por timestamp de Lamport
         self.message_queue = []
-        self.queue_lock = threading.Lock()
+        self.queue_lock = self.profiler.wrap_lock(threading.Lock(), 'queue_lock')
+        
+        # Pausa entre entregas ordenadas (0 = entregar en cuanto haya mensajes)
+        self.process_interval = process_interval
+        self.queue_ready = threading.Event()
+        
+        # Base de tiempo de los temporizadores (virtual en pruebas, ver timebase.py)
+        self.timebase = timebase or SYSTEM
         
         # Contadores de mensajes por cliente
         self.message_counters = defaultdict(int)
         
-        # Lista de eventos para mostrar
-        self.events = []
-        self.events_lock = threading.Lock()
+        # Historial acotado de mensajes entregados, ordenado por (timestamp, sender_id)
+        # Entradas: (timestamp, sender_id, message_id, content)
+        self.delivered_history = []
+        self.history_lock = threading.Lock()
+        self.history_limit = history_limit
+        
+        # Parámetros de envío del historial a clientes que se unen tarde
+        self.catch_up_batch_size = catch_up_batch_size
+        self.catch_up_interval = catch_up_interval
+        self.catch_ups_active = set()  # (dirección, client_id) con un envío de historial en curso
+        
+        # Registro de eventos estructurado: escritura asíncrona a stdout, JSONL o traza columnar
+        self.event_log = EventPipeline(
+            0, "Servidor-UDP", self.lamport_clock,
+            stdout_prefix="[SERVIDOR]" if log_stdout else None,
+            log_path=log_path, level=log_level, sample_rates=log_sample_rates
+        )
+        
+        # Instantánea de estado publicada por el camino de datos (lectura sin locks)
+        self.status = SnapshotPublisher(self.lamport_clock, self.event_log.ring)
         
         self.running = False
+        self.ready = threading.Event()  # Se activa cuando el socket quedó enlazado
+        
+        # Métricas del camino de datos
+        self.metrics = MetricsRegistry()
+        self.setup_metrics()
+        
+        # Trazado de mensajes muestreados por los clientes
+        self.tracer = Tracer(metrics=self.metrics)
+        self.kernel_timestamps = kernel_timestamps and enable_kernel_timestamps(self.socket)
         
-    def add_event(self, description: str):
-        """Agrega un evento al log."""
-        with self.events_lock:
-            timestamp = time.strftime('%H:%M:%S')
-            self.events.append(f"[{timestamp}] {description}")
-            if len(self.events) > 50:
-                self.events.pop(0)
-            print(f"[SERVIDOR] {description}")
+        # Captura opcional de los datagramas entrantes (reproducibles con replay_udp.py)
+        self.capture = CaptureWriter(capture_path) if capture_path else None
+        self.capture_lock = threading.Lock()
+        
+        # Transportes adicionales a UDP ('unix', 'tcp'; 'shm' siempre se acepta, ver transports.py)
+        # y clientes conectados por ellos: {(par, puerto, transporte): conexión con send/close}
+        self.transports = tuple(transports)
+        self.connections = {}
+        self.unix_socket = None
+        self.unix_path = None
+        self.tcp_socket = None
+        self.tcp_port = tcp_port  # Por defecto, el mismo número que UDP (ver bind)
+        
+    def setup_metrics(self):
+        """Declara las métricas del servidor."""
+        m = self.metrics
+        m.describe('lamport_datagrams_received_total', 'counter', 'Datagramas recibidos por tipo')
+        m.describe('lamport_datagrams_sent_total', 'counter', 'Datagramas enviados por tipo')
+        m.describe('lamport_decode_seconds', 'histogram', 'Tiempo de decodificación JSON de un datagrama')
+        m.describe('lamport_handler_seconds', 'histogram', 'Tiempo de procesamiento por tipo de mensaje')
+        m.describe('lamport_delivery_lag_seconds', 'histogram', 'Tiempo en cola antes de la entrega ordenada')
+        m.describe('lamport_fanout_seconds', 'histogram', 'Tiempo de retransmisión de un broadcast')
+        m.describe('lamport_queue_depth', 'gauge', 'Mensajes pendientes de entrega ordenada')
+        m.describe('lamport_connected_clients', 'gauge', 'Clientes conectados')
+        m.describe('lamport_logical_time', 'gauge', 'Reloj lógico del servidor')
+        m.describe('lamport_events_dropped', 'gauge', 'Eventos descartados por la cola llena del escritor de logs')
+        
+        # Labels por tipo de mensaje, construidos una sola vez
+        self.metric_labels = {}
+        
+        # Gauges evaluados solo al recolectar (len y lecturas atómicas, sin locks)
+        m.set_gauge('lamport_queue_depth', lambda: len(self.message_queue))
+        m.set_gauge('lamport_connected_clients', lambda: len(self.connected_clients))
+        m.set_gauge('lamport_logical_time', lambda: self.lamport_clock.logical_time)
+        m.set_gauge('lamport_events_dropped', lambda: self.event_log.dropped)
+    
+    def type_labels(self, msg_type) -> tuple:
+        """Obtiene (y cachea) los labels de métricas para un tipo de mensaje."""
+        labels = self.metric_labels.get(msg_type)
+        if labels is None:
+            labels = self.metric_labels[msg_type] = (('type', str(msg_type)),)
+        return labels
+    
+    def add_event(self, description: str, level: int = INFO):
+        """Agrega un evento de texto libre al log."""
+        self.event_log.emit('event', description, level=level)
     
     def start(self):
         """Inicia el servidor UDP."""
         try:
-            self.socket.bind((self.host, self.port))
+            self.bind()
             self.running = True
+            self.open_transports()
+            self.ready.set()
             self.add_event(f"Servidor iniciado en {self.host}:{self.port}")
             self.add_event(f"Reloj lógico inicial: {self.lamport_clock.get_time()}")
+            self.status.publish()
             
             # Hilo para procesar mensajes ordenados
             message_processor = threading.Thread(target=self.process_ordered_messages, daemon=True)
@@ -88,6 +213,10 @@ class UDPServer:
             cleanup_thread = threading.Thread(target=self.cleanup_inactive_clients, daemon=True)
             cleanup_thread.start()
             
+            # SIGUSR1 alterna el perfilador (solo desde el hilo principal, en POSIX)
+            if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGUSR1, self.toggle_profiler)
+            
             print(f"🚀 Servidor UDP iniciado en {self.host}:{self.port}")
             print(f"📊 Reloj lógico inicial: {self.lamport_clock.get_time()}")
             print("💡 Esperando clientes...")
@@ -95,48 +224,180 @@ class UDPServer:
             self.listen()
             
         except Exception as e:
-            self.add_event(f"Error al iniciar servidor: {e}")
+            self.add_event(f"Error al iniciar servidor: {e}", ERROR)
             print(f"Error: {e}")
     
     def listen(self):
         """Escucha mensajes UDP entrantes."""
         while self.running:
             try:
-                data, address = self.socket.recvfrom(1024)
-                message_data = json.loads(data.decode())
-                
-                # Procesar mensaje en hilo separado
-                handler = threading.Thread(
-                    target=self.handle_message, 
-                    args=(message_data, address),
-                    daemon=True
-                )
-                handler.start()
-                
+                data, address, received_at = recv_with_timestamp(self.socket, 1024, self.kernel_timestamps)
+                self.dispatch(data, address, received_at)
+            except Exception as e:
+                if self.running:
+                    self.add_event(f"Error al recibir mensaje: {e}", ERROR)
+    
+    def bind(self):
+        """
+        Enlaza el socket UDP y, si se pidió el transporte TCP, su listener.
+        
+        TCP escucha por defecto en el mismo número de puerto que UDP, que es
+        el que conocen los clientes. Con el puerto 0 se busca un número libre
+        en ambos protocolos (el efímero de uno puede estar ocupado en el otro);
+        con `tcp_port` explícito cada uno se enlaza por separado.
+        
+        Raises:
+            OSError: Si algún puerto pedido está ocupado
+        """
+        tcp = 'tcp' in self.transports
+        if tcp and self.port == 0 and self.tcp_port is None:
+            for _ in range(BIND_ATTEMPTS):
+                listener = self.tcp_listener(0)
+                try:
+                    self.socket.bind((self.host, listener.getsockname()[1]))
+                except OSError:
+                    listener.close()
+                    continue
+                self.tcp_socket = listener
+                break
+            else:
+                raise OSError("No se encontró un puerto libre a la vez en UDP y TCP")
+        else:
+            self.socket.bind((self.host, self.port))
+            if tcp:
+                self.tcp_socket = self.tcp_listener(self.port if self.tcp_port is None else self.tcp_port)
+        
+        self.port = self.socket.getsockname()[1]  # Puerto real si se pidió el 0
+        if tcp:
+            self.tcp_port = self.tcp_socket.getsockname()[1]
+    
+    def tcp_listener(self, port: int) -> socket.socket:
+        """Abre el socket TCP que acepta conexiones en `port`."""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind((self.host, port))
+            listener.listen(128)
+        except OSError:
+            listener.close()
+            raise
+        listener.settimeout(1.0)
+        return listener
+    
+    def open_transports(self):
+        """Abre los transportes adicionales pedidos y sus hilos receptores."""
+        if 'unix' in self.transports:
+            self.unix_path = default_unix_path(self.port)
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)  # Socket de una ejecución anterior
+            self.unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.unix_socket.bind(self.unix_path)
+            # Las respuestas no bloquean: lo que no cabe en el buffer de envío se descarta, como en UDP
+            self.unix_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+            threading.Thread(target=self.listen_unix, daemon=True).start()
+            self.add_event(f"Escuchando datagramas locales en {self.unix_path}")
+        
+        if self.tcp_socket is not None:
+            threading.Thread(target=self.accept_tcp, daemon=True).start()
+            self.add_event(f"Escuchando TCP en {self.host}:{self.tcp_port}")
+    
+    def listen_unix(self):
+        """Escucha datagramas AF_UNIX de clientes locales."""
+        while self.running:
+            try:
+                data, path = self.unix_socket.recvfrom(MAX_UNIX_DATAGRAM)
+                if not path:
+                    continue  # Sin ruta propia no hay a dónde responder
+                address = (path, 0, 'unix')
+                if address not in self.connections:
+                    self.connections[address] = UnixPeer(self.unix_socket, path)
+                self.dispatch(data, address, time.time())
             except Exception as e:
                 if self.running:
-                    self.add_event(f"Error al recibir mensaje: {e}")
+                    self.add_event(f"Error al recibir mensaje: {e}", ERROR)
+    
+    def accept_tcp(self):
+        """Acepta conexiones TCP (mensajes prefijados por su longitud)."""
+        while self.running:
+            try:
+                sock, peer = self.tcp_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            address = (peer[0], peer[1], 'tcp')
+            connection = FramedConnection(sock)
+            self.connections[address] = connection
+            threading.Thread(target=self.read_connection, args=(connection, address), daemon=True).start()
+    
+    def dispatch(self, data: bytes, address: tuple, received_at: float):
+        """
+        Decodifica un mensaje recibido y lo procesa en un hilo separado.
+        
+        Args:
+            data: Contenido crudo (JSON)
+            address: Dirección UDP o pseudo-dirección de otro transporte
+            received_at: Instante de llegada en segundos
+        """
+        if self.capture is not None:
+            with self.capture_lock:
+                self.capture.record(data, address, received_at)
+        decode_start = time.perf_counter()
+        message_data = json.loads(data.decode())
+        
+        trace = message_data.get('trace')
+        if isinstance(trace, dict):
+            Tracer.mark(trace, 'server_receive', received_at)
+        self.metrics.observe('lamport_decode_seconds', time.perf_counter() - decode_start)
+        self.metrics.inc('lamport_datagrams_received_total',
+                         self.type_labels(message_data.get('type')))
+        
+        # Procesar mensaje en hilo separado
+        handler = threading.Thread(
+            target=self.handle_message, 
+            args=(message_data, address),
+            daemon=True
+        )
+        handler.start()
     
     def handle_message(self, message_data: dict, address: tuple):
         """Maneja un mensaje recibido."""
+        handler_start = time.perf_counter()
         try:
             msg_type = message_data.get('type')
             client_timestamp = message_data.get('timestamp', 0)
             
-            if msg_type == 'register':
-                self.handle_registration(message_data, address)
+            # Span por handler (no hace nada si el perfilador está desactivado)
+            with self.profiler.span(HANDLER_SPANS.get(msg_type, 'handle_message')):
+                if msg_type == 'register':
+                    self.handle_registration(message_data, address)
+                
+                elif msg_type == 'message':
+                    self.handle_client_message(message_data, address)
+                
+                elif msg_type == 'heartbeat':
+                    self.handle_heartbeat(message_data, address)
                 
-            elif msg_type == 'message':
-                self.handle_client_message(message_data, address)
+                elif msg_type == 'internal_event':
+                    self.handle_internal_event(message_data, address)
                 
-            elif msg_type == 'heartbeat':
-                self.handle_heartbeat(message_data, address)
+                elif msg_type == 'catch_up':
+                    self.handle_catch_up(message_data, address)
                 
-            elif msg_type == 'internal_event':
-                self.handle_internal_event(message_data, address)
+                elif msg_type == 'metrics':
+                    self.handle_metrics_request(message_data, address)
+                
+                elif msg_type == 'profiler':
+                    self.handle_profiler_command(message_data, address)
+                
+                elif msg_type == 'shm_attach':
+                    self.handle_shm_attach(message_data, address)
                 
         except Exception as e:
-            self.add_event(f"Error procesando mensaje: {e}")
+            self.add_event(f"Error procesando mensaje: {e}", ERROR)
+        
+        self.metrics.observe('lamport_handler_seconds', time.perf_counter() - handler_start,
+                             self.type_labels(message_data.get('type')))
     
     def handle_registration(self, data: dict, address: tuple):
         """Maneja el registro de un nuevo cliente."""
@@ -151,17 +412,23 @@ class UDPServer:
             self.connected_clients[client_id] = {
                 'address': address,
                 'name': client_name,
-                'last_seen': time.time(),
-                'registered_at': new_time
+                'last_seen': self.timebase.time(),
+                'registered_at': new_time,
+                'delivery_seq': 0  # Broadcasts enviados a este cliente (para su cola de retención)
             }
+            self.publish_clients()
         
-        self.add_event(f"Cliente {client_name} (ID: {client_id}) registrado desde {address}")
-        self.add_event(f"Reloj actualizado a: {new_time}")
+        self.event_log.emit('client_registered', "Cliente {} (ID: {}) registrado desde {}",
+                            client_name, client_id, address,
+                            lamport=new_time, peer=client_id, msg_ts=client_timestamp)
+        self.event_log.emit('clock_update', "Reloj actualizado a: {}", new_time, lamport=new_time)
+        self.status.publish()
         
         # Responder al cliente
         response = {
             'type': 'register_response',
             'status': 'success',
+            'client_id': client_id,
             'server_timestamp': new_time,
             'message': f'Registrado como {client_name}'
         }
@@ -172,6 +439,7 @@ class UDPServer:
         client_id = data.get('sender_id')
         content = data.get('content')
         client_timestamp = data.get('timestamp')
+        trace = data.get('trace')
         
         # Actualizar reloj según algoritmo de Lamport
         new_time = self.lamport_clock.receive_event(client_timestamp)
@@ -182,25 +450,33 @@ class UDPServer:
             sender_id=client_id,
             content=content,
             timestamp=client_timestamp,  # Usar timestamp del cliente para ordenar
-            message_id=self.message_counters[client_id]
+            message_id=self.message_counters[client_id],
+            trace=trace if isinstance(trace, dict) else None
         )
         
         # Agregar a cola ordenada
+        Tracer.mark(message.trace, 'enqueue')
         with self.queue_lock:
             heapq.heappush(self.message_queue, message)
+            self.status.publish(pending_messages=len(self.message_queue))
+            self.queue_ready.set()
         
         # Actualizar información del cliente
         with self.clients_lock:
             if client_id in self.connected_clients:
-                self.connected_clients[client_id]['last_seen'] = time.time()
+                self.connected_clients[client_id]['last_seen'] = self.timebase.time()
         
-        self.add_event(f"Mensaje recibido de Cliente-{client_id} [T:{client_timestamp}]: {content}")
-        self.add_event(f"Reloj del servidor actualizado a: {new_time}")
+        self.event_log.emit('message_received', "Mensaje recibido de Cliente-{} [T:{}]: {}",
+                            client_id, client_timestamp, content, lamport=new_time,
+                            peer=client_id, msg_ts=client_timestamp, msg_id=message.message_id)
+        self.event_log.emit('clock_update', "Reloj del servidor actualizado a: {}", new_time, lamport=new_time)
+        self.status.publish()
         
         # Responder confirmación
         response = {
             'type': 'message_ack',
             'status': 'received',
+            'client_id': client_id,
             'server_timestamp': new_time,
             'original_timestamp': client_timestamp
         }
@@ -214,14 +490,16 @@ class UDPServer:
         # Actualizar tiempo de última conexión
         with self.clients_lock:
             if client_id in self.connected_clients:
-                self.connected_clients[client_id]['last_seen'] = time.time()
+                self.connected_clients[client_id]['last_seen'] = self.timebase.time()
         
         # Actualizar reloj
         new_time = self.lamport_clock.receive_event(client_timestamp)
+        self.status.publish()
         
         # Responder heartbeat
         response = {
             'type': 'heartbeat_ack',
+            'client_id': client_id,
             'server_timestamp': new_time
         }
         self.send_to_client(response, address)
@@ -233,68 +511,375 @@ class UDPServer:
         
         # Actualizar reloj
         new_time = self.lamport_clock.receive_event(client_timestamp)
-        self.add_event(f"Evento interno de Cliente-{client_id} [T:{client_timestamp}]")
-        self.add_event(f"Reloj del servidor: {new_time}")
+        self.event_log.emit('client_internal_event', "Evento interno de Cliente-{} [T:{}]",
+                            client_id, client_timestamp, lamport=new_time,
+                            peer=client_id, msg_ts=client_timestamp)
+        self.event_log.emit('clock_update', "Reloj del servidor: {}", new_time, lamport=new_time)
+        self.status.publish()
+    
+    def handle_metrics_request(self, data: dict, address: tuple):
+        """
+        Responde con las métricas del servidor.
+        
+        Es una consulta administrativa: no es un evento del proceso, por lo que
+        no modifica el reloj lógico. La respuesta puede superar los 1024 bytes
+        que leen los clientes normales; quien consulta debe usar un buffer mayor.
+        """
+        response = {
+            'type': 'metrics_response',
+            'server_timestamp': self.lamport_clock.get_time()
+        }
+        if data.get('format') == 'prometheus':
+            response['text'] = self.metrics.render_prometheus()
+        else:
+            response['metrics'] = self.metrics.snapshot()
+        self.send_to_client(response, address)
+    
+    def handle_profiler_command(self, data: dict, address: tuple):
+        """
+        Activa, detiene o consulta el perfilador.
+        
+        Solo se aceptan comandos desde la máquina local. Al detenerlo se
+        escribe la traza en `profile_dir` y se responde con su ruta.
+        """
+        if not is_local(address):
+            self.add_event(f"Comando de perfilador rechazado desde {address}")
+            return
+        
+        action = data.get('action', 'status')
+        path = None
+        if action == 'start':
+            self.profiler.start()
+            self.add_event("Perfilador activado")
+        elif action == 'stop':
+            path = self.profiler.stop()
+            self.add_event(f"Perfilador detenido - Traza: {path}")
+        
+        response = {
+            'type': 'profiler_response',
+            'enabled': self.profiler.enabled,
+            'spans': len(self.profiler.spans),
+            'path': path
+        }
+        self.send_to_client(response, address)
+    
+    def handle_shm_attach(self, data: dict, address: tuple):
+        """
+        Se adjunta al segmento de memoria compartida de un cliente local.
+        
+        Desde ahí los mensajes del cliente llegan por el segmento (un hilo
+        lector por cliente) y las respuestas vuelven por él: el cliente queda
+        identificado por la pseudo-dirección (segmento, 0, 'shm').
+        """
+        if not is_local(address):
+            self.add_event(f"Memoria compartida rechazada desde {address}")
+            self.send_to_client({'type': 'shm_attach_response', 'status': 'error',
+                                 'message': 'Solo para clientes locales'}, address)
+            return
+        
+        try:
+            channel = attach_channel(str(data.get('segment')))
+        except (ValueError, OSError) as e:
+            self.add_event(f"No se pudo adjuntar memoria compartida de {address}: {e}", ERROR)
+            self.send_to_client({'type': 'shm_attach_response', 'status': 'error', 'message': str(e)}, address)
+            return
+        
+        shm_address = (channel.shm.name, 0, 'shm')
+        self.connections[shm_address] = channel
+        threading.Thread(target=self.read_connection, args=(channel, shm_address), daemon=True).start()
+        self.add_event(f"Cliente local adjuntado por memoria compartida: {channel.shm.name}")
+        self.send_to_client({'type': 'shm_attach_response', 'status': 'success'}, address)
+    
+    def read_connection(self, connection, address: tuple):
+        """Recibe los mensajes de un cliente TCP o de memoria compartida hasta que alguno cierre."""
+        try:
+            while self.running and not connection.closed and not connection.peer_closed:
+                data = connection.recv(1.0)
+                if data is None:
+                    continue
+                try:
+                    self.dispatch(data, address, time.time())
+                except Exception as e:
+                    self.add_event(f"Error al recibir mensaje: {e}", ERROR)
+        finally:
+            if self.connections.pop(address, None) is not None:
+                connection.close()
+    
+    def toggle_profiler(self, signum=None, frame=None):
+        """Alterna el perfilador (manejador de SIGUSR1)."""
+        path = self.profiler.toggle()
+        if path:
+            self.add_event(f"Perfilador detenido - Traza: {path}")
+        else:
+            self.add_event("Perfilador activado")
+    
+    def handle_catch_up(self, data: dict, address: tuple):
+        """
+        Envía al cliente los mensajes entregados posteriores a `since`.
+        
+        El rango se busca en el historial ordenado y se transmite en lotes
+        acotados por tamaño de datagrama, con una pausa entre lotes para no
+        saturar al cliente ni al servidor. Cada cliente tiene a lo sumo un
+        envío en curso: una solicitud que llega mientras tanto se rechaza.
+        Los cursores inválidos y las solicitudes rechazadas se responden con
+        un lote vacío con `status: 'error'`.
+        """
+        client_id = data.get('client_id')
+        since = data.get('since', 0)
+        since_sender = data.get('since_sender')
+        client_timestamp = data.get('timestamp', 0)
+        
+        # Actualizar reloj según algoritmo de Lamport
+        self.lamport_clock.receive_event(client_timestamp)
+        
+        if not is_int(since) or not (since_sender is None or is_int(since_sender)):
+            self.add_event(f"Catch-up de Cliente-{client_id} con cursor inválido: {since!r}, {since_sender!r}",
+                           WARNING)
+            self.send_catch_up_error(client_id, since, "Cursor inválido: since y since_sender deben ser enteros",
+                                     address)
+            return
+        
+        key = (address, client_id)
+        with self.history_lock:
+            busy = key in self.catch_ups_active
+            if not busy:
+                self.catch_ups_active.add(key)
+        if busy:
+            self.add_event(f"Catch-up de Cliente-{client_id} rechazado: ya hay uno en curso", WARNING)
+            self.send_catch_up_error(client_id, since, "Ya hay un envío de historial en curso", address)
+            return
+        
+        try:
+            self.send_catch_up(client_id, since, since_sender, address)
+        finally:
+            with self.history_lock:
+                self.catch_ups_active.discard(key)
+    
+    def send_catch_up(self, client_id, since: int, since_sender, address: tuple):
+        """Transmite en lotes los mensajes del historial posteriores al cursor."""
+        # Buscar el primer mensaje estrictamente posterior al cursor
+        if since_sender is None:
+            cursor = (since, float('inf'))
+        else:
+            cursor = (since, since_sender, float('inf'))
+        
+        with self.history_lock:
+            start = bisect.bisect_right(self.delivered_history, cursor)
+            pending = self.delivered_history[start:]
+        
+        self.event_log.emit('catch_up', "Catch-up de Cliente-{} desde T:{} - {} mensajes",
+                            client_id, since, len(pending), peer=client_id)
+        
+        batches = self.build_catch_up_batches(pending, truncate=len(address) == 2)
+        for index, batch in enumerate(batches):
+            if index > 0:
+                self.timebase.sleep(self.catch_up_interval)
+            
+            response = {
+                'type': 'catch_up_batch',
+                'status': 'success',
+                'client_id': client_id,
+                'server_timestamp': self.lamport_clock.send_event(),
+                'since': since,
+                'batch': index,
+                'complete': index == len(batches) - 1,
+                'messages': batch
+            }
+            self.status.publish()
+            self.send_to_client(response, address)
+    
+    def send_catch_up_error(self, client_id, since, reason: str, address: tuple):
+        """Responde a una solicitud de historial rechazada con un lote vacío y final."""
+        response = {
+            'type': 'catch_up_batch',
+            'status': 'error',
+            'message': reason,
+            'client_id': client_id,
+            'server_timestamp': self.lamport_clock.send_event(),
+            'since': since,
+            'batch': 0,
+            'complete': True,
+            'messages': []
+        }
+        self.status.publish()
+        self.send_to_client(response, address)
+    
+    def build_catch_up_batches(self, entries: list, truncate: bool = True) -> List[list]:
+        """
+        Agrupa entradas del historial en lotes que caben en un datagrama.
+        
+        Un mensaje que por sí solo no cabe en un datagrama llegaría cortado
+        al cliente UDP (lee 1024 bytes): con `truncate` se recorta su
+        contenido y se marca con `truncated` (longitud original). Los demás
+        transportes no tienen ese límite y reciben el mensaje completo.
+        
+        Returns:
+            Lista de lotes (siempre al menos uno, aunque esté vacío)
+        """
+        # Margen para los campos del sobre del lote
+        budget = MAX_DATAGRAM_SIZE - 200
+        batches = [[]]
+        batch_size = 0
+        
+        for timestamp, sender_id, message_id, content in entries:
+            item = {
+                'sender_id': sender_id,
+                'content': content,
+                'original_timestamp': timestamp,
+                'message_id': message_id
+            }
+            item_size = len(json.dumps(item).encode())
+            if truncate and item_size > budget:
+                item, item_size = self.truncate_history_item(item, budget)
+            
+            current = batches[-1]
+            if current and (len(current) >= self.catch_up_batch_size or batch_size + item_size > budget):
+                current = []
+                batches.append(current)
+                batch_size = 0
+            
+            current.append(item)
+            batch_size += item_size
+        
+        return batches
+    
+    @staticmethod
+    def truncate_history_item(item: dict, budget: int) -> tuple:
+        """
+        Recorta el contenido de una entrada del historial para que ocupe hasta `budget` bytes.
+        
+        Returns:
+            (entrada recortada, tamaño codificado)
+        """
+        content = str(item['content'])
+        item = dict(item, content='', truncated=len(content))
+        allowed = budget - len(json.dumps(item).encode())
+        
+        # Búsqueda binaria del prefijo más largo que entra (los escapes JSON ocupan hasta 6 bytes)
+        low, high = 0, min(len(content), max(0, allowed))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(json.dumps(content[:middle]).encode()) - 2 <= allowed:
+                low = middle
+            else:
+                high = middle - 1
+        item['content'] = content[:low]
+        return item, len(json.dumps(item).encode())
+    
+    def record_delivery(self, message: Message):
+        """Registra un mensaje entregado en el historial acotado."""
+        entry = (message.timestamp, message.sender_id, message.message_id, message.content)
+        with self.history_lock:
+            bisect.insort(self.delivered_history, entry)
+            if len(self.delivered_history) > self.history_limit:
+                # Descartar el más antiguo en orden de Lamport
+                del self.delivered_history[0]
     
     def process_ordered_messages(self):
-        """Procesa mensajes en orden según timestamp de Lamport."""
+        """
+        Procesa mensajes en orden según timestamp de Lamport.
+        
+        Entrega un mensaje cada `process_interval` segundos; con 0 entrega en
+        cuanto hay mensajes y espera (sin sondear) cuando la cola está vacía.
+        """
         while self.running:
             try:
-                with self.queue_lock:
-                    if self.message_queue:
-                        # Procesar el mensaje más antiguo
-                        message = heapq.heappop(self.message_queue)
-                        self.add_event(f"PROCESANDO ORDENADAMENTE: {message}")
+                message = None
+                with self.profiler.span('process_ordered_messages', 'delivery'):
+                    with self.queue_lock:
+                        if self.message_queue:
+                            # Procesar el mensaje más antiguo
+                            message = heapq.heappop(self.message_queue)
+                            self.status.publish(pending_messages=len(self.message_queue))
+                            Tracer.mark(message.trace, 'dequeue')
+                            self.metrics.observe('lamport_delivery_lag_seconds',
+                                                 time.time() - message.received_time)
+                            self.event_log.emit('message_delivered', "PROCESANDO ORDENADAMENTE: {}", message,
+                                                peer=message.sender_id, msg_ts=message.timestamp,
+                                                msg_id=message.message_id)
+                            
+                            # Retransmitir a todos los clientes conectados
+                            self.broadcast_message(message)
+                            self.record_delivery(message)
                         
-                        # Retransmitir a todos los clientes conectados
-                        self.broadcast_message(message)
+                        if not self.message_queue:
+                            self.queue_ready.clear()
                 
-                time.sleep(0.5)  # Procesar cada 0.5 segundos
+                # Publicar fuera del lock: el reloj y los eventos de la entrega ya están registrados
+                if message is not None:
+                    self.status.publish()
+                
+                if self.process_interval > 0:
+                    self.timebase.sleep(self.process_interval)
+                elif message is None:
+                    self.timebase.wait(self.queue_ready, 0.1)
                 
             except Exception as e:
-                self.add_event(f"Error procesando mensajes ordenados: {e}")
+                self.add_event(f"Error procesando mensajes ordenados: {e}", ERROR)
     
     def broadcast_message(self, message: Message):
         """Retransmite un mensaje a todos los clientes conectados."""
-        timestamp = self.lamport_clock.send_event()
-        
-        broadcast_data = {
-            'type': 'broadcast',
-            'sender_id': message.sender_id,
-            'content': message.content,
-            'original_timestamp': message.timestamp,
-            'server_timestamp': timestamp,
-            'message_id': message.message_id
-        }
-        
-        with self.clients_lock:
-            for client_id, client_info in self.connected_clients.items():
-                if client_id != message.sender_id:  # No enviar de vuelta al emisor
-                    try:
-                        self.send_to_client(broadcast_data, client_info['address'])
-                    except Exception as e:
-                        self.add_event(f"Error enviando broadcast a Cliente-{client_id}: {e}")
+        with self.profiler.span('broadcast_message', 'delivery'):
+            fanout_start = time.perf_counter()
+            timestamp = self.lamport_clock.send_event()
+            
+            broadcast_data = {
+                'type': 'broadcast',
+                'sender_id': message.sender_id,
+                'content': message.content,
+                'original_timestamp': message.timestamp,
+                'server_timestamp': timestamp,
+                'message_id': message.message_id
+            }
+            
+            if message.trace is not None:
+                Tracer.mark(message.trace, 'fanout')
+                broadcast_data['trace'] = message.trace
+                self.tracer.record(message.trace)
+            
+            with self.clients_lock:
+                for client_id, client_info in self.connected_clients.items():
+                    if client_id != message.sender_id:  # No enviar de vuelta al emisor
+                        client_info['delivery_seq'] += 1
+                        try:
+                            self.send_to_client(dict(broadcast_data, recipient_id=client_id,
+                                                     delivery_seq=client_info['delivery_seq']),
+                                                client_info['address'])
+                        except Exception as e:
+                            self.add_event(f"Error enviando broadcast a Cliente-{client_id}: {e}", ERROR)
+            
+            self.metrics.observe('lamport_fanout_seconds', time.perf_counter() - fanout_start)
     
     def send_to_client(self, data: dict, address: tuple):
         """Envía datos a un cliente específico."""
         try:
             message = json.dumps(data).encode()
-            self.socket.sendto(message, address)
+            connection = self.connections.get(address)
+            if connection is not None:
+                if not connection.send(message):
+                    if address[2] == 'unix':
+                        self.connections.pop(address, None)  # Se vuelve a agregar si el cliente sigue vivo
+                    raise BlockingIOError(f"Conexión {address[2]} llena o cerrada")
+            else:
+                self.socket.sendto(message, address)
+            self.metrics.inc('lamport_datagrams_sent_total', self.type_labels(data.get('type')))
         except Exception as e:
-            self.add_event(f"Error enviando a {address}: {e}")
+            self.add_event(f"Error enviando a {address}: {e}", ERROR)
     
     def internal_events(self):
         """Genera eventos internos periódicamente."""
         while self.running:
-            time.sleep(5)  # Evento interno cada 5 segundos
+            self.timebase.sleep(5)  # Evento interno cada 5 segundos
             new_time = self.lamport_clock.increment()
-            self.add_event(f"Evento interno del servidor - Reloj: {new_time}")
+            self.event_log.emit('internal_event', "Evento interno del servidor - Reloj: {}", new_time,
+                                lamport=new_time)
+            self.status.publish()
     
     def cleanup_inactive_clients(self):
         """Limpia clientes inactivos."""
         while self.running:
-            time.sleep(30)  # Revisar cada 30 segundos
-            current_time = time.time()
+            self.timebase.sleep(30)  # Revisar cada 30 segundos
+            current_time = self.timebase.time()
             
             with self.clients_lock:
                 inactive_clients = []
@@ -306,30 +891,59 @@ class UDPServer:
                     client_name = self.connected_clients[client_id]['name']
                     del self.connected_clients[client_id]
                     self.add_event(f"Cliente {client_name} (ID: {client_id}) desconectado por inactividad")
+                
+                if inactive_clients:
+                    self.publish_clients()
+    
+    def publish_clients(self):
+        """Publica el conjunto de clientes (llamar con `clients_lock` tomado)."""
+        self.status.publish(clients=tuple(
+            (client_id, client_info['name']) for client_id, client_info in self.connected_clients.items()
+        ))
     
     def get_status(self):
-        """Obtiene el estado actual del servidor."""
-        with self.clients_lock:
-            clients = len(self.connected_clients)
+        """
+        Obtiene el estado actual del servidor.
         
-        with self.queue_lock:
-            pending_messages = len(self.message_queue)
+        Lee la última instantánea publicada: no toma ningún lock del camino de
+        datos, por lo que consultarlo con frecuencia no afecta el procesamiento.
+        """
+        snapshot = self.status.current
         
         return {
-            'logical_time': self.lamport_clock.get_time(),
-            'connected_clients': clients,
-            'pending_messages': pending_messages,
-            'events': self.events[-10:] if self.events else []
+            'logical_time': snapshot.logical_time,
+            'connected_clients': len(snapshot.clients),
+            'pending_messages': snapshot.pending_messages,
+            'events': self.event_log.recent(10, end_seq=snapshot.event_seq),
+            'epoch': snapshot.epoch,
+            'events_dropped': self.event_log.dropped
         }
     
     def stop(self):
         """Detiene el servidor."""
         self.running = False
         self.socket.close()
+        for listener in (self.unix_socket, self.tcp_socket):
+            if listener is not None:
+                listener.close()
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        for address in list(self.connections):
+            connection = self.connections.pop(address, None)
+            if connection is not None:
+                connection.close()
+        if self.capture is not None:
+            self.capture.close()
+            self.add_event(f"Captura guardada en {self.capture.path}: {self.capture.count} datagramas")
         self.add_event("Servidor detenido")
+        self.event_log.close()
 
 if __name__ == '__main__':
-    server = UDPServer()
+    server = UDPServer(clock_state_path=os.getenv('CLOCK_STATE_PATH'),
+                       log_path=os.getenv('EVENT_LOG_PATH'),
+                       capture_path=os.getenv('CAPTURE_PATH'),
+                       transports=[t for t in os.getenv('TRANSPORTS', '').split(',') if t],
+                       tcp_port=int(os.getenv('TCP_PORT')) if os.getenv('TCP_PORT') else None)
     try:
         server.start()
     except KeyboardInterrupt: